@@ -0,0 +1,77 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.harness import REFERENCE_PHASE, SCENARIOS, Harness, check_ratios
+from qenerate.core.manifest import qenerate_version
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Time the phases of code generation for a set of scenarios.",
+    )
+    parser.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=[s.name for s in SCENARIOS],
+        help="Scenario to run. Can be given multiple times. Defaults to all.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per scenario. The fastest run is reported per phase.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of render workers. 0 uses one worker per CPU.",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write JSON results to a file"
+    )
+    parser.add_argument(
+        "--check",
+        type=str,
+        default=None,
+        help="JSON file with limits per scenario and phase, as multiples of "
+        f"{REFERENCE_PHASE}. Exits non-zero if any limit is exceeded.",
+    )
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    with tempfile.TemporaryDirectory(prefix="qenerate-bench-") as workspace:
+        harness = Harness(workspace=Path(workspace), repeat=args.repeat, jobs=args.jobs)
+        results = {scenario.name: harness.run(scenario) for scenario in scenarios}
+
+    report = {
+        "qenerate": qenerate_version(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "jobs": args.jobs,
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)  # ruff: ignore[print]
+
+    if args.check:
+        limits = json.loads(Path(args.check).read_text(encoding="utf-8"))
+        violations = check_ratios(results, limits)
+        for violation in violations:
+            print(f"Regression: {violation}", file=sys.stderr)  # ruff: ignore[print]
+        if violations:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
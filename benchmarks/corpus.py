@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from graphql import (
+    GraphQLField,
+    GraphQLInterfaceType,
+    GraphQLObjectType,
+    GraphQLSchema,
+    get_named_type,
+    is_leaf_type,
+    is_required_argument,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+PLUGIN_HEADER = "# qenerate: plugin=pydantic_v2\n"
+
+# Scalar fields selected per object, in addition to the nested objects
+LEAF_FIELDS_PER_SELECTION = 5
+
+type CompositeType = GraphQLObjectType | GraphQLInterfaceType
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of a synthetic corpus.
+
+    Every query selects one root field and spreads a fragment on its type.
+    Each fragment selects a few leaf fields and spreads `fanout` fragments
+    on nested objects, down to `depth` levels. Fragments on the same type
+    and level are shared between queries, i.e., the fragments form a DAG.
+    """
+
+    queries: int
+    depth: int
+    fanout: int
+
+
+def _selectable(field: GraphQLField) -> bool:
+    return not any(is_required_argument(arg) for arg in field.args.values())
+
+
+def _composite(field: GraphQLField) -> CompositeType | None:
+    named_type = get_named_type(field.type)
+    if isinstance(named_type, (GraphQLObjectType, GraphQLInterfaceType)):
+        return named_type
+    return None
+
+
+class CorpusGenerator:
+    """Write a synthetic .gql corpus for a schema into a directory."""
+
+    def __init__(self, schema: GraphQLSchema, spec: CorpusSpec) -> None:
+        if not schema.query_type:
+            raise ValueError("Schema does not define a query type")
+        self._schema = schema
+        self._spec = spec
+        self._fragments: dict[str, str] = {}
+        self._roots = [
+            (name, field_type)
+            for name, field in schema.query_type.fields.items()
+            if _selectable(field) and (field_type := _composite(field))
+        ]
+
+    def _fragment(self, composite_type: CompositeType, depth: int) -> str:
+        """Name of the fragment for type and depth, defined on first use."""
+        name = f"{composite_type.name}D{depth}"
+        if name in self._fragments:
+            return name
+        # Reserve the name, recursive types would define it again otherwise
+        self._fragments[name] = ""
+
+        selections: list[str] = []
+        nested = 0
+        for field_name, field in composite_type.fields.items():
+            if not _selectable(field):
+                continue
+            nested_type = _composite(field)
+            if nested_type is None and is_leaf_type(get_named_type(field.type)):
+                if len(selections) < LEAF_FIELDS_PER_SELECTION:
+                    selections.append(field_name)
+            elif nested_type and depth > 0 and nested < self._spec.fanout:
+                spread = self._fragment(nested_type, depth - 1)
+                selections.append(f"{field_name} {{ ...{spread} }}")
+                nested += 1
+        if not selections:
+            selections.append("__typename")
+
+        body = "\n".join(f"  {selection}" for selection in selections)
+        self._fragments[name] = (
+            f"fragment {name} on {composite_type.name} {{\n{body}\n}}\n"
+        )
+        return name
+
+    def write(self, directory: Path) -> int:
+        """Returns the amount of written definitions."""
+        (directory / "queries").mkdir(parents=True, exist_ok=True)
+        (directory / "fragments").mkdir(parents=True, exist_ok=True)
+        for i in range(self._spec.queries):
+            root_field, root_type = self._roots[i % len(self._roots)]
+            fragment = self._fragment(root_type, self._spec.depth)
+            (directory / "queries" / f"q{i}.gql").write_text(
+                f"{PLUGIN_HEADER}query Q{i} {{\n  {root_field} {{ ...{fragment} }}\n}}\n",
+                encoding="utf-8",
+            )
+        for name, definition in self._fragments.items():
+            (directory / "fragments" / f"{name}.gql").write_text(
+                PLUGIN_HEADER + definition, encoding="utf-8"
+            )
+        return self._spec.queries + len(self._fragments)
@@ -0,0 +1,218 @@
+import json
+import shutil
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from graphql import IntrospectionQuery, build_client_schema
+
+from benchmarks.corpus import PLUGIN_HEADER, CorpusGenerator, CorpusSpec
+from qenerate.core.code_command import CodeCommand
+from qenerate.core.preprocessor import GQLDefinitionType, Preprocessor
+from qenerate.core.writer import OutputWriter
+from qenerate.plugins.pydantic.plugin import PydanticV2Plugin
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from graphql import GraphQLSchema
+
+    from qenerate.core.plugin import GeneratedFile
+
+GENERATOR_DIR = Path("tests/generator")
+
+PHASES = (
+    "introspection_load",
+    "build_client_schema",
+    "process_file",
+    "validate",
+    "generate_fragments",
+    "generate_operations",
+    "write",
+)
+
+# Building the schema only depends on graphql-core, i.e., not on qenerate.
+# It serves as the yardstick for the other phases.
+REFERENCE_PHASE = "build_client_schema"
+
+type Timings = dict[str, float]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A set of scopes, i.e., directories, generated against one introspection.
+
+    Scopes are generated independently of each other, as fixture cases may
+    reuse definition names. Phase timings are summed over all scopes.
+    """
+
+    name: str
+    introspection: Path
+    fixture_cases: tuple[str, ...] = ()
+    corpus: CorpusSpec | None = None
+
+
+SCENARIOS = (
+    Scenario(
+        name="app-interface-fixtures",
+        introspection=GENERATOR_DIR / "introspection-app-interface.json",
+        fixture_cases=(
+            "simple_queries",
+            "complex_queries",
+            "fragments",
+            "simple_queries_with_fragments",
+            "complex_queries_with_fragments",
+        ),
+    ),
+    Scenario(
+        name="github-fixtures",
+        introspection=GENERATOR_DIR / "introspection-github.json",
+        fixture_cases=("github",),
+    ),
+    Scenario(
+        name="synthetic-wide",
+        introspection=GENERATOR_DIR / "introspection-app-interface.json",
+        corpus=CorpusSpec(queries=200, depth=1, fanout=4),
+    ),
+    Scenario(
+        name="synthetic-deep",
+        introspection=GENERATOR_DIR / "introspection-app-interface.json",
+        corpus=CorpusSpec(queries=50, depth=4, fanout=3),
+    ),
+)
+
+
+@dataclass
+class _Stopwatch:
+    timings: Timings = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+
+class Harness:
+    def __init__(self, workspace: Path, repeat: int = 3, jobs: int = 1) -> None:
+        self._workspace = workspace
+        self._repeat = repeat
+        self._jobs = jobs
+
+    def _prepare(self, scenario: Scenario, schema: GraphQLSchema) -> list[Path]:
+        """Copy fixtures or write the synthetic corpus into the workspace."""
+        root = self._workspace / scenario.name
+        shutil.rmtree(root, ignore_errors=True)
+        scopes: list[Path] = []
+        for case in scenario.fixture_cases:
+            scope = root / case
+            scope.mkdir(parents=True)
+            for source in sorted((GENERATOR_DIR / "definitions" / case).glob("*.gql")):
+                (scope / source.name).write_text(
+                    PLUGIN_HEADER + source.read_text(encoding="utf-8"),
+                    encoding="utf-8",
+                )
+            scopes.append(scope)
+        if scenario.corpus:
+            CorpusGenerator(schema=schema, spec=scenario.corpus).write(root)
+            scopes.append(root)
+        return scopes
+
+    @staticmethod
+    def _run_scope(
+        stopwatch: _Stopwatch, scope: Path, schema: GraphQLSchema, jobs: int
+    ) -> None:
+        with stopwatch.phase("process_file"):
+            definitions = [
+                definition
+                for file in sorted(scope.rglob("*.gql"))
+                for definition in Preprocessor.process_file(file)
+            ]
+        with stopwatch.phase("validate"):
+            Preprocessor().validate(definitions=definitions, schema=schema)
+
+        plugin = PydanticV2Plugin()
+        with stopwatch.phase("generate_fragments"):
+            fragments = plugin.generate_fragments(
+                definitions=[
+                    d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT
+                ],
+                schema=schema,
+                jobs=jobs,
+            )
+        with stopwatch.phase("generate_operations"):
+            operations = plugin.generate_operations(
+                definitions=[
+                    d for d in definitions if d.kind != GQLDefinitionType.FRAGMENT
+                ],
+                schema=schema,
+                fragments=fragments,
+                jobs=jobs,
+            )
+
+        files: list[GeneratedFile] = [*fragments, *operations]
+        for file in files:
+            file.file.unlink(missing_ok=True)
+        with stopwatch.phase("write"):
+            OutputWriter().write(files)
+
+    def _run_once(self, scenario: Scenario, scopes: list[Path]) -> Timings:
+        stopwatch = _Stopwatch()
+        with stopwatch.phase("introspection_load"):
+            introspection = json.loads(scenario.introspection.read_bytes())["data"]
+        with stopwatch.phase("build_client_schema"):
+            introspection = CodeCommand.sanitize_introspection(introspection)
+            schema = build_client_schema(cast("IntrospectionQuery", introspection))
+        for scope in scopes:
+            self._run_scope(stopwatch, scope=scope, schema=schema, jobs=self._jobs)
+        return stopwatch.timings
+
+    def run(self, scenario: Scenario) -> dict[str, Any]:
+        """Best-of-repeat timings in seconds per phase."""
+        introspection = json.loads(scenario.introspection.read_bytes())["data"]
+        schema = build_client_schema(
+            cast(
+                "IntrospectionQuery",
+                CodeCommand.sanitize_introspection(introspection),
+            )
+        )
+        scopes = self._prepare(scenario, schema=schema)
+        definitions = sum(len(list(scope.rglob("*.gql"))) for scope in scopes)
+
+        runs = [self._run_once(scenario, scopes) for _ in range(self._repeat)]
+        timings = {phase: min(run[phase] for run in runs) for phase in PHASES}
+        return {
+            "definitions": definitions,
+            "timings": timings,
+            "total": sum(timings.values()),
+        }
+
+
+def check_ratios(
+    results: dict[str, dict[str, Any]], limits: dict[str, dict[str, float]]
+) -> list[str]:
+    """Phases exceeding their limit relative to the reference phase.
+
+    Absolute timings depend on the speed of the host. Hence, limits are
+    given per scenario and phase as multiples of REFERENCE_PHASE measured
+    in the same run. "total" refers to the sum of all phases. Scenarios and
+    phases without limit are not checked.
+    """
+    violations: list[str] = []
+    for scenario, scenario_limits in limits.items():
+        if scenario not in results:
+            continue
+        result = results[scenario]
+        measured = {**result["timings"], "total": result["total"]}
+        reference = measured[REFERENCE_PHASE]
+        for phase, limit in scenario_limits.items():
+            ratio = measured.get(phase, 0.0) / reference
+            if ratio > limit:
+                violations.append(
+                    f"{scenario}/{phase}: {ratio:.1f}x {REFERENCE_PHASE} > {limit:.1f}x"
+                )
+    return violations
@@ -1,9 +1,138 @@
+# ruff: file-ignore[import-outside-top-level]
 import argparse
+import json
+import sys
 from importlib.metadata import version
+from pathlib import Path
 
-from qenerate.core.code_command import CodeCommand
-from qenerate.core.introspection_command import IntrospectionCommand
-from qenerate.core.preprocessor import Preprocessor
+from qenerate.core.protocol import COMMAND_CHECK, COMMAND_GENERATE
+
+# Commands import their modules on demand, e.g., the thin client must not
+# pay for graphql-core and the plugins
+
+
+def _jobs(value: str) -> int:
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {jobs}")
+    return jobs
+
+
+def _introspection(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    from qenerate.core.introspection_command import IntrospectionCommand
+
+    if not args.introspection:
+        if not args.url:
+            parser.error("either a URL or -i is required")
+        IntrospectionCommand.introspection_query(args.url, prune_to=args.prune_to)
+        return
+    if args.url or not args.prune_to:
+        parser.error("-i requires --prune-to and cannot be combined with a URL")
+    IntrospectionCommand.prune_file(
+        introspection_file_path=args.introspection, prune_to=args.prune_to
+    )
+
+
+def _watch(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.lazy_schema:
+        parser.error("--lazy-schema cannot be combined with --watch")
+    if args.profile is not None:
+        parser.error("--profile cannot be combined with --watch")
+    if args.shared_models:
+        parser.error("--shared-models cannot be combined with --watch")
+    if args.package_index:
+        parser.error("--package-index cannot be combined with --watch")
+    from qenerate.core.preprocessor import Preprocessor
+    from qenerate.core.watch_command import WatchCommand
+
+    watch_command = WatchCommand(
+        preprocessor=Preprocessor(),
+        introspection_file_path=args.introspection,
+        directory=args.dir,
+        cache_dir=args.cache_dir,
+        jobs=args.jobs,
+    )
+    watch_command.watch()
+
+
+def _code(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.shared_models and args.cache_dir:
+        parser.error("--shared-models cannot be combined with --cache-dir")
+    if args.package_index and args.cache_dir:
+        parser.error("--package-index cannot be combined with --cache-dir")
+    if args.shared_models and not Path(args.shared_models).is_dir():
+        parser.error(f"--shared-models {args.shared_models} is not a directory")
+    if args.profile is not None and args.jobs != 1:
+        # Steps running in worker processes cannot be recorded
+        parser.error("--profile cannot be combined with --jobs other than 1")
+    from qenerate.core.code_command import CodeCommand
+    from qenerate.core.preprocessor import Preprocessor
+    from qenerate.core.profiler import DEFAULT_TOP_DEFINITIONS, Profiler, profiling
+
+    code_command = CodeCommand(preprocessor=Preprocessor())
+    profiler = Profiler(enabled=args.profile is not None)
+    with profiling(profiler):
+        report = code_command.generate_code(
+            introspection_file_path=args.introspection,
+            directory=args.dir,
+            cache_dir=args.cache_dir,
+            jobs=args.jobs,
+            lazy_schema=args.lazy_schema,
+            shared_models=args.shared_models,
+            package_index=args.package_index,
+        )
+    print(  # ruff: ignore[print]
+        f"{report.written} files written, {report.skipped} files unchanged",
+        file=sys.stderr,
+    )
+    if not profiler.enabled:
+        return
+    top = DEFAULT_TOP_DEFINITIONS if args.profile_top is None else args.profile_top
+    print(profiler.report(top=top), file=sys.stderr)  # ruff: ignore[print]
+    if args.profile:
+        Path(args.profile).write_text(
+            json.dumps(profiler.to_dict(), indent=2) + "\n", encoding="utf-8"
+        )
+
+
+def _persisted_queries(args: argparse.Namespace) -> None:
+    from qenerate.core.code_command import CodeCommand
+    from qenerate.core.persisted_queries import PersistedQueryManifest
+    from qenerate.core.preprocessor import Preprocessor
+
+    code_command = CodeCommand(preprocessor=Preprocessor())
+    queries = code_command.persisted_queries(directory=args.dir, jobs=args.jobs)
+    manifest = PersistedQueryManifest.render(queries)
+    if not args.output:
+        sys.stdout.write(manifest)
+        return
+    Path(args.output).write_text(manifest, encoding="utf-8")
+    print(  # ruff: ignore[print]
+        f"{len(queries)} persisted queries written to {args.output}",
+        file=sys.stderr,
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    from qenerate.core.serve_command import ServeCommand
+
+    ServeCommand(cache_dir=args.cache_dir, jobs=args.jobs).serve(args.socket)
+
+
+def _client(args: argparse.Namespace) -> None:
+    from qenerate.core.client_command import ClientCommand
+
+    ok = ClientCommand.run(
+        socket_path=args.socket,
+        command=args.command,
+        introspection_file_path=args.introspection,
+        directory=args.dir,
+    )
+    if not ok:
+        sys.exit(1)
 
 
 def run() -> None:
@@ -18,7 +147,24 @@ def run() -> None:
         "introspection",
         help="Run introspection query on given GQL URL.",
     )
-    parser_introspection.add_argument("url", type=str, help="URL to run query against")
+    parser_introspection.add_argument(
+        "url", type=str, nargs="?", help="URL to run query against"
+    )
+    parser_introspection.add_argument(
+        "-i",
+        dest="introspection",
+        type=str,
+        default=None,
+        help="Prune an existing introspection query json instead of querying a URL",
+    )
+    parser_introspection.add_argument(
+        "--prune-to",
+        dest="prune_to",
+        type=str,
+        default=None,
+        help="Directory with .gql files. Only emit the types, fields and "
+        "directives these definitions use.",
+    )
 
     parser_generator = subparsers.add_parser(
         "code",
@@ -30,20 +176,159 @@ def run() -> None:
         type=str,
         help="Specify introspection query json",
     )
+    parser_generator.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        default=None,
+        help="Directory to persist a manifest of generated definitions and the "
+        "compiled schema. If given, only definitions with changed inputs are "
+        "generated again.",
+    )
+    parser_generator.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=_jobs,
+        default=1,
+        help="Number of workers used to preprocess and render definitions. "
+        "0 uses one worker per CPU.",
+    )
+    parser_generator.add_argument(
+        "--lazy-schema",
+        dest="lazy_schema",
+        action="store_true",
+        help="Only build the schema types reachable from the definitions. "
+        "Speeds up generation for large schemas. Not supported with --watch.",
+    )
+    parser_generator.add_argument(
+        "--shared-models",
+        dest="shared_models",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="Declare classes which several operations declare identically once "
+        "in DIR/<plugin>_shared.py and import them from there. "
+        "Operations are rendered serially, i.e., --jobs does not apply. "
+        "Not supported with --cache-dir or --watch.",
+    )
+    parser_generator.add_argument(
+        "--package-index",
+        dest="package_index",
+        action="store_true",
+        help="Write an __init__.py to every directory with generated modules, "
+        "which imports generated classes and functions on first access. "
+        "Not supported with --cache-dir or --watch.",
+    )
+    parser_generator.add_argument(
+        "--profile",
+        dest="profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="Print wall and CPU time per phase and the slowest definitions. "
+        "Writes all timings as JSON if FILE is given, e.g., --profile=out.json. "
+        "Requires --jobs 1.",
+    )
+    parser_generator.add_argument(
+        "--profile-top",
+        dest="profile_top",
+        type=int,
+        default=None,
+        help="Number of slowest definitions to print with --profile.",
+    )
+    parser_generator.add_argument(
+        "--watch",
+        dest="watch",
+        action="store_true",
+        help="Keep running and regenerate code whenever .gql files "
+        "or the introspection change.",
+    )
     parser_generator.add_argument(
         "dir", type=str, help="Specify introspection query json"
     )
 
+    parser_persisted = subparsers.add_parser(
+        "persisted-queries",
+        help="Export a manifest of the sha256 hashes of all generated operations.",
+    )
+    parser_persisted.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        type=str,
+        default=None,
+        help="Write the manifest to this file instead of stdout",
+    )
+    parser_persisted.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=_jobs,
+        default=1,
+        help="Number of workers used to preprocess definitions. "
+        "0 uses one worker per CPU.",
+    )
+    parser_persisted.add_argument("dir", type=str, help="Directory with .gql files")
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Run a codegen daemon on a Unix socket.",
+    )
+    parser_serve.add_argument(
+        "--socket", dest="socket", type=str, required=True, help="Socket path"
+    )
+    parser_serve.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        default=None,
+        help="Directory to persist manifests and compiled schemas.",
+    )
+    parser_serve.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=_jobs,
+        default=1,
+        help="Number of workers used to render definitions. 0 uses one worker per CPU.",
+    )
+
+    parser_client = subparsers.add_parser(
+        "client",
+        help="Send a request to a running codegen daemon.",
+    )
+    parser_client.add_argument(
+        "--socket", dest="socket", type=str, required=True, help="Socket path"
+    )
+    parser_client.add_argument(
+        "command",
+        choices=[COMMAND_GENERATE, COMMAND_CHECK],
+        help="generate writes changed files, check only reports stale files",
+    )
+    parser_client.add_argument(
+        "-i",
+        dest="introspection",
+        type=str,
+        help="Specify introspection query json",
+    )
+    parser_client.add_argument("dir", type=str, help="Directory with .gql files")
+
     args = parser.parse_args()
 
     if args.subcommand == "introspection":
-        IntrospectionCommand.introspection_query(args.url)
+        _introspection(parser, args)
+    elif args.subcommand == "code" and args.watch:
+        _watch(parser, args)
     elif args.subcommand == "code":
-        code_command = CodeCommand(preprocessor=Preprocessor())
-        code_command.generate_code(
-            introspection_file_path=args.introspection,
-            directory=args.dir,
-        )
+        _code(parser, args)
+    elif args.subcommand == "persisted-queries":
+        _persisted_queries(args)
+    elif args.subcommand == "serve":
+        _serve(args)
+    elif args.subcommand == "client":
+        _client(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import json
+import socket
+import sys
+from pathlib import Path
+from typing import Any
+
+from qenerate.core.protocol import COMMAND_CHECK
+
+
+class ClientCommand:
+    @staticmethod
+    def request(socket_path: str, request: dict[str, Any]) -> dict[str, Any]:
+        with (
+            socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock,
+            sock.makefile("rwb") as f,
+        ):
+            sock.connect(socket_path)
+            f.write(json.dumps(request).encode() + b"\n")
+            f.flush()
+            return json.loads(f.readline())
+
+    @staticmethod
+    def run(
+        socket_path: str, command: str, introspection_file_path: str, directory: str
+    ) -> bool:
+        """Send a request to a running daemon and print its response.
+
+        Returns whether the request succeeded, i.e., for check whether
+        all outputs are up-to-date.
+        """
+        response = ClientCommand.request(
+            socket_path,
+            {
+                "command": command,
+                "cwd": str(Path.cwd()),
+                "introspection": introspection_file_path,
+                "directory": directory,
+            },
+        )
+        if not response["ok"]:
+            print(response["error"], file=sys.stderr)  # ruff: ignore[print]
+            return False
+        if command == COMMAND_CHECK:
+            for stale in response["stale"]:
+                print(f"{stale} is not up-to-date", file=sys.stderr)  # ruff: ignore[print]
+            return not response["stale"]
+        print(  # ruff: ignore[print]
+            f"{response['written']} files written, "
+            f"{response['skipped']} files unchanged",
+            file=sys.stderr,
+        )
+        return True
@@ -1,5 +1,8 @@
+import hashlib
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
 
@@ -7,18 +10,38 @@ from graphql import GraphQLSchema, IntrospectionQuery, build_client_schema
 from graphql.language import DirectiveLocation
 
 from qenerate.core.feature_flag_parser import FeatureFlagError
+from qenerate.core.introspection_pruner import IntrospectionPruner
+from qenerate.core.manifest import (
+    MANIFEST_FILE_NAME,
+    Manifest,
+    definition_key,
+    qenerate_version,
+)
+from qenerate.core.package_index import PackageIndex
+from qenerate.core.parallel import resolve_jobs
+from qenerate.core.plugin import Fragment
 from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType, Preprocessor
+from qenerate.core.profiler import STEP_PARSE, active_profiler
+from qenerate.core.schema_cache import SchemaCache, ValidationCache
+from qenerate.core.writer import OutputWriter
+from qenerate.plugins.msgspec.plugin import MsgspecPlugin
 from qenerate.plugins.pydantic.plugin import (
     PydanticV1Plugin,
     PydanticV2Plugin,
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from qenerate.core.manifest import ManifestEntry
+    from qenerate.core.persisted_queries import PersistedQuery
     from qenerate.core.plugin import GeneratedFile, Plugin
+    from qenerate.core.writer import WriteReport
 
 plugins: dict[str, Plugin] = {
     "pydantic_v1": PydanticV1Plugin(),
     "pydantic_v2": PydanticV2Plugin(),
+    "msgspec": MsgspecPlugin(),
 }
 
 
@@ -30,25 +53,68 @@ class CodeCommand:
         self._plugins = plugins
 
     @staticmethod
-    def _find_query_files(directory: str) -> list[str]:
-        result: list[str] = []
-        for root, _, files in os.walk(directory):
-            result.extend(
-                os.path.join(root, name) for name in files if name.endswith(".gql")
+    def _find_query_files(directory: str) -> Iterator[str]:
+        for root, dirs, files in os.walk(directory):
+            # Sorting makes the order independent of the file system
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".gql"):
+                    yield os.path.join(root, name)
+
+    def _process_file(self, file: str) -> list[GQLDefinition]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            definitions = self._preprocessor.process_file(Path(file))
+        except FeatureFlagError:
+            return []
+        # Definitions of a file share the time of parsing it
+        count = max(len(definitions), 1)
+        wall = (time.perf_counter() - wall) / count
+        cpu = (time.thread_time() - cpu) / count
+        profiler = active_profiler()
+        for definition in definitions:
+            profiler.record(definition, STEP_PARSE, wall=wall, cpu=cpu)
+        return definitions
+
+    def _process_files(self, directory: str, jobs: int = 1) -> list[GQLDefinition]:
+        files = self._find_query_files(directory)
+        jobs = resolve_jobs(jobs)
+        if jobs <= 1:
+            results = [self._process_file(file) for file in files]
+        else:
+            # Reading and parsing files is mostly I/O bound on large trees or
+            # network file systems. Paths are streamed into the pool while the
+            # directory is still being walked. Results keep the discovery order.
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(self._process_file, files))
+        return [
+            definition
+            for file_definitions in results
+            for definition in file_definitions
+        ]
+
+    def _preprocess(
+        self,
+        directory: str,
+        schema: GraphQLSchema,
+        jobs: int = 1,
+        validation_cache: ValidationCache | None = None,
+        introspection_content: bytes = b"",
+    ) -> list[GQLDefinition]:
+        with active_profiler().phase("preprocess"):
+            definitions = self._process_files(directory=directory, jobs=jobs)
+        with active_profiler().phase("validate"):
+            validated = (
+                validation_cache.load(introspection_content)
+                if validation_cache
+                else set()
             )
-        return result
-
-    def _preprocess(self, directory: str, schema: GraphQLSchema) -> list[GQLDefinition]:
-        definitions: list[GQLDefinition] = []
-        for file in self._find_query_files(directory):
-            try:
-                definitions.extend(self._preprocessor.process_file(Path(file)))
-            except FeatureFlagError:
-                continue
-        self._preprocessor.validate(
-            definitions=definitions,
-            schema=schema,
-        )
+            keys = self._preprocessor.validate(
+                definitions=definitions, schema=schema, validated=validated
+            )
+            # Only keep the closures of the current definitions
+            if validation_cache and keys != validated:
+                validation_cache.store(introspection_content, keys)
         return definitions
 
     @staticmethod
@@ -74,18 +140,204 @@ class CodeCommand:
                 directive["locations"] = filtered
         return introspection
 
-    def generate_code(self, introspection_file_path: str, directory: str) -> None:
-        introspection = json.loads(
-            Path(introspection_file_path).read_text(encoding="utf-8")
-        )["data"]
-        introspection = self.sanitize_introspection(introspection)
+    def _load_schema(
+        self, introspection_content: bytes, cache_dir: str | None
+    ) -> GraphQLSchema:
+        schema_cache = SchemaCache(Path(cache_dir)) if cache_dir else None
+        if schema_cache:
+            schema = schema_cache.load(introspection_content)
+            if schema:
+                return schema
 
+        introspection = json.loads(introspection_content)["data"]
+        introspection = self.sanitize_introspection(introspection)
         schema = build_client_schema(cast("IntrospectionQuery", introspection))
 
-        definitions = self._preprocess(
-            directory=directory,
+        if schema_cache:
+            schema_cache.store(introspection_content, schema)
+        return schema
+
+    def _load_lazy_schema(
+        self, introspection_content: bytes, definitions: list[GQLDefinition]
+    ) -> GraphQLSchema:
+        """Only build the types reachable from the given definitions."""
+        introspection = json.loads(introspection_content)["data"]
+        introspection = self.sanitize_introspection(introspection)
+        pruned = IntrospectionPruner(introspection).prune(
+            d.document_ast() for d in definitions
+        )
+        return build_client_schema(cast("IntrospectionQuery", pruned))
+
+    def generate_code(
+        self,
+        introspection_file_path: str,
+        directory: str,
+        cache_dir: str | None = None,
+        jobs: int = 1,
+        *,
+        lazy_schema: bool = False,
+        shared_models: str | None = None,
+        package_index: bool = False,
+    ) -> WriteReport:
+        # Shared classes and package indexes depend on all definitions,
+        # not only on changed ones
+        if shared_models and cache_dir:
+            raise ValueError("Shared models cannot be combined with a cache dir")
+        if package_index and cache_dir:
+            raise ValueError("Package indexes cannot be combined with a cache dir")
+        profiler = active_profiler()
+        with profiler.phase("introspection_load"):
+            introspection_content = Path(introspection_file_path).read_bytes()
+        if lazy_schema:
+            # The schema depends on the definitions, hence it is not cached
+            with profiler.phase("preprocess"):
+                definitions = self._process_files(directory=directory, jobs=jobs)
+            with profiler.phase("schema_build"):
+                schema = self._load_lazy_schema(
+                    introspection_content=introspection_content,
+                    definitions=definitions,
+                )
+            with profiler.phase("validate"):
+                self._preprocessor.validate(definitions=definitions, schema=schema)
+        else:
+            with profiler.phase("schema_build"):
+                schema = self._load_schema(
+                    introspection_content=introspection_content,
+                    cache_dir=cache_dir,
+                )
+            definitions = self._preprocess(
+                directory=directory,
+                schema=schema,
+                jobs=jobs,
+                validation_cache=ValidationCache(Path(cache_dir))
+                if cache_dir
+                else None,
+                introspection_content=introspection_content,
+            )
+        profiler.register(definitions)
+
+        if not cache_dir:
+            with profiler.phase("render"):
+                files = self._generate(
+                    definitions=definitions,
+                    schema=schema,
+                    jobs=jobs,
+                    shared_models=shared_models,
+                )
+                if package_index:
+                    files.extend(PackageIndex.render(files))
+            with profiler.phase("write"):
+                return OutputWriter().write(files)
+
+        manifest = Manifest.load(Path(cache_dir) / MANIFEST_FILE_NAME)
+        report = self._generate_changed(
+            manifest=manifest,
+            definitions=definitions,
+            schema=schema,
+            salt=self._manifest_salt(introspection_content),
+            jobs=jobs,
+        )
+        manifest.save()
+        return report
+
+    def persisted_queries(self, directory: str, jobs: int = 1) -> list[PersistedQuery]:
+        """Operations of all plugins with the text their generated modules send.
+
+        The text does not depend on the schema, hence definitions are not
+        validated against one.
+        """
+        definitions = self._process_files(directory=directory, jobs=jobs)
+        queries: list[PersistedQuery] = []
+        for plugin_name, plugin in self._plugins.items():
+            queries.extend(
+                plugin.persisted_queries(
+                    definitions=[
+                        d for d in definitions if d.feature_flags.plugin == plugin_name
+                    ]
+                )
+            )
+        return queries
+
+    @staticmethod
+    def _manifest_salt(introspection_content: bytes) -> str:
+        return hashlib.sha256(
+            introspection_content + qenerate_version().encode()
+        ).hexdigest()
+
+    def _render_changed(
+        self,
+        manifest: Manifest,
+        definitions: list[GQLDefinition],
+        schema: GraphQLSchema,
+        salt: str,
+        jobs: int = 1,
+    ) -> tuple[list[GeneratedFile], dict[str, ManifestEntry]]:
+        """Only render definitions whose inputs changed since the manifest.
+
+        Returns the files to save and the new manifest entries.
+        """
+        entries = Manifest.compute_entries(definitions=definitions, salt=salt)
+        changed = manifest.changed(entries=entries, definitions=definitions)
+
+        # Changed definitions need their whole fragment closure rendered
+        # in order to obtain proper import lines. Unchanged fragments are
+        # not written though.
+        fragment_keys = {
+            d.name: definition_key(d)
+            for d in definitions
+            if d.kind == GQLDefinitionType.FRAGMENT
+        }
+        required = set(changed)
+        for key in changed:
+            required.update(fragment_keys[name] for name in entries[key].fragments)
+
+        generated_files = self._generate(
+            definitions=[d for d in definitions if definition_key(d) in required],
             schema=schema,
+            jobs=jobs,
         )
+        files = [
+            file
+            for file in generated_files
+            if not (
+                isinstance(file, Fragment)
+                and definition_key(file.definition) not in changed
+            )
+        ]
+        return files, entries
+
+    def _generate_changed(
+        self,
+        manifest: Manifest,
+        definitions: list[GQLDefinition],
+        schema: GraphQLSchema,
+        salt: str,
+        jobs: int = 1,
+    ) -> WriteReport:
+        """Only generate definitions whose inputs changed since the manifest.
+
+        The manifest entries are updated in place.
+        """
+        with active_profiler().phase("render"):
+            files, entries = self._render_changed(
+                manifest=manifest,
+                definitions=definitions,
+                schema=schema,
+                salt=salt,
+                jobs=jobs,
+            )
+        with active_profiler().phase("write"):
+            report = OutputWriter().write(files)
+        manifest.entries = entries
+        return report
+
+    def _generate(
+        self,
+        definitions: list[GQLDefinition],
+        schema: GraphQLSchema,
+        jobs: int = 1,
+        shared_models: str | None = None,
+    ) -> list[GeneratedFile]:
         operations_by_plugin: dict[str, list[GQLDefinition]] = {
             plugin: [] for plugin in self._plugins
         }
@@ -111,16 +363,22 @@ class CodeCommand:
             rendered_fragments = plugin.generate_fragments(
                 definitions=fragments_by_plugin[plugin_name],
                 schema=schema,
+                jobs=jobs,
             )
 
             rendered_queries = plugin.generate_operations(
                 definitions=operations_by_plugin[plugin_name],
                 fragments=rendered_fragments,
                 schema=schema,
+                jobs=jobs,
+                shared_models=(
+                    Path(shared_models) / f"{plugin_name}_shared.py"
+                    if shared_models
+                    else None
+                ),
             )
 
             generated_files.extend(rendered_fragments)
             generated_files.extend(rendered_queries)
 
-        for file in generated_files:
-            file.save()
+        return generated_files
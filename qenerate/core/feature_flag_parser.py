@@ -17,6 +17,9 @@ class FeatureFlags:
     plugin: str
     gql_scalar_mappings: Mapping[str, str]
     collision_strategy: NamingCollisionStrategy = NamingCollisionStrategy.PARENT_CONTEXT
+    query_many: bool = False
+    query_iter: bool = False
+    minify_definition: bool = False
 
 
 class FeatureFlagError(Exception):
@@ -49,6 +52,15 @@ class FeatureFlagParser:
                 ) from None
         return strategy
 
+    @staticmethod
+    def switch(definition: str, flag: str) -> bool:
+        m = re.search(rf"#\s*qenerate:\s*{flag}\s*=\s*(\w+)\s*", definition)
+        if not m:
+            return False
+        if m.group(1) not in {"true", "false"}:
+            raise FeatureFlagError(f"Invalid {flag}: {m.group(1)}")
+        return m.group(1) == "true"
+
     @staticmethod
     def custom_type_mapping(definition: str) -> dict[str, str]:
         mappings: dict[str, str] = {}
@@ -70,4 +82,13 @@ class FeatureFlagParser:
             gql_scalar_mappings=FeatureFlagParser.custom_type_mapping(
                 definition=definition
             ),
+            query_many=FeatureFlagParser.switch(
+                definition=definition, flag="query_many"
+            ),
+            query_iter=FeatureFlagParser.switch(
+                definition=definition, flag="query_iter"
+            ),
+            minify_definition=FeatureFlagParser.switch(
+                definition=definition, flag="minify_definition"
+            ),
         )
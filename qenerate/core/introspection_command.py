@@ -1,15 +1,41 @@
 import json
+from pathlib import Path
+from typing import Any
 
 import requests
-from graphql import get_introspection_query
+from graphql import get_introspection_query, parse
+
+from qenerate.core.code_command import CodeCommand
+from qenerate.core.introspection_pruner import IntrospectionPruner
 
 
 class IntrospectionCommand:
     @staticmethod
-    def introspection_query(url: str) -> None:
+    def introspection_query(url: str, prune_to: str | None = None) -> None:
         query = get_introspection_query()
         request = requests.post(url, json={"query": query}, timeout=30)
         if request.status_code == requests.codes.ok:
-            print(json.dumps(request.json(), indent=4))  # ruff: ignore[print]
+            introspection = request.json()
+            if prune_to:
+                introspection = IntrospectionCommand.prune(introspection, prune_to)
+            print(json.dumps(introspection, indent=4))  # ruff: ignore[print]
             return
         raise Exception(f"Could not query {url}")  # ruff: ignore[raise-vanilla-class]
+
+    @staticmethod
+    def prune_file(introspection_file_path: str, prune_to: str) -> None:
+        introspection = json.loads(
+            Path(introspection_file_path).read_text(encoding="utf-8")
+        )
+        introspection = IntrospectionCommand.prune(introspection, prune_to)
+        print(json.dumps(introspection, indent=4))  # ruff: ignore[print]
+
+    @staticmethod
+    def prune(introspection: dict[str, Any], directory: str) -> dict[str, Any]:
+        """Reduce an introspection result to what the .gql files in directory use."""
+        documents = [
+            parse(file.read_text(encoding="utf-8"))
+            for file in sorted(Path(directory).rglob("*.gql"))
+        ]
+        data = CodeCommand.sanitize_introspection(introspection["data"])
+        return {**introspection, "data": IntrospectionPruner(data).prune(documents)}
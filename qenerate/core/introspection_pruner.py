@@ -0,0 +1,264 @@
+# ruff: file-ignore[any-type]
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from graphql import (
+    DirectiveNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    InlineFragmentNode,
+    NamedTypeNode,
+    OperationDefinitionNode,
+    OperationType,
+    TypeNode,
+    Visitor,
+    specified_directives,
+    visit,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from graphql import DocumentNode, SelectionSetNode
+
+# Kept even if unused, as build_client_schema only adds the given directives
+SPECIFIED_DIRECTIVE_NAMES = frozenset(d.name for d in specified_directives)
+
+ROOT_TYPE_KEYS = {
+    OperationType.QUERY: "queryType",
+    OperationType.MUTATION: "mutationType",
+    OperationType.SUBSCRIPTION: "subscriptionType",
+}
+
+
+class IntrospectionPrunerError(Exception):
+    pass
+
+
+def _type_name(type_ref: dict[str, Any]) -> str:
+    """Unwrap NON_NULL and LIST references."""
+    while type_ref.get("ofType"):
+        type_ref = type_ref["ofType"]
+    return type_ref["name"]
+
+
+def _type_node_name(type_node: TypeNode) -> str:
+    while not isinstance(type_node, NamedTypeNode):
+        type_node = type_node.type  # type: ignore[attr-defined]
+    return type_node.name.value
+
+
+@dataclass
+class _Surface:
+    """Part of the schema used by the documents."""
+
+    kept: set[str] = field(default_factory=set)
+    selected: defaultdict[str, set[str]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+    # The query type is required by every schema
+    roots: set[OperationType] = field(default_factory=lambda: {OperationType.QUERY})
+    directives: set[str] = field(default_factory=set)
+
+
+class _DirectiveCollector(Visitor):
+    def __init__(self, directives: set[str]) -> None:
+        Visitor.__init__(self)
+        self.directives = directives
+
+    def enter_directive(self, node: DirectiveNode, *_: Any) -> None:
+        self.directives.add(node.name.value)
+
+
+class IntrospectionPruner:
+    """Reduce an introspection to the surface used by a set of documents.
+
+    The raw introspection serves as an index. Starting from the root types
+    of the operations and the type conditions of the fragments, only the
+    selected fields of object and interface types are kept, along with all
+    types these fields and their arguments refer to. Every possible type of
+    a kept interface or union is kept as well, at least as a stub with a
+    single field, i.e., abstract types resolve to the same types as in the
+    full schema. Directives are kept if they are used or part of the
+    specification. Enums, scalars and input objects are always kept entirely.
+
+    The result is a valid introspection, i.e., it can be passed to
+    build_client_schema. Validating and rendering the documents against
+    the pruned schema yields the same results as against the full schema.
+    """
+
+    def __init__(self, introspection: dict[str, Any]) -> None:
+        if "__schema" not in introspection:
+            raise IntrospectionPrunerError("Introspection does not hold a __schema")
+        self._schema = introspection["__schema"]
+        self._types: dict[str, dict[str, Any]] = {
+            t["name"]: t for t in self._schema["types"]
+        }
+        self._fields: dict[str, dict[str, dict[str, Any]]] = {
+            name: {f["name"]: f for f in t.get("fields") or []}
+            for name, t in self._types.items()
+        }
+
+    def prune(self, documents: Iterable[DocumentNode]) -> dict[str, Any]:
+        surface = _Surface()
+        for document in documents:
+            self._walk_document(surface, document)
+
+        for operation in surface.roots:
+            root = self._schema.get(ROOT_TYPE_KEYS[operation])
+            if root:
+                self._reach(surface, root["name"])
+        directives = [
+            directive
+            for directive in self._schema.get("directives") or []
+            if directive["name"] in surface.directives
+            or directive["name"] in SPECIFIED_DIRECTIVE_NAMES
+        ]
+        for directive in directives:
+            for arg in directive.get("args") or []:
+                self._reach(surface, _type_name(arg["type"]))
+
+        self._close(surface)
+
+        schema = {
+            key: value
+            for key, value in self._schema.items()
+            if key not in {"types", *ROOT_TYPE_KEYS.values()}
+        }
+        if "directives" in self._schema:
+            schema["directives"] = directives
+        for operation, key in ROOT_TYPE_KEYS.items():
+            schema[key] = self._schema.get(key) if operation in surface.roots else None
+        schema["types"] = [
+            self._prune_type(t, surface=surface)
+            for t in self._schema["types"]
+            if t["name"] in surface.kept
+        ]
+        return {"__schema": schema}
+
+    def _walk_document(self, surface: _Surface, document: DocumentNode) -> None:
+        visit(document, _DirectiveCollector(surface.directives))
+        for node in document.definitions:
+            if isinstance(node, OperationDefinitionNode):
+                self._walk_operation(surface, node)
+            elif isinstance(node, FragmentDefinitionNode):
+                condition = node.type_condition.name.value
+                self._reach(surface, condition)
+                self._select(surface, condition, node.selection_set)
+
+    def _reach(self, surface: _Surface, name: str) -> None:
+        if name in self._types:
+            surface.kept.add(name)
+
+    def _walk_operation(self, surface: _Surface, node: OperationDefinitionNode) -> None:
+        surface.roots.add(node.operation)
+        root = self._schema.get(ROOT_TYPE_KEYS[node.operation])
+        if not root:
+            # Reported by validation
+            return
+        for variable in node.variable_definitions or ():
+            self._reach(surface, _type_node_name(variable.type))
+        self._select(surface, root["name"], node.selection_set)
+
+    def _select(
+        self, surface: _Surface, type_name: str, selection_set: SelectionSetNode | None
+    ) -> None:
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                gql_field = self._fields.get(type_name, {}).get(selection.name.value)
+                if not gql_field:
+                    # Unknown fields and __typename
+                    continue
+                surface.selected[type_name].add(gql_field["name"])
+                target = _type_name(gql_field["type"])
+                self._reach(surface, target)
+                self._select(surface, target, selection.selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                condition = type_name
+                if selection.type_condition is not None:
+                    condition = selection.type_condition.name.value
+                    self._reach(surface, condition)
+                self._select(surface, condition, selection.selection_set)
+            # Fragment spreads are walked via their definitions
+
+    def _close(self, surface: _Surface) -> None:
+        """Add everything the kept types refer to until nothing changes."""
+        done: set[str] = set()
+        while True:
+            pending = (
+                surface.kept - done
+                or self._missing_possible_types(surface)
+                or self._missing_interface_fields(surface)
+            )
+            if not pending:
+                return
+            for name in pending:
+                self._refer(surface, name)
+            done |= pending
+
+    def _missing_possible_types(self, surface: _Surface) -> set[str]:
+        """Interfaces and unions keep all of their possible types.
+
+        Otherwise, e.g., the msgspec plugin would not declare the tagged
+        classes of unselected possible types.
+        """
+        missing: set[str] = set()
+        for name in surface.kept:
+            missing.update(
+                _type_name(p) for p in self._types[name].get("possibleTypes") or []
+            )
+        missing -= surface.kept
+        surface.kept |= missing
+        return missing
+
+    def _missing_interface_fields(self, surface: _Surface) -> set[str]:
+        """Implementations must provide the kept fields of their interfaces."""
+        extended: set[str] = set()
+        for name in surface.kept:
+            interfaces = [
+                _type_name(i)
+                for i in self._types[name].get("interfaces") or []
+                if _type_name(i) in surface.kept
+            ]
+            required = set().union(*(surface.selected[i] for i in interfaces))
+            if not required <= surface.selected[name]:
+                surface.selected[name] |= required
+                extended.add(name)
+        return extended
+
+    def _refer(self, surface: _Surface, name: str) -> None:
+        t = self._types[name]
+        if t["kind"] == "INPUT_OBJECT":
+            surface.kept.update(
+                _type_name(input_field["type"])
+                for input_field in t.get("inputFields") or []
+            )
+        if t["kind"] not in {"OBJECT", "INTERFACE"}:
+            return
+        selected = surface.selected[name]
+        if not selected:
+            # Object types must define at least one field
+            selected.add(t["fields"][0]["name"])
+        for field_name in selected:
+            gql_field = self._fields[name][field_name]
+            surface.kept.add(_type_name(gql_field["type"]))
+            surface.kept.update(
+                _type_name(arg["type"]) for arg in gql_field.get("args") or []
+            )
+
+    @staticmethod
+    def _prune_type(t: dict[str, Any], surface: _Surface) -> dict[str, Any]:
+        if t["kind"] not in {"OBJECT", "INTERFACE", "UNION"}:
+            return t
+        pruned = dict(t)
+        if t.get("fields") is not None:
+            pruned["fields"] = [
+                f for f in t["fields"] if f["name"] in surface.selected[t["name"]]
+            ]
+        for key in ("interfaces", "possibleTypes"):
+            if t.get(key) is not None:
+                pruned[key] = [r for r in t[key] if _type_name(r) in surface.kept]
+        return pruned
@@ -0,0 +1,157 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING
+
+from qenerate.core.preprocessor import GQLDefinitionType
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from pathlib import Path
+
+    from qenerate.core.preprocessor import GQLDefinition
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+
+def qenerate_version() -> str:
+    try:
+        return version("qenerate")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def definition_key(definition: GQLDefinition) -> str:
+    return f"{definition.source_file}::{definition.name}"
+
+
+@dataclass
+class ManifestEntry:
+    hash: str
+    fragments: list[str]
+
+
+@dataclass
+class Manifest:
+    """Content-hash manifest of the last successful code generation.
+
+    Every definition is recorded with a hash over its own text, its
+    feature flags, the hashes of all fragments it depends on (which
+    covers the whole transitive fragment closure), the introspection
+    file and the qenerate version. A definition only needs to be
+    rendered again if its hash differs from the recorded one.
+
+    A manifest without a path is kept in memory only.
+    """
+
+    path: Path | None
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @staticmethod
+    def load(path: Path) -> Manifest:
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError, json.JSONDecodeError:
+            return Manifest(path=path)
+        if raw.get("format") != MANIFEST_FORMAT_VERSION:
+            return Manifest(path=path)
+        return Manifest(
+            path=path,
+            entries={
+                key: ManifestEntry(hash=entry["hash"], fragments=entry["fragments"])
+                for key, entry in raw.get("definitions", {}).items()
+            },
+        )
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        raw = {
+            "format": MANIFEST_FORMAT_VERSION,
+            "definitions": {
+                key: {"hash": entry.hash, "fragments": entry.fragments}
+                for key, entry in sorted(self.entries.items())
+            },
+        }
+        self.path.write_text(json.dumps(raw, indent=2) + "\n", encoding="utf-8")
+
+    def changed(
+        self, entries: Mapping[str, ManifestEntry], definitions: Iterable[GQLDefinition]
+    ) -> set[str]:
+        """Keys of all definitions that must be rendered again.
+
+        Generated files are expected next to their source file, so a
+        definition is also considered changed if its output is missing.
+        """
+        result: set[str] = set()
+        for definition in definitions:
+            key = definition_key(definition)
+            previous = self.entries.get(key)
+            if (
+                previous is None
+                or previous.hash != entries[key].hash
+                or not definition.source_file.with_suffix(".py").exists()
+            ):
+                result.add(key)
+        return result
+
+    @staticmethod
+    def compute_entries(
+        definitions: Iterable[GQLDefinition], salt: str
+    ) -> dict[str, ManifestEntry]:
+        """Hash every definition together with its fragment closure.
+
+        The salt covers inputs shared by all definitions, i.e., the
+        introspection content and the qenerate version.
+        """
+        all_definitions = list(definitions)
+        hasher = _DefinitionHasher(definitions=all_definitions, salt=salt)
+        return {
+            definition_key(definition): ManifestEntry(
+                hash=hasher.hash(definition),
+                fragments=sorted(hasher.closure(definition)),
+            )
+            for definition in all_definitions
+        }
+
+
+class _DefinitionHasher:
+    def __init__(self, definitions: Iterable[GQLDefinition], salt: str) -> None:
+        self._salt = salt
+        self._fragments = {
+            d.name: d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT
+        }
+        self._hashes: dict[str, str] = {}
+        self._closures: dict[str, set[str]] = {}
+
+    def closure(self, definition: GQLDefinition) -> set[str]:
+        result: set[str] = set()
+        for dep in definition.fragment_dependencies:
+            if dep not in self._fragments:
+                continue
+            if dep not in self._closures:
+                self._closures[dep] = self.closure(self._fragments[dep])
+            result.add(dep)
+            result.update(self._closures[dep])
+        return result
+
+    def hash(self, definition: GQLDefinition) -> str:
+        h = hashlib.sha256()
+        h.update(self._salt.encode())
+        # Every flag may change the generated code
+        h.update(
+            json.dumps(
+                asdict(definition.feature_flags), sort_keys=True, default=str
+            ).encode()
+        )
+        h.update(definition.definition.encode())
+        for dep in sorted(definition.fragment_dependencies):
+            if dep not in self._fragments:
+                continue
+            if dep not in self._hashes:
+                self._hashes[dep] = self.hash(self._fragments[dep])
+            h.update(self._hashes[dep].encode())
+        return h.hexdigest()
@@ -0,0 +1,31 @@
+from typing import TYPE_CHECKING
+
+from graphql import DocumentNode, parse, print_ast
+from graphql.utilities import strip_ignored_characters
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from graphql import DefinitionNode
+
+
+def _name(node: DefinitionNode) -> str:
+    name = getattr(node, "name", None)
+    return name.value if name else ""
+
+
+def minify_document(operation: str, fragments: Iterable[str] = ()) -> str:
+    """Canonical and minified document of an operation and its fragments.
+
+    Definitions are printed from their AST, i.e., formatting and comments
+    of the sources do not matter. The operation comes first, followed by
+    its fragments sorted by name.
+    """
+    fragment_nodes = sorted(
+        (node for fragment in fragments for node in parse(fragment).definitions),
+        key=_name,
+    )
+    document = DocumentNode(
+        definitions=(*parse(operation).definitions, *fragment_nodes)
+    )
+    return strip_ignored_characters(print_ast(document))
@@ -0,0 +1,98 @@
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING
+
+from qenerate.core.plugin import GeneratedFile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+INDEX_FILE_NAME = "__init__.py"
+
+MARKER = "Generated by qenerate."
+
+HEADER = f'''"""
+{MARKER} DO NOT MODIFY MANUALLY!
+
+Generated classes and functions are imported on first access.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any
+'''
+
+GETATTR = """
+
+def __getattr__(name: str) -> Any:
+    try:
+        module, attribute = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_EXPORTS])
+"""
+
+
+class PackageIndex:
+    """Lazy-loading __init__.py for every directory with generated modules.
+
+    Importing the package is cheap, as modules are imported on first
+    access of one of their exports. Names exported by several modules of
+    the same directory are left out, they remain accessible through their
+    modules.
+
+    Directories with a hand-written __init__.py are left alone, as are
+    modules whose names cannot be imported, e.g., my-query.py.
+    """
+
+    @staticmethod
+    def render(files: Iterable[GeneratedFile]) -> list[GeneratedFile]:
+        exports: dict[Path, dict[str, tuple[str, str]]] = defaultdict(dict)
+        counts: Counter[tuple[Path, str]] = Counter()
+        for file in files:
+            if file.file.name == INDEX_FILE_NAME or not file.file.stem.isidentifier():
+                continue
+            for name, attribute in file.exports.items():
+                exports[file.file.parent][name] = (file.file.stem, attribute)
+                counts[file.file.parent, name] += 1
+        return [
+            GeneratedFile(
+                file=directory / INDEX_FILE_NAME,
+                content=PackageIndex._content({
+                    name: target
+                    for name, target in sorted(directory_exports.items())
+                    if counts[directory, name] == 1
+                }),
+            )
+            for directory, directory_exports in sorted(exports.items())
+            if PackageIndex._is_generated(directory / INDEX_FILE_NAME)
+        ]
+
+    @staticmethod
+    def _is_generated(index: Path) -> bool:
+        """Whether index is ours to (over)write."""
+        if not index.exists():
+            return True
+        return MARKER in index.read_text(encoding="utf-8")
+
+    @staticmethod
+    def _content(exports: dict[str, tuple[str, str]]) -> str:
+        type_checking = "".join(
+            f"\n    from .{module} import {attribute} as {name}"
+            for name, (module, attribute) in exports.items()
+        )
+        entries = "".join(
+            f'\n    "{name}": ("{module}", "{attribute}"),'
+            for name, (module, attribute) in exports.items()
+        )
+        names = "".join(f'\n    "{name}",' for name in exports)
+        content = HEADER
+        if type_checking:
+            content += f"\nif TYPE_CHECKING:{type_checking}\n"
+        content += f"\n_EXPORTS: dict[str, tuple[str, str]] = {{{entries}\n}}\n"
+        content += f"\n__all__ = [{names}\n]\n"
+        return content + GETATTR
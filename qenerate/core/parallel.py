@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Self
+
+from qenerate.core.schema_cache import dump_schema, load_schema
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from types import TracebackType
+
+    from graphql import GraphQLSchema
+
+    from qenerate.core.plugin import Plugin
+
+# Amount of tasks handed to a worker at once. Fewer round-trips outweigh
+# the slightly worse load balancing.
+TASKS_PER_CHUNK_DIVISOR = 4
+
+
+def resolve_jobs(jobs: int) -> int:
+    """0 means one job per available CPU."""
+    if jobs < 0:
+        raise ValueError(f"Number of jobs must not be negative, got {jobs}")
+    if jobs > 0:
+        return jobs
+    return os.cpu_count() or 1
+
+
+class _WorkerState:
+    plugin: Plugin
+    schema: GraphQLSchema
+
+
+def _init_worker(plugin: Plugin, schema_data: bytes) -> None:
+    _WorkerState.plugin = plugin
+    _WorkerState.schema = load_schema(schema_data)
+
+
+def _run_in_worker[T, R](fn: Callable[[Any, GraphQLSchema, T], R], task: T) -> R:
+    return fn(_WorkerState.plugin, _WorkerState.schema, task)
+
+
+class RenderExecutor:
+    """Runs independent render tasks of a plugin.
+
+    With jobs > 1 the tasks are spread across a process pool. Every
+    worker receives the plugin and the schema once on startup. Results
+    are always returned in the order of the given tasks, i.e., the
+    generated output is deterministic.
+
+    Task functions and their arguments must be picklable, i.e., use
+    module-level functions.
+    """
+
+    def __init__(self, plugin: Plugin, schema: GraphQLSchema, jobs: int = 1) -> None:
+        self._plugin = plugin
+        self._schema = schema
+        self._jobs = resolve_jobs(jobs)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._executor:
+            self._executor.shutdown(cancel_futures=exc_type is not None)
+            self._executor = None
+
+    def map[T, R](
+        self,
+        fn: Callable[[Any, GraphQLSchema, T], R],
+        tasks: Sequence[T],
+    ) -> list[R]:
+        if self._jobs <= 1 or len(tasks) <= 1:
+            return [fn(self._plugin, self._schema, task) for task in tasks]
+
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._jobs,
+                initializer=_init_worker,
+                initargs=(self._plugin, dump_schema(self._schema)),
+            )
+        chunksize = max(1, len(tasks) // (self._jobs * TASKS_PER_CHUNK_DIVISOR))
+        return list(
+            self._executor.map(_run_in_worker, repeat(fn), tasks, chunksize=chunksize)
+        )
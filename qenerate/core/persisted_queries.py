@@ -0,0 +1,54 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from qenerate.core.preprocessor import GQLDefinitionType
+
+# https://www.apollographql.com/docs/graphos/routing/security/persisted-queries
+MANIFEST_FORMAT = "apollo-persisted-query-manifest"
+MANIFEST_FORMAT_VERSION = 1
+
+
+def query_hash(body: str) -> str:
+    """sha256 of a query as sent to the server, i.e., of its DEFINITION."""
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class PersistedQuery:
+    name: str
+    kind: GQLDefinitionType
+    body: str
+
+    @property
+    def hash(self) -> str:
+        return query_hash(self.body)
+
+
+class PersistedQueryManifest:
+    @staticmethod
+    def render(queries: Iterable[PersistedQuery]) -> str:
+        """Manifest of all query hashes, e.g., to preload a server allowlist.
+
+        Operations are sorted by name and hash, i.e., the manifest does
+        not depend on the order of the definitions.
+        """
+        operations = [
+            {
+                "id": query.hash,
+                "name": query.name,
+                "type": query.kind.name.lower(),
+                "body": query.body,
+            }
+            for query in sorted(queries, key=lambda q: (q.name, q.hash))
+        ]
+        raw = {
+            "format": MANIFEST_FORMAT,
+            "version": MANIFEST_FORMAT_VERSION,
+            "operations": operations,
+        }
+        return json.dumps(raw, indent=2) + "\n"
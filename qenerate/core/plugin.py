@@ -1,3 +1,5 @@
+import shutil
+import uuid
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
@@ -6,6 +8,7 @@ if TYPE_CHECKING:
 
     from graphql import GraphQLSchema
 
+    from qenerate.core.persisted_queries import PersistedQuery
     from qenerate.core.preprocessor import GQLDefinition
 
 
@@ -13,9 +16,41 @@ if TYPE_CHECKING:
 class GeneratedFile:
     file: Path = field(compare=False)
     content: str
+    # Public names of the module mapped to their attribute in the module,
+    # e.g., for a package index
+    exports: dict[str, str] = field(default_factory=dict, compare=False, kw_only=True)
 
-    def save(self) -> None:
-        self.file.write_text(self.content)
+    def is_up_to_date(self) -> bool:
+        expected = self.content.encode("utf-8")
+        try:
+            # Comparing the size first avoids reading most changed files
+            if self.file.stat().st_size != len(expected):
+                return False
+            return self.file.read_bytes() == expected
+        except FileNotFoundError:
+            return False
+
+    def save(self) -> bool:
+        """Write the content, unless the file is already up-to-date.
+
+        Unchanged files are not touched at all, so their mtime stays intact.
+        Changed files are written atomically via a temporary file, i.e.,
+        readers never see a partially written file.
+
+        Returns whether the file has been written.
+        """
+        if self.is_up_to_date():
+            return False
+        tmp = self.file.with_name(f".{self.file.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(self.content.encode("utf-8"))
+            if self.file.exists():
+                shutil.copymode(self.file, tmp)
+            tmp.replace(self.file)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return True
 
 
 @dataclass
@@ -32,10 +67,24 @@ class Plugin:
         definitions: list[GQLDefinition],
         schema: GraphQLSchema,
         fragments: list[Fragment],
+        jobs: int = 1,
+        *,
+        shared_models: Path | None = None,
     ) -> list[GeneratedFile]:
+        """Render all operations.
+
+        With shared_models, classes declared identically by several
+        operations are declared once in that file instead.
+        """
         raise NotImplementedError
 
     def generate_fragments(
-        self, definitions: list[GQLDefinition], schema: GraphQLSchema
+        self, definitions: list[GQLDefinition], schema: GraphQLSchema, jobs: int = 1
     ) -> list[Fragment]:
         raise NotImplementedError
+
+    def persisted_queries(
+        self, definitions: list[GQLDefinition]
+    ) -> list[PersistedQuery]:
+        """Operations with the exact text their generated modules send."""
+        raise NotImplementedError
@@ -1,19 +1,25 @@
 # ruff: file-ignore[any-type]
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 
 from graphql import (
+    DocumentNode,
+    ExecutableDefinitionNode,
     FragmentDefinitionNode,
     FragmentSpreadNode,
+    GraphQLError,
     GraphQLSchema,
+    NoUnusedFragmentsRule,
     OperationDefinitionNode,
     OperationType,
     Visitor,
-    get_operation_ast,
     parse,
+    specified_rules,
     validate,
     visit,
 )
@@ -24,6 +30,14 @@ if TYPE_CHECKING:
     from collections.abc import Iterable
     from pathlib import Path
 
+    from graphql import ASTValidationRule
+
+# A closure always uses all of its fragments. Fragments that are not used
+# by any operation are fine, as they can be used by other definitions.
+VALIDATION_RULES: tuple[type[ASTValidationRule], ...] = tuple(
+    rule for rule in specified_rules if rule is not NoUnusedFragmentsRule
+)
+
 
 class AnonymousOperationError(Exception):
     def __init__(self, message: str) -> None:
@@ -44,6 +58,124 @@ class GQLDefinition:
     definition: str
     name: str
     fragment_dependencies: set[str]
+    # Parsed slice of the source file holding only this definition. It is
+    # set by the preprocessor, i.e., the file is parsed only once per run.
+    document: DocumentNode | None = field(default=None, compare=False, repr=False)
+
+    def document_ast(self) -> DocumentNode:
+        if self.document is not None:
+            return self.document
+        return parse(self.definition)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Nodes reference the token chain of the whole source file, which is
+        # expensive to pickle. Render workers parse the definition again.
+        return {**self.__dict__, "document": None}
+
+
+class FragmentDependencyError(Exception):
+    pass
+
+
+def _unknown_fragment(name: str, dependency: str) -> FragmentDependencyError:
+    return FragmentDependencyError(f"{name} depends on unknown fragment {dependency}")
+
+
+class FragmentGraph:
+    """Dependency DAG of fragment definitions.
+
+    Fragments are keyed by name and point to the fragments they spread.
+    Later definitions of the same name replace earlier ones.
+    """
+
+    def __init__(self, definitions: Iterable[GQLDefinition]) -> None:
+        self._fragments = {
+            d.name: d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT
+        }
+        # Every fragment followed by its closure, computed once per fragment
+        self._closures: dict[str, list[str]] = {}
+        self._resolving: set[str] = set()
+
+    def layers(self) -> list[list[GQLDefinition]]:
+        """Fragments in topological layers, computed in linear time.
+
+        Every layer holds the fragments whose dependencies are all in
+        earlier layers, i.e., fragments within a layer can be processed in
+        parallel. Each layer keeps the order of the given definitions.
+        """
+        position = {name: i for i, name in enumerate(self._fragments)}
+        missing: dict[str, int] = {}
+        dependents: dict[str, list[str]] = defaultdict(list)
+        for name, definition in self._fragments.items():
+            for dep in definition.fragment_dependencies:
+                if dep not in self._fragments:
+                    raise _unknown_fragment(name=name, dependency=dep)
+                dependents[dep].append(name)
+            missing[name] = len(definition.fragment_dependencies)
+
+        layers: list[list[GQLDefinition]] = []
+        layer = [name for name, count in missing.items() if not count]
+        while layer:
+            layers.append([self._fragments[name] for name in layer])
+            unblocked: list[str] = []
+            for name in layer:
+                for dependent in dependents[name]:
+                    missing[dependent] -= 1
+                    if not missing[dependent]:
+                        unblocked.append(dependent)
+            layer = sorted(unblocked, key=position.__getitem__)
+
+        blocked = [name for name, count in missing.items() if count]
+        if blocked:
+            cycle = " -> ".join(self._cycle(blocked))
+            raise FragmentDependencyError(
+                f"Cyclic fragment dependency detected: {cycle}"
+            )
+        return layers
+
+    def closure(self, definition: GQLDefinition) -> list[str]:
+        """Fragments transitively spread by a definition, dependencies first.
+
+        Shared fragments are resolved once, i.e., diamond-shaped graphs do
+        not revisit a fragment per path.
+        """
+        closure: dict[str, None] = {}
+        for dep in sorted(definition.fragment_dependencies):
+            if dep not in self._fragments:
+                raise _unknown_fragment(name=definition.name, dependency=dep)
+            closure.update(dict.fromkeys(self._fragment_closure(dep)))
+        return list(closure)
+
+    def _fragment_closure(self, name: str) -> list[str]:
+        if name in self._closures:
+            return self._closures[name]
+        if name in self._resolving:
+            # Raises with the whole cycle
+            self.layers()
+        self._resolving.add(name)
+        try:
+            closure = [*self.closure(self._fragments[name]), name]
+        finally:
+            self._resolving.discard(name)
+        self._closures[name] = closure
+        return closure
+
+    def _cycle(self, blocked: list[str]) -> list[str]:
+        # Every blocked fragment depends on another blocked fragment, so
+        # following those dependencies eventually runs into a cycle.
+        remaining = set(blocked)
+        path: list[str] = []
+        visited: dict[str, int] = {}
+        name = blocked[0]
+        while name not in visited:
+            visited[name] = len(path)
+            path.append(name)
+            name = min(
+                dep
+                for dep in self._fragments[name].fragment_dependencies
+                if dep in remaining
+            )
+        return [*path[visited[name] :], name]
 
 
 class DefinitionVisitor(Visitor):
@@ -92,6 +224,7 @@ class DefinitionVisitor(Visitor):
                 feature_flags=self._feature_flags,
                 fragment_dependencies=set(),
                 name=name,
+                document=DocumentNode(definitions=(node,)),
             )
         elif node.operation == OperationType.MUTATION:
             definition = GQLDefinition(
@@ -101,6 +234,7 @@ class DefinitionVisitor(Visitor):
                 feature_flags=self._feature_flags,
                 fragment_dependencies=set(),
                 name=name,
+                document=DocumentNode(definitions=(node,)),
             )
         else:
             # TODO: logger
@@ -124,6 +258,7 @@ class DefinitionVisitor(Visitor):
             feature_flags=self._feature_flags,
             fragment_dependencies=set(),
             name=name,
+            document=DocumentNode(definitions=(node,)),
         )
         self._stack.append(definition)
 
@@ -131,24 +266,141 @@ class DefinitionVisitor(Visitor):
         self._add_definition()
 
 
+class _SpreadCollector(Visitor):
+    def __init__(self) -> None:
+        Visitor.__init__(self)
+        self.spreads: set[str] = set()
+
+    def enter_fragment_spread(self, node: FragmentSpreadNode, *_: Any) -> None:
+        self.spreads.add(node.name.value)
+
+
+def _fragment_spreads(node: ExecutableDefinitionNode) -> set[str]:
+    collector = _SpreadCollector()
+    visit(node, collector)
+    return collector.spreads
+
+
+def _unique_names(
+    nodes: Iterable[ExecutableDefinitionNode], kind: str
+) -> dict[str, ExecutableDefinitionNode]:
+    by_name: dict[str, ExecutableDefinitionNode] = {}
+    for node in nodes:
+        if not node.name:
+            continue
+        name = node.name.value
+        if name in by_name:
+            raise GraphQLError(
+                f"There can be only one {kind} named '{name}'.",
+                [by_name[name].name, node.name],  # type: ignore[list-item]
+            )
+        by_name[name] = node
+    return by_name
+
+
 class Preprocessor:
-    @staticmethod
-    def validate(definitions: Iterable[GQLDefinition], schema: GraphQLSchema) -> None:
-        all_definitions = ""
+    def __init__(self) -> None:
+        # Closure hashes which passed validation against _validated_schema
+        self._validated: set[str] = set()
+        self._validated_schema: GraphQLSchema | None = None
+
+    def validate(
+        self,
+        definitions: Iterable[GQLDefinition],
+        schema: GraphQLSchema,
+        validated: Iterable[str] = (),
+    ) -> set[str]:
+        """Validate every definition together with its fragment closure.
+
+        Each definition is validated in a document holding only the
+        definition and the fragments it (transitively) spreads, i.e., the
+        cost grows with the size of the closures and not with the size of
+        the whole scope. Closures which already passed validation against
+        the same schema are skipped, as are closures whose hash is in
+        validated, e.g., hashes persisted by a previous run.
+
+        Returns the hashes of the closures of the given definitions.
+        """
+        if schema is not self._validated_schema:
+            self._validated = set()
+            self._validated_schema = schema
+        self._validated.update(validated)
+
+        units: list[tuple[str, list[ExecutableDefinitionNode]]] = []
         for definition in definitions:
-            all_definitions += definition.definition + " "
-            document_ast = parse(definition.definition)
-            operation = get_operation_ast(document_ast)
-            if operation and not operation.name:
-                raise AnonymousOperationError(message=definition.definition)
+            nodes = [
+                node
+                for node in definition.document_ast().definitions
+                if isinstance(node, ExecutableDefinitionNode)
+            ]
+            for node in nodes:
+                if isinstance(node, OperationDefinitionNode) and not node.name:
+                    raise AnonymousOperationError(message=definition.definition)
+            units.append((definition.definition, nodes))
 
-        document_ast = parse(all_definitions)
+        fragments = _unique_names(
+            (
+                node
+                for _, nodes in units
+                for node in nodes
+                if isinstance(node, FragmentDefinitionNode)
+            ),
+            kind="fragment",
+        )
+        _unique_names(
+            (
+                node
+                for _, nodes in units
+                for node in nodes
+                if isinstance(node, OperationDefinitionNode)
+            ),
+            kind="operation",
+        )
+        fragment_texts = {
+            node.name.value: text
+            for text, nodes in units
+            for node in nodes
+            if isinstance(node, FragmentDefinitionNode)
+        }
+        spreads = {name: _fragment_spreads(node) for name, node in fragments.items()}
 
-        errors = validate(schema, document_ast)
-        for error in errors:
-            if "Fragment" in error.message and "is never used" in error.message:
+        keys: set[str] = set()
+        for text, nodes in units:
+            own = {node.name.value for node in nodes if node.name}
+            closure = sorted(
+                self._closure(nodes=nodes, fragments=fragments, spreads=spreads) - own
+            )
+            key = hashlib.sha256(
+                "\0".join([text, *(fragment_texts[name] for name in closure)]).encode()
+            ).hexdigest()
+            keys.add(key)
+            if key in self._validated:
+                continue
+            document_ast = DocumentNode(
+                definitions=(*nodes, *(fragments[name] for name in closure))
+            )
+            errors = validate(schema, document_ast, VALIDATION_RULES)
+            if errors:
+                raise errors[0]
+            self._validated.add(key)
+        return keys
+
+    @staticmethod
+    def _closure(
+        nodes: Iterable[ExecutableDefinitionNode],
+        fragments: dict[str, ExecutableDefinitionNode],
+        spreads: dict[str, set[str]],
+    ) -> set[str]:
+        pending = set().union(*(_fragment_spreads(node) for node in nodes))
+        closure: set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in closure or name not in fragments:
+                # Unknown fragments are reported by validation
                 continue
-            raise error
+            closure.add(name)
+            pending |= spreads[name]
+        return closure
 
     @staticmethod
     def process_file(file_path: Path) -> list[GQLDefinition]:
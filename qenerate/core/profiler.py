@@ -0,0 +1,196 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from qenerate.core.manifest import definition_key
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from pathlib import Path
+
+    from qenerate.core.plugin import GeneratedFile
+    from qenerate.core.preprocessor import GQLDefinition
+
+DEFAULT_TOP_DEFINITIONS = 10
+
+# Steps recorded per definition
+STEP_PARSE = "parse"
+STEP_TYPE_WALK = "type_walk"
+STEP_RENDER = "render"
+STEP_WRITE = "write"
+STEPS = (STEP_PARSE, STEP_TYPE_WALK, STEP_RENDER, STEP_WRITE)
+
+
+@dataclass
+class PhaseProfile:
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+@dataclass
+class DefinitionProfile:
+    """Wall and CPU time in seconds per step. Render includes the type walk."""
+
+    steps: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STEPS, 0.0))
+    cpu: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STEPS, 0.0))
+    output_size: int = 0
+    classes: int = 0
+
+    @property
+    def total(self) -> float:
+        return _total(self.steps)
+
+    @property
+    def cpu_total(self) -> float:
+        return _total(self.cpu)
+
+
+def _total(steps: dict[str, float]) -> float:
+    return steps[STEP_PARSE] + steps[STEP_RENDER] + steps[STEP_WRITE]
+
+
+class Profiler:
+    """Collects timings of a code generation run.
+
+    Phases of the CodeCommand and steps of single definitions are recorded
+    with wall and CPU time. The CPU time of a step is the one of the thread
+    running it. Recording is thread-safe, but steps running in worker
+    processes are not recorded, i.e., profile with a single job.
+    """
+
+    def __init__(self, *, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases: dict[str, PhaseProfile] = {}
+        self.definitions: dict[str, DefinitionProfile] = {}
+        self._outputs: dict[Path, list[str]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None]:
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                profile = self.phases.setdefault(name, PhaseProfile())
+                profile.wall += time.perf_counter() - wall
+                profile.cpu += time.process_time() - cpu
+
+    def _definition(self, key: str) -> DefinitionProfile:
+        return self.definitions.setdefault(key, DefinitionProfile())
+
+    def record(
+        self, definition: GQLDefinition, step: str, wall: float, cpu: float
+    ) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            profile = self._definition(definition_key(definition))
+            profile.steps[step] += wall
+            profile.cpu[step] += cpu
+
+    @contextmanager
+    def step(self, definition: GQLDefinition, step: str) -> Generator[None]:
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(
+                definition,
+                step,
+                wall=time.perf_counter() - wall,
+                cpu=time.thread_time() - cpu,
+            )
+
+    def register(self, definitions: Iterable[GQLDefinition]) -> None:
+        """Map output files to definitions, so writes can be attributed."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for definition in definitions:
+                self._outputs.setdefault(
+                    definition.source_file.with_suffix(".py"), []
+                ).append(definition_key(definition))
+
+    @contextmanager
+    def output(self, file: GeneratedFile) -> Generator[None]:
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                for key in self._outputs.get(file.file, []):
+                    profile = self._definition(key)
+                    profile.steps[STEP_WRITE] += wall
+                    profile.cpu[STEP_WRITE] += cpu
+                    profile.output_size = len(file.content.encode())
+                    profile.classes = sum(
+                        1
+                        for line in file.content.splitlines()
+                        if line.startswith("class ")
+                    )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {name: asdict(p) for name, p in self.phases.items()},
+            "definitions": {
+                key: {**asdict(p), "total": p.total, "cpu_total": p.cpu_total}
+                for key, p in self.definitions.items()
+            },
+        }
+
+    def report(self, top: int = DEFAULT_TOP_DEFINITIONS) -> str:
+        lines = [f"{'phase':<24}{'wall (s)':>10}{'cpu (s)':>10}"]
+        lines.extend(
+            f"{name:<24}{p.wall:>10.3f}{p.cpu:>10.3f}"
+            for name, p in self.phases.items()
+        )
+        slowest = sorted(
+            self.definitions.items(), key=lambda item: item[1].total, reverse=True
+        )[:top]
+        if slowest:
+            header = "".join(f"{step:>11}" for step in STEPS)
+            lines.extend((
+                "",
+                f"{'definition':<48}{header}{'cpu':>11}{'bytes':>9}{'classes':>9}",
+            ))
+            lines.extend(
+                f"{key[-48:]:<48}"
+                + "".join(f"{p.steps[step]:>11.4f}" for step in STEPS)
+                + f"{p.cpu_total:>11.4f}{p.output_size:>9}{p.classes:>9}"
+                for key, p in slowest
+            )
+        return "\n".join(lines)
+
+
+# Records nothing, used while profiling is disabled
+_DISABLED = Profiler(enabled=False)
+_active = _DISABLED
+
+
+def active_profiler() -> Profiler:
+    return _active
+
+
+@contextmanager
+def profiling(profiler: Profiler) -> Generator[Profiler]:
+    """Make the profiler active for the duration of the context."""
+    global _active  # ruff: ignore[global-statement]
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
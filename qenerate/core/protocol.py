@@ -0,0 +1,5 @@
+# Commands of the codegen daemon. This module must not import anything
+# heavy, as the thin client only needs these names.
+COMMAND_GENERATE = "generate"
+COMMAND_CHECK = "check"
+COMMAND_SHUTDOWN = "shutdown"
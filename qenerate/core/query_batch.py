@@ -0,0 +1,90 @@
+from copy import copy
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from graphql import (
+    FieldNode,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    VariableNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Placeholder for the index of a batch entry in the template
+BATCH_INDEX = "QENERATE_BATCH_INDEX"
+# Top-level fields of a batch entry are aliased with this prefix
+BATCH_ALIAS_PREFIX = f"b_{BATCH_INDEX}_"
+
+
+class QueryBatchError(Exception):
+    pass
+
+
+class _IndexVariables(Visitor):
+    def __init__(self) -> None:
+        Visitor.__init__(self)
+        self.found = False
+
+    def enter_variable(self, node: VariableNode, *_: object) -> VariableNode:
+        self.found = True
+        return VariableNode(name=NameNode(value=f"{node.name.value}_{BATCH_INDEX}"))
+
+
+@dataclass(frozen=True)
+class BatchTemplate:
+    """A query, which runs for many sets of variables in a single request.
+
+    The query is rewritten into a template of one batch entry, i.e., its
+    variable definitions and top-level selections. Every variable is
+    suffixed and every top-level field is aliased with the index of the
+    entry. Hence, entries are merged by simple string substitution and
+    the response is split by the alias prefix, i.e., generated code does
+    not need to parse GraphQL.
+    """
+
+    name: str
+    variables: str
+    selections: str
+
+    @staticmethod
+    def render(operation: str, fragments: Iterable[str] = ()) -> BatchTemplate:
+        document = parse(operation)
+        query = next(
+            (d for d in document.definitions if isinstance(d, OperationDefinitionNode)),
+            None,
+        )
+        if not query or query.operation != OperationType.QUERY or not query.name:
+            raise QueryBatchError("Only named queries can be batched")
+        for fragment in fragments:
+            fragment_variables = _IndexVariables()
+            visit(parse(fragment), fragment_variables)
+            if fragment_variables.found:
+                raise QueryBatchError(
+                    f"{query.name.value} cannot be batched, "
+                    "as its fragments use variables"
+                )
+
+        indexed = visit(query, _IndexVariables())
+        selections: list[str] = []
+        for selection in indexed.selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                raise QueryBatchError(
+                    f"{query.name.value} cannot be batched, "
+                    "as it spreads fragments at the top-level"
+                )
+            aliased = copy(selection)
+            key = selection.alias.value if selection.alias else selection.name.value
+            aliased.alias = NameNode(value=f"{BATCH_ALIAS_PREFIX}{key}")
+            selections.append(print_ast(aliased))
+        return BatchTemplate(
+            name=f"{query.name.value}Batch",
+            variables=", ".join(print_ast(v) for v in indexed.variable_definitions),
+            selections="\n".join(selections),
+        )
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import pickle  # ruff: ignore[suspicious-pickle-import]
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import graphql
+
+from qenerate.core.manifest import qenerate_version
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+    from graphql import GraphQLSchema
+
+SCHEMA_CACHE_DIR_NAME = "schemas"
+VALIDATION_CACHE_DIR_NAME = "validated"
+# GraphQLSchema is a deeply nested object graph. (Un-)pickling the
+# bundled GitHub schema requires a recursion depth of ~5000.
+PICKLE_RECURSION_LIMIT = 20_000
+
+
+@contextmanager
+def _recursion_limit(limit: int) -> Generator[None]:
+    previous = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(previous, limit))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(previous)
+
+
+def dump_schema(schema: GraphQLSchema) -> bytes:
+    with _recursion_limit(PICKLE_RECURSION_LIMIT):
+        return pickle.dumps(schema, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_schema(data: bytes) -> GraphQLSchema:
+    with _recursion_limit(PICKLE_RECURSION_LIMIT):
+        return pickle.loads(data)  # ruff: ignore[suspicious-pickle-usage]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write atomically, so concurrent runs never see a partial entry
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        Path(tmp).replace(path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class SchemaCache:
+    """Persisted cache of compiled GraphQL schemas.
+
+    Building a schema from a large introspection is costly. The built
+    GraphQLSchema is pickled, keyed by the hash of the introspection
+    content. The key also covers the qenerate, graphql-core and Python
+    versions, as pickles are not portable across them.
+
+    The cache directory must be trusted, as loading a pickle can execute
+    arbitrary code.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self._dir = cache_dir / SCHEMA_CACHE_DIR_NAME
+
+    @staticmethod
+    def key(introspection_content: bytes) -> str:
+        h = hashlib.sha256(introspection_content)
+        h.update(qenerate_version().encode())
+        h.update(graphql.__version__.encode())
+        h.update(sys.version.encode())
+        return h.hexdigest()
+
+    def _path(self, introspection_content: bytes) -> Path:
+        return self._dir / f"{self.key(introspection_content)}.pickle"
+
+    def load(self, introspection_content: bytes) -> GraphQLSchema | None:
+        path = self._path(introspection_content)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            return load_schema(data)
+        except Exception:  # ruff: ignore[blind-except]
+            # A corrupt cache entry is not fatal, we simply rebuild it
+            return None
+
+    def store(self, introspection_content: bytes, schema: GraphQLSchema) -> None:
+        _write_atomic(self._path(introspection_content), dump_schema(schema))
+
+
+class ValidationCache:
+    """Persisted hashes of closures which passed schema validation.
+
+    The hashes are stored per schema, keyed like the SchemaCache.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self._dir = cache_dir / VALIDATION_CACHE_DIR_NAME
+
+    def _path(self, introspection_content: bytes) -> Path:
+        return self._dir / f"{SchemaCache.key(introspection_content)}.json"
+
+    def load(self, introspection_content: bytes) -> set[str]:
+        path = self._path(introspection_content)
+        try:
+            return set(json.loads(path.read_bytes()))
+        except FileNotFoundError, json.JSONDecodeError:
+            # A missing or corrupt entry only means validating again
+            return set()
+
+    def store(self, introspection_content: bytes, validated: Iterable[str]) -> None:
+        _write_atomic(
+            self._path(introspection_content),
+            json.dumps(sorted(validated)).encode(),
+        )
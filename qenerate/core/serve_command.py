@@ -0,0 +1,125 @@
+import json
+import socketserver
+import sys
+from contextlib import chdir
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from qenerate.core.code_command import plugins
+from qenerate.core.preprocessor import Preprocessor
+from qenerate.core.protocol import COMMAND_CHECK, COMMAND_GENERATE, COMMAND_SHUTDOWN
+from qenerate.core.watch_command import WatchCommand
+
+if TYPE_CHECKING:
+    import threading
+
+    from qenerate.core.plugin import Plugin
+
+
+class ServeCommandError(Exception):
+    pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _Server
+
+    def handle(self) -> None:
+        # One JSON document per line, answered by one JSON document per line
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response: dict[str, Any] = {"ok": False, "error": str(e)}
+            else:
+                response = self.server.serve_command.handle_request(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    serve_command: ServeCommand
+
+
+class ServeCommand:
+    """Long-running codegen daemon reachable over a Unix socket.
+
+    Every (working directory, introspection, directory) combination gets
+    its own warm WatchCommand, i.e., schema, preprocessed definitions and
+    manifest stay in memory across requests. Requests are handled one
+    after another, as generation depends on the working directory of
+    the client.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        jobs: int = 1,
+        plugins: dict[str, Plugin] = plugins,
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._jobs = jobs
+        self._plugins = plugins
+        self._workspaces: dict[tuple[str, str, str], WatchCommand] = {}
+        self._shutdown = False
+
+    def _workspace(self, cwd: str, introspection: str, directory: str) -> WatchCommand:
+        key = (cwd, introspection, directory)
+        if key not in self._workspaces:
+            self._workspaces[key] = WatchCommand(
+                preprocessor=Preprocessor(),
+                introspection_file_path=introspection,
+                directory=directory,
+                cache_dir=self._cache_dir,
+                jobs=self._jobs,
+                plugins=self._plugins,
+            )
+        return self._workspaces[key]
+
+    def _dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("command")
+        if command == COMMAND_SHUTDOWN:
+            self._shutdown = True
+            return {"ok": True}
+        if command not in {COMMAND_GENERATE, COMMAND_CHECK}:
+            raise ServeCommandError(f"Unknown command: {command}")
+
+        cwd = request["cwd"]
+        with chdir(cwd):
+            workspace = self._workspace(
+                cwd=cwd,
+                introspection=request["introspection"],
+                directory=request["directory"],
+            )
+            if command == COMMAND_CHECK:
+                return {"ok": True, "stale": [str(f) for f in workspace.check()]}
+            report = workspace.poll(force=True)
+        return {
+            "ok": True,
+            "written": report.written if report else 0,
+            "skipped": report.skipped if report else 0,
+        }
+
+    def handle_request(self, request: dict[str, Any]) -> dict[str, Any]:
+        try:
+            return self._dispatch(request)
+        except Exception as e:  # ruff: ignore[blind-except]
+            # The daemon must survive broken definitions
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def serve(self, socket_path: str, ready: threading.Event | None = None) -> None:
+        path = Path(socket_path)
+        if path.is_socket():
+            # Left over by a daemon that was not shut down properly
+            path.unlink()
+        with _Server(socket_path, _RequestHandler) as server:
+            path.chmod(0o600)
+            server.serve_command = self
+            print(f"Listening on {socket_path}", file=sys.stderr)  # ruff: ignore[print]
+            if ready:
+                ready.set()
+            try:
+                while not self._shutdown:
+                    server.handle_request()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,182 @@
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from graphql import GraphQLError
+
+from qenerate.core.code_command import CodeCommand, plugins
+from qenerate.core.manifest import MANIFEST_FILE_NAME, Manifest
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+    from qenerate.core.plugin import Plugin
+    from qenerate.core.preprocessor import GQLDefinition, Preprocessor
+    from qenerate.core.writer import WriteReport
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+# (mtime in ns, size) is enough to detect edits without reading files
+type FileStamp = tuple[int, int]
+
+
+def _stamp(path: str) -> FileStamp | None:
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr)  # ruff: ignore[print]
+
+
+class WatchCommand(CodeCommand):
+    """Regenerate code whenever .gql files or the introspection change.
+
+    The built schema, the preprocessed definitions of every file and the
+    manifest of the last generation are kept in memory. On a change only
+    the touched files are preprocessed again and only definitions whose
+    inputs changed (including transitive fragment changes) are rendered.
+    Changes are detected by polling, which works on every file system.
+    """
+
+    def __init__(
+        self,
+        preprocessor: Preprocessor,
+        introspection_file_path: str,
+        directory: str,
+        cache_dir: str | None = None,
+        jobs: int = 1,
+        plugins: dict[str, Plugin] = plugins,
+    ) -> None:
+        super().__init__(preprocessor=preprocessor, plugins=plugins)
+        self._introspection_file_path = introspection_file_path
+        self._directory = directory
+        self._cache_dir = cache_dir
+        self._jobs = jobs
+        self._manifest = (
+            Manifest.load(Path(cache_dir) / MANIFEST_FILE_NAME)
+            if cache_dir
+            else Manifest(path=None)
+        )
+        self._schema: GraphQLSchema | None = None
+        self._salt = ""
+        self._introspection_stamp: FileStamp | None = None
+        self._file_stamps: dict[str, FileStamp | None] = {}
+        self._definitions_by_file: dict[str, list[GQLDefinition]] = {}
+        # Set on changes and only cleared by a successful generation, i.e.,
+        # after an error the next poll tries again
+        self._pending = False
+
+    def _refresh_schema(self) -> bool:
+        stamp = _stamp(self._introspection_file_path)
+        if self._schema and stamp == self._introspection_stamp:
+            return False
+        introspection_content = Path(self._introspection_file_path).read_bytes()
+        self._schema = self._load_schema(
+            introspection_content=introspection_content,
+            cache_dir=self._cache_dir,
+        )
+        self._salt = self._manifest_salt(introspection_content)
+        self._introspection_stamp = stamp
+        return True
+
+    def _refresh_files(self) -> bool:
+        stamps = {
+            file: _stamp(file) for file in self._find_query_files(self._directory)
+        }
+        changed = [
+            file
+            for file, stamp in stamps.items()
+            if file not in self._file_stamps or self._file_stamps[file] != stamp
+        ]
+        removed = self._file_stamps.keys() - stamps.keys()
+        for file in removed:
+            del self._definitions_by_file[file]
+        for file in changed:
+            try:
+                self._definitions_by_file[file] = self._process_file(file)
+            except GraphQLError as e:
+                _log(f"{file}: {e.message}")
+                self._definitions_by_file[file] = []
+        self._file_stamps = stamps
+        return bool(changed or removed)
+
+    def _refresh(self) -> tuple[GraphQLSchema, list[GQLDefinition], bool]:
+        schema_changed = self._refresh_schema()
+        files_changed = self._refresh_files()
+        if not self._schema:
+            raise RuntimeError("Schema has not been loaded")
+        definitions = [
+            definition
+            for file in self._file_stamps
+            for definition in self._definitions_by_file[file]
+        ]
+        self._pending = self._pending or schema_changed or files_changed
+        return self._schema, definitions, self._pending
+
+    def poll(self, *, force: bool = False) -> WriteReport | None:
+        """Regenerate if anything changed since the last poll.
+
+        Returns None if nothing changed. With force, outputs are
+        checked even if no input file changed, e.g., to restore
+        deleted outputs.
+        """
+        schema, definitions, changed = self._refresh()
+        if not (changed or force):
+            return None
+
+        self._preprocessor.validate(definitions=definitions, schema=schema)
+        report = self._generate_changed(
+            manifest=self._manifest,
+            definitions=definitions,
+            schema=schema,
+            salt=self._salt,
+            jobs=self._jobs,
+        )
+        self._manifest.save()
+        self._pending = False
+        return report
+
+    def check(self) -> list[Path]:
+        """Outputs that are not up-to-date with their definitions.
+
+        Nothing is written and the manifest is not updated.
+        """
+        schema, definitions, _ = self._refresh()
+        self._preprocessor.validate(definitions=definitions, schema=schema)
+        files, _ = self._render_changed(
+            manifest=self._manifest,
+            definitions=definitions,
+            schema=schema,
+            salt=self._salt,
+            jobs=self._jobs,
+        )
+        return [file.file for file in files if not file.is_up_to_date()]
+
+    def watch(self, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        _log(f"Watching {self._directory} and {self._introspection_file_path}")
+        try:
+            self._watch(interval=interval)
+        except KeyboardInterrupt:
+            return
+
+    def _watch(self, interval: float) -> None:
+        while True:
+            start = time.perf_counter()
+            try:
+                report = self.poll()
+            except Exception as e:  # ruff: ignore[blind-except]
+                # Keep watching, the next edit will probably fix it
+                _log(f"Error: {e}")
+            else:
+                if report:
+                    elapsed = time.perf_counter() - start
+                    _log(
+                        f"{report.written} files written, "
+                        f"{report.skipped} files unchanged ({elapsed:.2f}s)"
+                    )
+            time.sleep(interval)
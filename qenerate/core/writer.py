@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from qenerate.core.profiler import active_profiler
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from qenerate.core.plugin import GeneratedFile
+
+# Below this amount of files the overhead of a thread pool is not worth it
+PARALLEL_WRITE_THRESHOLD = 64
+
+
+def _save(file: GeneratedFile) -> bool:
+    with active_profiler().output(file):
+        return file.save()
+
+
+@dataclass
+class WriteReport:
+    written: int = 0
+    skipped: int = 0
+
+
+class OutputWriter:
+    """Writes generated files and skips the ones that did not change.
+
+    Comparing and writing is I/O bound, so larger amounts of files are
+    handled by a thread pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        parallel_threshold: int = PARALLEL_WRITE_THRESHOLD,
+    ) -> None:
+        self._max_workers = max_workers
+        self._parallel_threshold = parallel_threshold
+
+    def write(self, files: Sequence[GeneratedFile]) -> WriteReport:
+        if len(files) < self._parallel_threshold:
+            results = [_save(file) for file in files]
+        else:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                results = list(executor.map(_save, files))
+        written = sum(results)
+        return WriteReport(written=written, skipped=len(results) - written)
@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from graphql import (
+    FieldNode,
+    InlineFragmentNode,
+    SelectionSetNode,
+    Visitor,
+    parse,
+    visit,
+)
+
+from qenerate.core.preprocessor import GQLDefinitionType
+from qenerate.plugins.pydantic.mapper import graphql_class_name_str_to_python
+from qenerate.plugins.pydantic.plugin import INDENT, PydanticBase
+from qenerate.plugins.pydantic.typed_ast import (
+    ParsedClassNode,
+    ParsedFragmentDefinitionNode,
+    ParsedFragmentSpreadNode,
+    ParsedInlineFragmentNode,
+    ParsedNode,
+    ParsedOperationNode,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+    from pathlib import Path
+
+    from graphql import GraphQLSchema
+
+    from qenerate.core.plugin import Fragment, GeneratedFile
+    from qenerate.core.preprocessor import GQLDefinition
+    from qenerate.plugins.pydantic.typed_ast import Emitter
+
+STRUCT_BASE_CLASS_NAME = "ConfiguredStruct"
+TAG_FIELD = "__typename"
+
+
+def query_convenience_function(cls: str) -> str:
+    return f"""
+class _JsonResponse(msgspec.Struct):
+{INDENT}data: Optional[{cls}] = None
+{INDENT}errors: Optional[list[Any]] = None
+
+
+_DECODER = msgspec.json.Decoder(_JsonResponse)
+
+
+def query(query_func: Callable, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which queries and decodes the data into
+{INDENT}concrete types. It should be compatible with most GQL clients.
+{INDENT}Raw JSON response bodies (bytes or str), i.e., {{"data": ..., "errors": ...}},
+{INDENT}are decoded straight into the generated classes, already parsed response
+{INDENT}data is converted.
+{INDENT}You do not have to use it to consume the generated data classes.
+{INDENT}Alternatively, you can also mime and alternate the behavior
+{INDENT}of this function in the caller.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Function which queries your GQL Server
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: queried data decoded into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: Union[bytes, str, dict[Any, Any]] = query_func(DEFINITION, **kwargs)
+{INDENT}if isinstance(raw_data, (bytes, str)):
+{INDENT}{INDENT}response = _DECODER.decode(raw_data)
+{INDENT}{INDENT}if response.errors or response.data is None:
+{INDENT}{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{response.errors}}")
+{INDENT}{INDENT}return response.data
+{INDENT}return msgspec.convert(raw_data, type={cls})
+"""
+
+
+def mutation_convenience_function(cls: str) -> str:
+    return f"""
+class _JsonResponse(msgspec.Struct):
+{INDENT}data: Optional[{cls}] = None
+{INDENT}errors: Optional[list[Any]] = None
+
+
+_DECODER = msgspec.json.Decoder(_JsonResponse)
+
+
+def mutate(mutation_func: Callable, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which executes a mutation and decodes the response
+{INDENT}into concrete types. It should be compatible with most GQL clients.
+{INDENT}Raw JSON response bodies (bytes or str), i.e., {{"data": ..., "errors": ...}},
+{INDENT}are decoded straight into the generated classes, already parsed response
+{INDENT}data is converted.
+{INDENT}You do not have to use it to consume the generated data classes.
+{INDENT}Alternatively, you can also mime and alternate the behavior
+{INDENT}of this function in the caller.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}mutation_func (Callable): Function which executes the mutation.
+{INDENT}{INDENT}kwargs: Arguments that will be passed to the mutation function.
+{INDENT}{INDENT}{INDENT}This must include the mutation parameters.
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: mutation response decoded into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: Union[bytes, str, dict[Any, Any]] = mutation_func(DEFINITION, **kwargs)
+{INDENT}if isinstance(raw_data, (bytes, str)):
+{INDENT}{INDENT}response = _DECODER.decode(raw_data)
+{INDENT}{INDENT}if response.errors or response.data is None:
+{INDENT}{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{response.errors}}")
+{INDENT}{INDENT}return response.data
+{INDENT}return msgspec.convert(raw_data, type={cls})
+"""
+
+
+def query_iter_convenience_function(name: str, gql_key: str, item_type: str) -> str:
+    return f"""
+
+
+_ITER_{name.upper()}_DECODER = msgspec.json.Decoder({item_type})
+
+
+def iter_{name}(query_func: Callable, **kwargs: Any) -> Iterator[{item_type}]:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which queries the data and lazily decodes
+{INDENT}the items of {gql_key} into concrete types. An item is only decoded once
+{INDENT}the iteration reaches it, i.e., consumers that filter or stop early do not
+{INDENT}pay for the whole response. Raw JSON response bodies (bytes or str), i.e.,
+{INDENT}{{"data": ..., "errors": ...}}, are split into raw items without decoding
+{INDENT}them, already parsed response data is converted without modifying it.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Function which queries your GQL Server
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Yields:
+{INDENT}{INDENT}{item_type}: item of {gql_key} decoded into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: Union[bytes, str, dict[Any, Any]] = query_func(DEFINITION, **kwargs)
+{INDENT}if isinstance(raw_data, (bytes, str)):
+{INDENT}{INDENT}envelope = msgspec.json.decode(raw_data, type=dict[str, msgspec.Raw])
+{INDENT}{INDENT}errors = msgspec.json.decode(envelope.get("errors", b"null"))
+{INDENT}{INDENT}data = msgspec.json.decode(
+{INDENT}{INDENT}{INDENT}envelope.get("data", b"null"), type=Optional[dict[str, msgspec.Raw]]
+{INDENT}{INDENT})
+{INDENT}{INDENT}if errors or data is None:
+{INDENT}{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{errors}}")
+{INDENT}{INDENT}raw_items = msgspec.json.decode(
+{INDENT}{INDENT}{INDENT}data.get("{gql_key}", b"null"), type=Optional[list[msgspec.Raw]]
+{INDENT}{INDENT})
+{INDENT}{INDENT}for raw_item in raw_items or []:
+{INDENT}{INDENT}{INDENT}yield _ITER_{name.upper()}_DECODER.decode(raw_item)
+{INDENT}{INDENT}return
+{INDENT}for item in raw_data.get("{gql_key}") or []:
+{INDENT}{INDENT}yield msgspec.convert(item, type={item_type})
+"""
+
+
+def _class_name(node: ParsedNode) -> str:
+    if isinstance(node, ParsedFragmentDefinitionNode):
+        return node.class_name
+    return node.parsed_type.unwrapped_python_type
+
+
+class MsgspecPluginError(Exception):
+    pass
+
+
+@dataclass
+class TaggedUnion:
+    """Classes of a selection with inline fragments.
+
+    msgspec decodes a union of structs by a tag, i.e., the __typename of
+    an object. Every type the selection can resolve to is tagged on the
+    most specific class selecting it, i.e., the inline fragment on that
+    type or the selection itself. A class selecting several types gets a
+    tagged subclass per type.
+    """
+
+    node: ParsedNode
+    tags: dict[int, list[str]]
+
+    @staticmethod
+    def of(node: ParsedNode) -> TaggedUnion | None:
+        fragments = [
+            child
+            for child in node.fields
+            if isinstance(child, ParsedInlineFragmentNode)
+            and not child.parsed_type.is_primitive
+        ]
+        if not fragments:
+            return None
+        tags: dict[int, list[str]] = {id(c): [] for c in [*fragments, node]}
+        for graphql_type in node.parsed_type.possible_types:
+            selecting = [
+                f for f in fragments if graphql_type in f.parsed_type.possible_types
+            ]
+            owner = min(
+                selecting,
+                key=lambda f: len(f.parsed_type.possible_types),
+                default=node,
+            )
+            tags[id(owner)].append(graphql_type)
+        return TaggedUnion(node=node, tags=tags)
+
+    def tagged_directly(self, node: ParsedNode) -> str | None:
+        """The tag of a class selecting exactly its own object type."""
+        tags = self.tags[id(node)]
+        if tags and list(node.parsed_type.possible_types) == tags:
+            return tags[0]
+        return None
+
+    def subclasses(self, node: ParsedNode) -> list[tuple[str, str]]:
+        """Names and tags of the tagged subclasses of a class."""
+        if self.tagged_directly(node):
+            return []
+        return [
+            (f"{_class_name(node)}_{graphql_class_name_str_to_python(tag)}", tag)
+            for tag in self.tags[id(node)]
+        ]
+
+    def members(self) -> list[str]:
+        names: list[str] = []
+        for child in [*self.node.fields, self.node]:
+            if id(child) not in self.tags:
+                continue
+            if self.tagged_directly(child):
+                names.append(_class_name(child))
+            names.extend(name for name, _ in self.subclasses(child))
+        return names
+
+
+class _TypenameSelections(Visitor):
+    """Selection sets with inline fragments, which lack a __typename."""
+
+    def __init__(self) -> None:
+        Visitor.__init__(self)
+        self.positions: list[int] = []
+
+    def enter_selection_set(self, node: SelectionSetNode, *_: object) -> None:
+        if not any(isinstance(s, InlineFragmentNode) for s in node.selections):
+            return
+        if any(
+            isinstance(s, FieldNode) and not s.alias and s.name.value == TAG_FIELD
+            for s in node.selections
+        ):
+            return
+        if node.loc:
+            self.positions.append(node.loc.start + 1)
+
+
+class MsgspecPlugin(PydanticBase):
+    """msgspec plugin for Qenerate.
+
+    Generates msgspec structs, which decode raw responses without an
+    intermediate dictionary. The plugin shares the typed AST and the
+    generation of modules with the pydantic plugins, but emits its own
+    class declarations.
+    """
+
+    HEADER = '"""\nGenerated by qenerate plugin=msgspec. DO NOT MODIFY MANUALLY!\n"""\n'
+
+    IMPORTS = (
+        "from datetime import datetime  # noqa: F401 # pylint: disable=W0611\n"
+        "from enum import Enum  # noqa: F401 # pylint: disable=W0611\n"
+        "from typing import (  # noqa: F401 # pylint: disable=W0611\n"
+        f"{INDENT}Any,\n"
+        f"{INDENT}Optional,\n"
+        f"{INDENT}Union,\n"
+        ")\n"
+        "\n"
+        "import msgspec  # noqa: F401 # pylint: disable=W0611\n"
+        "\n"
+        "Json = Any"
+    )
+
+    CONVENIENCE_FUNCTIONS: Mapping[GQLDefinitionType, tuple[str, ...]] = {
+        GQLDefinitionType.QUERY: ("query", "query_persisted"),
+        GQLDefinitionType.MUTATION: ("mutate", "mutate_persisted"),
+    }
+
+    CONF = f"class {STRUCT_BASE_CLASS_NAME}(msgspec.Struct):\n{INDENT}..."
+
+    def _traverse(
+        self,
+        node: ParsedNode,
+        emitter: Emitter,
+        skip: Callable[[ParsedNode], bool] | None = None,
+    ) -> None:
+        """Traverse the AST.
+
+        Same order as for pydantic, i.e., base classes are declared
+        before the classes of inline fragments implementing them.
+        """
+        if skip and skip(node):
+            return
+
+        for child in node.fields:
+            if not isinstance(child, ParsedInlineFragmentNode):
+                self._traverse(child, emitter, skip)
+
+        self._emit(node, emitter)
+
+        for child in node.fields:
+            if isinstance(child, ParsedInlineFragmentNode):
+                self._traverse(child, emitter, skip)
+
+    def _emit(self, node: ParsedNode, emitter: Emitter) -> None:
+        if isinstance(node, ParsedOperationNode):
+            suffix = "QueryData"
+            if node.operation_type == GQLDefinitionType.MUTATION:
+                suffix = "MutationResponse"
+            self._emit_struct(
+                node,
+                emitter,
+                f"{_class_name(node)}{suffix}({STRUCT_BASE_CLASS_NAME})",
+            )
+        elif isinstance(node, ParsedFragmentDefinitionNode):
+            self._emit_struct(
+                node, emitter, f"{_class_name(node)}({STRUCT_BASE_CLASS_NAME})"
+            )
+        elif isinstance(node, ParsedInlineFragmentNode):
+            self._emit_inline_fragment(node, emitter)
+        elif isinstance(node, ParsedClassNode):
+            self._emit_class(node, emitter)
+
+    def _emit_inline_fragment(
+        self, node: ParsedInlineFragmentNode, emitter: Emitter
+    ) -> None:
+        if not node.parent or node.parsed_type.is_primitive:
+            return
+        union = TaggedUnion.of(node.parent)
+        declaration = f"{_class_name(node)}({_class_name(node.parent)}"
+        if union and (tag := union.tagged_directly(node)):
+            declaration += f', tag_field="{TAG_FIELD}", tag="{tag}"'
+        self._emit_struct(node, emitter, f"{declaration})")
+
+    def _emit_class(self, node: ParsedClassNode, emitter: Emitter) -> None:
+        if node.parsed_type.is_primitive or self._is_full_spread(node):
+            return
+        name = _class_name(node)
+        if node.parsed_type.enum_map:
+            emitter.class_header(f"{name}(Enum)")
+            for k, v in node.parsed_type.enum_map.items():
+                val = f'"{v}"' if isinstance(v, str) else v
+                emitter.line(f"{k} = {val}")
+            return
+        base_classes = [
+            field.parsed_type.unwrapped_python_type
+            for field in node.fields
+            if isinstance(field, ParsedFragmentSpreadNode)
+        ] or [STRUCT_BASE_CLASS_NAME]
+        if len(base_classes) > 1:
+            raise MsgspecPluginError(
+                f"{name} spreads the fragments {', '.join(base_classes)}. "
+                "msgspec structs cannot inherit from several fragments."
+            )
+        self._emit_struct(node, emitter, f"{name}({', '.join(base_classes)})")
+
+    def _emit_struct(
+        self, node: ParsedNode, emitter: Emitter, declaration: str
+    ) -> None:
+        emitter.class_header(declaration)
+        union = TaggedUnion.of(node)
+        # The tag is no field of tagged structs
+        tagged = union is not None or isinstance(node, ParsedInlineFragmentNode)
+        fields_added = False
+        for field in node.fields:
+            if not isinstance(field, ParsedClassNode):
+                continue
+            if tagged and field.gql_key == TAG_FIELD:
+                continue
+            line = f"{field.py_key}: {self._field_type(field)}"
+            if field.py_key != field.gql_key:
+                line += f' = msgspec.field(name="{field.gql_key}")'
+            emitter.line(line)
+            fields_added = True
+        if not fields_added:
+            emitter.line("...")
+        # A class is tagged within its own union and the union of its parent
+        unions = [union]
+        if isinstance(node, ParsedInlineFragmentNode) and node.parent:
+            unions.append(TaggedUnion.of(node.parent))
+        for name, tag in (s for u in unions if u for s in u.subclasses(node)):
+            emitter.class_header(
+                f'{name}({_class_name(node)}, tag_field="{TAG_FIELD}", tag="{tag}")'
+            )
+            emitter.line("...")
+
+    @staticmethod
+    def _is_full_spread(node: ParsedNode) -> bool:
+        return len(node.fields) == 1 and isinstance(
+            node.fields[0], ParsedFragmentSpreadNode
+        )
+
+    @staticmethod
+    def _field_type(node: ParsedClassNode) -> str:
+        union = TaggedUnion.of(node)
+        if MsgspecPlugin._is_full_spread(node) or not union:
+            return node.field_type()
+        members = union.members()
+        union_type = members[0] if len(members) == 1 else f"Union[{', '.join(members)}]"
+        return node.parsed_type.wrapped_python_type.replace(
+            node.parsed_type.unwrapped_python_type, union_type
+        )
+
+    @staticmethod
+    def _definition_text(definition: GQLDefinition) -> str:
+        """Select __typename next to inline fragments, it tags the unions."""
+        text = definition.definition
+        selections = _TypenameSelections()
+        visit(parse(text), selections)
+        for position in sorted(selections.positions, reverse=True):
+            text = f"{text[:position]} {TAG_FIELD}{text[position:]}"
+        return text
+
+    @staticmethod
+    def _validate_expression(model: str, data: str) -> str:
+        return f"msgspec.convert({data}, type={model})"
+
+    @staticmethod
+    def _iter_function(name: str, gql_key: str, item_type: str) -> str:
+        return query_iter_convenience_function(
+            name=name, gql_key=gql_key, item_type=item_type
+        )
+
+    @staticmethod
+    def _convenience_function(kind: GQLDefinitionType, cls: str) -> str:
+        if kind == GQLDefinitionType.QUERY:
+            return query_convenience_function(cls=f"{cls}QueryData")
+        return mutation_convenience_function(cls=f"{cls}MutationResponse")
+
+    def generate_operations(
+        self,
+        definitions: list[GQLDefinition],
+        schema: GraphQLSchema,
+        fragments: list[Fragment],
+        jobs: int = 1,
+        *,
+        shared_models: Path | None = None,  # ruff: ignore[unused-method-argument]
+    ) -> list[GeneratedFile]:
+        """Render all operations.
+
+        Tagged unions declare subclasses per type, which shared models do
+        not account for. Hence, operations always declare their classes.
+        """
+        return super().generate_operations(
+            definitions=definitions, schema=schema, fragments=fragments, jobs=jobs
+        )
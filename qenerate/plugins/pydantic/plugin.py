@@ -1,33 +1,43 @@
 # ruff: file-ignore[any-type]
 from __future__ import annotations
 
-import operator
-from functools import reduce
 from typing import TYPE_CHECKING, Any
 
 from graphql import (
     FieldNode,
     FragmentDefinitionNode,
     FragmentSpreadNode,
+    GraphQLInterfaceType,
+    GraphQLObjectType,
     GraphQLOutputType,
     GraphQLScalarType,
     GraphQLSchema,
+    GraphQLUnionType,
     InlineFragmentNode,
     OperationDefinitionNode,
     TypeInfo,
     TypeInfoVisitor,
     Visitor,
-    parse,
     visit,
 )
 
 from qenerate.core.feature_flag_parser import FeatureFlags, NamingCollisionStrategy
+from qenerate.core.manifest import definition_key
+from qenerate.core.minifier import minify_document
+from qenerate.core.parallel import RenderExecutor
+from qenerate.core.persisted_queries import PersistedQuery, query_hash
 from qenerate.core.plugin import (
     Fragment,
     GeneratedFile,
     Plugin,
 )
-from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.core.preprocessor import (
+    FragmentGraph,
+    GQLDefinition,
+    GQLDefinitionType,
+)
+from qenerate.core.profiler import STEP_RENDER, STEP_TYPE_WALK, active_profiler
+from qenerate.core.query_batch import BATCH_INDEX, BatchTemplate
 from qenerate.core.unwrapper import Unwrapper, WrapperType
 from qenerate.plugins.pydantic.mapper import (
     graphql_class_name_str_to_python,
@@ -35,8 +45,10 @@ from qenerate.plugins.pydantic.mapper import (
     graphql_field_name_to_python,
     graphql_primitive_to_python,
 )
+from qenerate.plugins.pydantic.shared_models import SharedModels
 from qenerate.plugins.pydantic.typed_ast import (
     BASE_CLASS_NAME,
+    Emitter,
     ParsedClassNode,
     ParsedFieldType,
     ParsedFragmentDefinitionNode,
@@ -47,12 +59,14 @@ from qenerate.plugins.pydantic.typed_ast import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Callable, Iterable, Mapping
+    from pathlib import Path
 
 INDENT = "    "
 
 
-def query_convenience_function(cls: str) -> str:
+def query_convenience_function(cls: str, validate: str | None = None) -> str:
+    validate = validate or f"{cls}(**raw_data)"
     return f"""
 def query(query_func: Callable, **kwargs: Any) -> {cls}:
 {INDENT}\"\"\"
@@ -70,11 +84,12 @@ def query(query_func: Callable, **kwargs: Any) -> {cls}:
 {INDENT}{INDENT}{cls}: queried data parsed into generated classes
 {INDENT}\"\"\"
 {INDENT}raw_data: dict[Any, Any] = query_func(DEFINITION, **kwargs)
-{INDENT}return {cls}(**raw_data)
+{INDENT}return {validate}
 """
 
 
-def mutation_convenience_function(cls: str) -> str:
+def mutation_convenience_function(cls: str, validate: str | None = None) -> str:
+    validate = validate or f"{cls}(**raw_data)"
     return f"""
 def mutate(mutation_func: Callable, **kwargs: Any) -> {cls}:
 {INDENT}\"\"\"
@@ -93,10 +108,246 @@ def mutate(mutation_func: Callable, **kwargs: Any) -> {cls}:
 {INDENT}{INDENT}{cls}: mutation response parsed into generated classes
 {INDENT}\"\"\"
 {INDENT}raw_data: dict[Any, Any] = mutation_func(DEFINITION, **kwargs)
-{INDENT}return {cls}(**raw_data)
+{INDENT}return {validate}
+"""
+
+
+def json_response_model(cls: str) -> str:
+    return f"""
+
+class _JsonResponse(BaseModel):
+{INDENT}data: Optional[{cls}] = None
+{INDENT}errors: Optional[list[Any]] = None
+"""
+
+
+def query_json_convenience_function(cls: str) -> str:
+    return f"""{json_response_model(cls=cls)}
+
+def query_json(query_func: Callable, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function for GQL clients which return the raw
+{INDENT}JSON response body, i.e., {{"data": ..., "errors": ...}}. The body is
+{INDENT}validated straight into concrete types, i.e., without decoding it into
+{INDENT}dictionaries first.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Function which queries your GQL Server and
+{INDENT}{INDENT}{INDENT}returns the JSON response body as bytes or str
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: queried data parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: Union[bytes, str] = query_func(DEFINITION, **kwargs)
+{INDENT}response = _JsonResponse.model_validate_json(raw_data)
+{INDENT}if response.errors or response.data is None:
+{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{response.errors}}")
+{INDENT}return response.data
+"""
+
+
+def mutation_json_convenience_function(cls: str) -> str:
+    return f"""{json_response_model(cls=cls)}
+
+def mutate_json(mutation_func: Callable, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function for GQL clients which return the raw
+{INDENT}JSON response body, i.e., {{"data": ..., "errors": ...}}. The body is
+{INDENT}validated straight into concrete types, i.e., without decoding it into
+{INDENT}dictionaries first.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}mutation_func (Callable): Function which executes the mutation and
+{INDENT}{INDENT}{INDENT}returns the JSON response body as bytes or str
+{INDENT}{INDENT}kwargs: Arguments that will be passed to the mutation function.
+{INDENT}{INDENT}{INDENT}This must include the mutation parameters.
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: mutation response parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: Union[bytes, str] = mutation_func(DEFINITION, **kwargs)
+{INDENT}response = _JsonResponse.model_validate_json(raw_data)
+{INDENT}if response.errors or response.data is None:
+{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{response.errors}}")
+{INDENT}return response.data
 """
 
 
+def query_async_convenience_function(cls: str, validate: str) -> str:
+    return f"""
+
+async def query_async(query_func: Callable, *, validate_in_thread: bool = False, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function for asyncio GQL clients. It awaits the
+{INDENT}query and parses the data into concrete types.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Async function which queries your GQL Server
+{INDENT}{INDENT}validate_in_thread (bool): Parse the data in a worker thread, so parsing
+{INDENT}{INDENT}{INDENT}large responses does not block the event loop
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: queried data parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: dict[Any, Any] = await query_func(DEFINITION, **kwargs)
+{INDENT}if validate_in_thread:
+{INDENT}{INDENT}return await asyncio.to_thread({validate}, raw_data)
+{INDENT}return {validate}(raw_data)
+"""
+
+
+def mutation_async_convenience_function(cls: str, validate: str) -> str:
+    return f"""
+
+async def mutate_async(mutation_func: Callable, *, validate_in_thread: bool = False, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function for asyncio GQL clients. It awaits the
+{INDENT}mutation and parses the response into concrete types.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}mutation_func (Callable): Async function which executes the mutation.
+{INDENT}{INDENT}validate_in_thread (bool): Parse the response in a worker thread, so parsing
+{INDENT}{INDENT}{INDENT}large responses does not block the event loop
+{INDENT}{INDENT}kwargs: Arguments that will be passed to the mutation function.
+{INDENT}{INDENT}{INDENT}This must include the mutation parameters.
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: mutation response parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: dict[Any, Any] = await mutation_func(DEFINITION, **kwargs)
+{INDENT}if validate_in_thread:
+{INDENT}{INDENT}return await asyncio.to_thread({validate}, raw_data)
+{INDENT}return {validate}(raw_data)
+"""
+
+
+def query_many_convenience_function(
+    cls: str, batch: BatchTemplate, fragments: str, validate: str
+) -> str:
+    return f"""
+
+
+_BATCH_VARIABLES = {batch.variables!r}
+
+_BATCH_SELECTIONS = {batch.selections!r}
+
+_BATCH_FRAGMENTS = {fragments!r}
+
+
+def query_many(query_func: Callable, variables_list: list[dict[str, Any]], **kwargs: Any) -> list[{cls}]:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which runs the query for several sets of
+{INDENT}variables in a single request and parses the data of every set into
+{INDENT}concrete types. The query function receives the batched definition and
+{INDENT}the merged variables as keyword argument `variables`.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Function which queries your GQL Server
+{INDENT}{INDENT}variables_list (list[dict[str, Any]]): Variables of every query
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Returns:
+{INDENT}{INDENT}list[{cls}]: queried data of every set of variables parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}if not variables_list:
+{INDENT}{INDENT}return []
+{INDENT}indexes = [str(i) for i in range(len(variables_list))]
+{INDENT}variables = {{
+{INDENT}{INDENT}f"{{name}}_{{index}}": value
+{INDENT}{INDENT}for index, entry in zip(indexes, variables_list)
+{INDENT}{INDENT}for name, value in entry.items()
+{INDENT}}}
+{INDENT}definition = "query {batch.name}"
+{INDENT}if _BATCH_VARIABLES:
+{INDENT}{INDENT}definition += "(" + ", ".join(_BATCH_VARIABLES.replace("{BATCH_INDEX}", i) for i in indexes) + ")"
+{INDENT}definition += " {{\\n" + "\\n".join(_BATCH_SELECTIONS.replace("{BATCH_INDEX}", i) for i in indexes) + "\\n}}"
+{INDENT}if _BATCH_FRAGMENTS:
+{INDENT}{INDENT}definition += "\\n\\n" + _BATCH_FRAGMENTS
+{INDENT}raw_data: dict[Any, Any] = query_func(definition, variables=variables, **kwargs)
+{INDENT}# Top-level fields are aliased as b_<index>_<field>
+{INDENT}data: list[dict[Any, Any]] = [{{}} for _ in indexes]
+{INDENT}for key, value in raw_data.items():
+{INDENT}{INDENT}index, _, field = key[2:].partition("_")
+{INDENT}{INDENT}data[int(index)][field] = value
+{INDENT}return [{validate} for entry_data in data]
+"""
+
+
+def query_iter_convenience_function(
+    name: str, gql_key: str, item_type: str, validate: str, declarations: str = ""
+) -> str:
+    return f"""
+
+{declarations}def iter_{name}(query_func: Callable, **kwargs: Any) -> Iterator[{item_type}]:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which queries the data and lazily parses
+{INDENT}the items of {gql_key} into concrete types. The query function decodes
+{INDENT}the response, i.e., only parsing is lazy. An item is only parsed once the
+{INDENT}iteration reaches it, i.e., consumers that filter or stop early do not pay
+{INDENT}for parsing the whole response. The queried data is not modified.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}query_func (Callable): Function which queries your GQL Server
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the query function
+
+{INDENT}Yields:
+{INDENT}{INDENT}{item_type}: item of {gql_key} parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}raw_data: dict[Any, Any] = query_func(DEFINITION, **kwargs)
+{INDENT}for item in raw_data.get("{gql_key}") or []:
+{INDENT}{INDENT}yield {validate}
+"""
+
+
+def persisted_convenience_function(function: str, cls: str, validate: str) -> str:
+    return f"""
+
+
+def {function}_persisted(post_func: Callable, variables: Optional[dict[str, Any]] = None, **kwargs: Any) -> {cls}:
+{INDENT}\"\"\"
+{INDENT}This is a convenience function which sends an automatic persisted query,
+{INDENT}i.e., only the sha256 hash of DEFINITION is sent at first. The full
+{INDENT}DEFINITION is only sent, if the server does not know the hash yet.
+{INDENT}The data of the response is parsed into concrete types.
+
+{INDENT}Parameters:
+{INDENT}{INDENT}post_func (Callable): Function which posts a GQL request payload (query,
+{INDENT}{INDENT}{INDENT}variables and extensions) to your GQL Server and returns the JSON response
+{INDENT}{INDENT}variables (dict[str, Any]): variables of the request
+{INDENT}{INDENT}kwargs: optional arguments that will be passed to the post function
+
+{INDENT}Returns:
+{INDENT}{INDENT}{cls}: data of the response parsed into generated classes
+{INDENT}\"\"\"
+{INDENT}payload: dict[str, Any] = {{
+{INDENT}{INDENT}"variables": variables or {{}},
+{INDENT}{INDENT}"extensions": {{"persistedQuery": {{"version": 1, "sha256Hash": DEFINITION_SHA256}}}},
+{INDENT}}}
+{INDENT}response: dict[Any, Any] = post_func(payload, **kwargs)
+{INDENT}if any(
+{INDENT}{INDENT}error.get("message") == "PersistedQueryNotFound"
+{INDENT}{INDENT}or (error.get("extensions") or {{}}).get("code") == "PERSISTED_QUERY_NOT_FOUND"
+{INDENT}{INDENT}for error in response.get("errors") or []
+{INDENT}):
+{INDENT}{INDENT}payload["query"] = DEFINITION
+{INDENT}{INDENT}response = post_func(payload, **kwargs)
+{INDENT}if response.get("errors"):
+{INDENT}{INDENT}raise RuntimeError(f"GQL request failed: {{response['errors']}}")
+{INDENT}return {validate}
+"""
+
+
+def _list_item_type(field_type: str) -> str | None:
+    """Type of the items of a list type, e.g., X of Optional[list[X]]."""
+    if field_type.startswith("Optional["):
+        field_type = field_type[len("Optional[") : -1]
+    if not field_type.startswith("list["):
+        return None
+    return field_type[len("list[") : -1]
+
+
 class PydanticV1Error(Exception):
     pass
 
@@ -251,8 +502,16 @@ class FieldToTypeMatcherVisitor(Visitor):
             wrapped_python_type=wrapped_type,
             is_primitive=is_primitive,
             enum_map=enum_map,
+            possible_types=self._possible_types(unwrapper_result.inner_gql_type),
         )
 
+    def _possible_types(self, graphql_type: GraphQLOutputType) -> tuple[str, ...]:
+        if isinstance(graphql_type, GraphQLObjectType):
+            return (graphql_type.name,)
+        if isinstance(graphql_type, GraphQLInterfaceType | GraphQLUnionType):
+            return tuple(t.name for t in self.schema.get_possible_types(graphql_type))
+        return ()
+
     def _to_python_type(self, graphql_type: GraphQLOutputType) -> str:
         if isinstance(graphql_type, GraphQLScalarType):
             return graphql_primitive_to_python(
@@ -290,7 +549,7 @@ class QueryParser:
     def parse(
         definition: GQLDefinition, schema: GraphQLSchema, feature_flags: FeatureFlags
     ) -> ParsedNode:
-        document_ast = parse(definition.definition)
+        document_ast = definition.document_ast()
         type_info = TypeInfo(schema)
         visitor = FieldToTypeMatcherVisitor(
             schema=schema,
@@ -298,107 +557,185 @@ class QueryParser:
             definition=definition,
             feature_flags=feature_flags,
         )
-        visit(document_ast, TypeInfoVisitor(type_info, visitor))
+        with active_profiler().step(definition, STEP_TYPE_WALK):
+            visit(document_ast, TypeInfoVisitor(type_info, visitor))
         return visitor.parsed
 
 
 class PydanticBase(Plugin):
     HEADER: str
     IMPORTS: str
+    # Imports of the iter_* convenience functions
+    ITER_IMPORTS = ""
     CONF: str
+    # Names of the convenience functions of operation modules
+    CONVENIENCE_FUNCTIONS: Mapping[GQLDefinitionType, tuple[str, ...]] = {
+        GQLDefinitionType.QUERY: ("query", "query_persisted"),
+        GQLDefinitionType.MUTATION: ("mutate", "mutate_persisted"),
+    }
 
-    def _traverse(self, node: ParsedNode) -> str:
+    def _traverse(
+        self,
+        node: ParsedNode,
+        emitter: Emitter,
+        skip: Callable[[ParsedNode], bool] | None = None,
+    ) -> None:
         """Traverse the AST.
 
         Pydantic doesnt play well with from __future__ import annotations
         --> order of class declaration is important:
         - post-order for non-inline fragment nodes, i.e., non-interface nodes
         - pre-order for nodes that implement an interface
+
+        Subtrees for which skip returns True are not emitted.
         """
-        result = ""
+        if skip and skip(node):
+            return
+
         for child in node.fields:
             if not isinstance(child, ParsedInlineFragmentNode):
-                result = f"{result}{self._traverse(child)}"
+                self._traverse(child, emitter, skip)
 
-        result = f"{result}{node.class_code_string()}"
+        node.emit(emitter)
 
         for child in node.fields:
             if isinstance(child, ParsedInlineFragmentNode):
-                result = f"{result}{self._traverse(child)}"
-        return result
+                self._traverse(child, emitter, skip)
+
+    @staticmethod
+    def _parse(definition: GQLDefinition, schema: GraphQLSchema) -> ParsedNode:
+        parser = QueryParser()
+        return parser.parse(
+            definition=definition,
+            schema=schema,
+            feature_flags=definition.feature_flags,
+        )
+
+    def _imports(self, *, asyncio: bool = False, iterator: bool = False) -> str:
+        """Header and imports of a module.
+
+        asyncio, Iterator and ITER_IMPORTS are only imported by modules with
+        async or iter_* convenience functions.
+        """
+        imports = self.HEADER
+        if asyncio:
+            imports += "import asyncio  # noqa: F401 # pylint: disable=W0611\n"
+        if iterator:
+            imports += (
+                "from collections.abc import (  # noqa: F401 # pylint: disable=W0611\n"
+                f"{INDENT}Callable,\n"
+                f"{INDENT}Iterator,\n"
+                ")\n"
+            )
+        else:
+            imports += (
+                "from collections.abc import Callable"
+                "  # noqa: F401 # pylint: disable=W0611\n"
+            )
+        imports += self.IMPORTS
+        if iterator:
+            imports += self.ITER_IMPORTS
+        return imports
+
+    def _emit_imports(
+        self,
+        definition: GQLDefinition,
+        fragment_map: Mapping[str, Fragment],
+        emitter: Emitter,
+        *,
+        asyncio: bool = False,
+        iterator: bool = False,
+    ) -> None:
+        emitter.write(self._imports(asyncio=asyncio, iterator=iterator))
+        fragment_imports = self._fragment_imports(
+            definition=definition,
+            fragment_map=fragment_map,
+        )
+        if fragment_imports:
+            emitter.write("\n")
+            emitter.write(fragment_imports)
+
+    def emit_fragment(
+        self,
+        definition: GQLDefinition,
+        schema: GraphQLSchema,
+        fragment_map: Mapping[str, Fragment],
+        emitter: Emitter,
+    ) -> ParsedFragmentDefinitionNode | None:
+        """Write the module of a fragment, e.g., straight to a file handle.
+
+        Nothing is written if the definition holds no fragment.
+        """
+        ast = self._parse(definition=definition, schema=schema)
+        fragment = ast.fields[0]
+        if not isinstance(fragment, ParsedFragmentDefinitionNode):
+            return None
+        self._emit_imports(
+            definition=definition, fragment_map=fragment_map, emitter=emitter
+        )
+        emitter.write(f"\n\n\n{self.CONF}")
+        self._traverse(ast, emitter)
+        emitter.write("\n")
+        return fragment
+
+    def render_fragment(
+        self,
+        definition: GQLDefinition,
+        schema: GraphQLSchema,
+        fragment_map: Mapping[str, Fragment],
+    ) -> Fragment | None:
+        emitter = Emitter()
+        fragment = self.emit_fragment(
+            definition=definition,
+            schema=schema,
+            fragment_map=fragment_map,
+            emitter=emitter,
+        )
+        if not fragment:
+            return None
+        import_path = str(definition.source_file.with_suffix("")).replace("/", ".")
+        return Fragment(
+            definition=definition,
+            file=definition.source_file.with_suffix(".py"),
+            content=emitter.getvalue(),
+            class_name=fragment.class_name,
+            import_path=import_path,
+            fragment_name=fragment.fragment_name,
+            exports={fragment.class_name: fragment.class_name},
+        )
 
     def generate_fragments(
-        self, definitions: list[GQLDefinition], schema: GraphQLSchema
+        self, definitions: list[GQLDefinition], schema: GraphQLSchema, jobs: int = 1
     ) -> list[Fragment]:
         """Render all fragments.
 
-        Handle nested fragments, i.e., fragments which
-        depend on other fragments. The current dependency resolving approach
-        is brute-force, but will get the job done for most likely use-cases.
-
-        @TODO: fragment dependency graph should be calculated in pre-processor.
-        This function should ideally then be able to process fragments in order.
+        Handle nested fragments, i.e., fragments which depend on other
+        fragments. Fragments are rendered by the topological layers of the
+        fragment dependency graph, i.e., all dependencies of a fragment are
+        rendered before it and fragments within a layer are rendered in
+        parallel.
         """
         processed: dict[str, Fragment] = {}
-        current_to_process: list[GQLDefinition] = definitions
-        next_to_process: list[GQLDefinition] = []
-        while len(processed) < len(definitions):
-            for definition in current_to_process:
-                # We make sure that all dependencies are already rendered
-                # in order to obtain proper import lines
-                has_unrendered_dependencies = reduce(
-                    operator.or_,
-                    [dep not in processed for dep in definition.fragment_dependencies],
-                    False,  # ruff: ignore[boolean-positional-value-in-call]
-                )
-                if has_unrendered_dependencies:
-                    # not all dependencies rendered yet. It will
-                    # probably happen later in the loop, so we skip
-                    # this and will try again in the next iteration.
-                    next_to_process.append(definition)
-                    continue
-                fragment_imports = self._fragment_imports(
-                    definition=definition,
-                    fragment_map=processed,
-                )
-                result = self.HEADER + self.IMPORTS
-                if fragment_imports:
-                    result += "\n"
-                    result += fragment_imports
-                result += f"\n\n\n{self.CONF}"
-                qf = definition.source_file
-                parser = QueryParser()
-                ast = parser.parse(
-                    definition=definition,
-                    schema=schema,
-                    feature_flags=definition.feature_flags,
-                )
-                fragment = ast.fields[0]
-                if not isinstance(fragment, ParsedFragmentDefinitionNode):
-                    continue
-                result += self._traverse(ast)
-                result += "\n"
-                import_path = str(definition.source_file.with_suffix("")).replace(
-                    "/", "."
+        with RenderExecutor(plugin=self, schema=schema, jobs=jobs) as executor:
+            for layer in FragmentGraph(definitions).layers():
+                # All dependencies are already rendered in order to
+                # obtain proper import lines
+                rendered_fragments = executor.map(
+                    _render_fragment_task,
+                    [
+                        (
+                            definition,
+                            {
+                                dep: processed[dep]
+                                for dep in definition.fragment_dependencies
+                            },
+                        )
+                        for definition in layer
+                    ],
                 )
-                rendered_fragment = Fragment(
-                    definition=definition,
-                    file=qf.with_suffix(".py"),
-                    content=result,
-                    class_name=fragment.class_name,
-                    import_path=import_path,
-                    fragment_name=fragment.fragment_name,
-                )
-                processed[rendered_fragment.fragment_name] = rendered_fragment
-
-            if len(current_to_process) == len(next_to_process):
-                # We found a cyclic dependency, i.e., not a single
-                # fragment got rendered in this iteration
-                raise PydanticV1Error("Cyclic fragment dependency detected")
-
-            # lets try again to render all fragments that we skipped in this iteration
-            current_to_process = next_to_process
-            next_to_process = []
+                for rendered_fragment in rendered_fragments:
+                    if rendered_fragment:
+                        processed[rendered_fragment.fragment_name] = rendered_fragment
 
         return list(processed.values())
 
@@ -412,71 +749,348 @@ class PydanticBase(Plugin):
             imports += f"\nfrom {fragment.import_path} import {fragment.class_name}"
         return imports
 
-    def _assemble_definition(
+    def emit_operation(
         self,
         definition: GQLDefinition,
-        fragment_definitions: Mapping[str, GQLDefinition],
-    ) -> set[str]:
-        ans: set[str] = set()
-        ans.add(definition.definition)
-        for dep in sorted(definition.fragment_dependencies):
-            ans = ans.union(
-                self._assemble_definition(
-                    definition=fragment_definitions[dep],
-                    fragment_definitions=fragment_definitions,
+        schema: GraphQLSchema,
+        fragment_map: Mapping[str, Fragment],
+        emitter: Emitter,
+        shared: SharedModels | None = None,
+        ast: ParsedNode | None = None,
+    ) -> ParsedNode:
+        """Write the module of an operation, e.g., straight to a file handle.
+
+        fragment_map holds the fragment closure of the operation, as
+        resolved once for all operations by the caller.
+        With shared models, shared classes are imported instead of declared.
+        An already parsed ast of the definition is not parsed again.
+        Returns the parsed operation.
+        """
+        if ast is None:
+            ast = self._parse(definition=definition, schema=schema)
+        operation = ast.fields[0]
+        iterable_fields = self._iterable_fields(definition, operation)
+        self._emit_imports(
+            definition=definition,
+            fragment_map=fragment_map,
+            emitter=emitter,
+            asyncio=any(
+                name.endswith("_async")
+                for name in self.CONVENIENCE_FUNCTIONS.get(definition.kind, ())
+            ),
+            iterator=bool(iterable_fields),
+        )
+        if shared and (names := shared.imports(ast)):
+            emitter.write("\n")
+            for name in names:
+                emitter.write(f"\nfrom {shared.import_path} import {name}")
+        fragment_definitions = self._fragment_definitions(
+            f.definition for f in fragment_map.values()
+        )
+        assembled_definition = self._assembled_definition(
+            definition=definition, fragment_definitions=fragment_definitions
+        )
+        emitter.write(f'\n\n\nDEFINITION = """{assembled_definition}"""')
+        emitter.write(f'\n\nDEFINITION_SHA256 = "{query_hash(assembled_definition)}"')
+        emitter.write(f"\n\n\n{self.CONF}")
+        self._traverse(ast, emitter, skip=shared.is_shared if shared else None)
+        emitter.write("\n\n")
+        cls = operation.parsed_type.unwrapped_python_type
+        emitter.write(self._convenience_function(kind=definition.kind, cls=cls))
+        model = f"{cls}QueryData"
+        function = "query"
+        if definition.kind == GQLDefinitionType.MUTATION:
+            model = f"{cls}MutationResponse"
+            function = "mutate"
+        emitter.write(
+            persisted_convenience_function(
+                function=function,
+                cls=model,
+                validate=self._validate_expression(
+                    model=model, data='response["data"]'
+                ),
+            )
+        )
+        # Only queries can be batched, the flag is ignored for mutations
+        if (
+            definition.feature_flags.query_many
+            and definition.kind == GQLDefinitionType.QUERY
+        ):
+            emitter.write(
+                query_many_convenience_function(
+                    cls=f"{cls}QueryData",
+                    batch=BatchTemplate.render(
+                        operation=self._definition_text(definition),
+                        fragments=fragment_definitions,
+                    ),
+                    fragments="\n\n".join(fragment_definitions),
+                    validate=self._validate_expression(
+                        model=f"{cls}QueryData", data="entry_data"
+                    ),
+                )
+            )
+        for field, item_type in iterable_fields:
+            emitter.write(
+                self._iter_function(
+                    name=field.py_key, gql_key=field.gql_key, item_type=item_type
                 )
             )
-        return ans
+        return operation
+
+    def _fragment_definitions(self, closure: Iterable[GQLDefinition]) -> list[str]:
+        """Texts of the fragment closure of an operation, sorted."""
+        return sorted(self._definition_text(fragment) for fragment in closure)
+
+    def _assembled_definition(
+        self, definition: GQLDefinition, fragment_definitions: list[str]
+    ) -> str:
+        """Value of DEFINITION, i.e., the operation with all of its fragments."""
+        if definition.feature_flags.minify_definition:
+            return minify_document(
+                operation=self._definition_text(definition),
+                fragments=fragment_definitions,
+            )
+        assembled = "\n\n".join(
+            sorted([self._definition_text(definition), *fragment_definitions])
+        )
+        return f"\n{assembled}\n"
+
+    def persisted_queries(
+        self, definitions: list[GQLDefinition]
+    ) -> list[PersistedQuery]:
+        fragments = {
+            d.name: d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT
+        }
+        # Closures of shared fragments are resolved once for all operations
+        graph = FragmentGraph(fragments.values())
+        return [
+            PersistedQuery(
+                name=definition.name,
+                kind=definition.kind,
+                body=self._assembled_definition(
+                    definition=definition,
+                    fragment_definitions=self._fragment_definitions(
+                        fragments[name] for name in graph.closure(definition)
+                    ),
+                ),
+            )
+            for definition in definitions
+            if definition.kind != GQLDefinitionType.FRAGMENT
+        ]
+
+    def _iterable_fields(
+        self, definition: GQLDefinition, operation: ParsedNode
+    ) -> list[tuple[ParsedClassNode, str]]:
+        """Top-level list fields of a query with query_iter and their item types."""
+        if not (
+            definition.feature_flags.query_iter
+            and definition.kind == GQLDefinitionType.QUERY
+        ):
+            return []
+        iterable: list[tuple[ParsedClassNode, str]] = []
+        for field in operation.fields:
+            if not isinstance(field, ParsedClassNode):
+                continue
+            if item_type := _list_item_type(self._field_type(field)):
+                iterable.append((field, item_type))
+        return iterable
+
+    @staticmethod
+    def _definition_text(definition: GQLDefinition) -> str:
+        """Text of a definition as sent by the DEFINITION of an operation."""
+        return definition.definition
+
+    @staticmethod
+    def _convenience_function(kind: GQLDefinitionType, cls: str) -> str:
+        if kind == GQLDefinitionType.QUERY:
+            return query_convenience_function(cls=f"{cls}QueryData")
+        return mutation_convenience_function(cls=f"{cls}MutationResponse")
+
+    @staticmethod
+    def _validate_expression(model: str, data: str) -> str:
+        """Python expression parsing the dictionary data into model."""
+        return f"{model}(**{data})"
+
+    @staticmethod
+    def _field_type(node: ParsedClassNode) -> str:
+        return node.field_type()
+
+    @staticmethod
+    def _iter_function(name: str, gql_key: str, item_type: str) -> str:
+        return query_iter_convenience_function(
+            name=name,
+            gql_key=gql_key,
+            item_type=item_type,
+            validate=f"parse_obj_as({item_type}, item)",
+        )
+
+    def _operation_exports(
+        self, definition: GQLDefinition, operation: ParsedNode
+    ) -> dict[str, str]:
+        # Every operation module has convenience functions of the same
+        # names, hence the module name makes the exported names unique
+        stem = definition.source_file.stem
+        cls = operation.parsed_type.unwrapped_python_type
+        suffix = "QueryData"
+        if definition.kind == GQLDefinitionType.MUTATION:
+            suffix = "MutationResponse"
+        exports = {f"{cls}{suffix}": f"{cls}{suffix}"}
+        for function in self.CONVENIENCE_FUNCTIONS[definition.kind]:
+            exports[f"{function}_{stem}"] = function
+        if (
+            definition.feature_flags.query_many
+            and definition.kind == GQLDefinitionType.QUERY
+        ):
+            exports[f"query_many_{stem}"] = "query_many"
+        for field, _ in self._iterable_fields(definition, operation):
+            exports[f"iter_{field.py_key}_{stem}"] = f"iter_{field.py_key}"
+        return exports
+
+    def render_operation(
+        self,
+        definition: GQLDefinition,
+        schema: GraphQLSchema,
+        fragment_map: Mapping[str, Fragment],
+        shared: SharedModels | None = None,
+        ast: ParsedNode | None = None,
+    ) -> GeneratedFile:
+        emitter = Emitter()
+        operation = self.emit_operation(
+            definition=definition,
+            schema=schema,
+            fragment_map=fragment_map,
+            emitter=emitter,
+            shared=shared,
+            ast=ast,
+        )
+        return GeneratedFile(
+            file=definition.source_file.with_suffix(".py"),
+            content=emitter.getvalue(),
+            exports=self._operation_exports(definition=definition, operation=operation),
+        )
+
+    def render_shared_models(self, shared: SharedModels) -> GeneratedFile:
+        """Declare every shared class once."""
+        emitter = Emitter()
+        emitter.write(self._imports())
+        emitter.write(f"\n\n\n{self.CONF}")
+        declared: set[str] = set()
+
+        def skip(node: ParsedNode) -> bool:
+            key = shared.key(node)
+            if key is None:
+                return False
+            if key in declared:
+                return True
+            declared.add(key)
+            return False
+
+        for ast in shared.asts.values():
+            for root in shared.roots(ast):
+                self._traverse(root, emitter, skip=skip)
+        emitter.write("\n")
+        return GeneratedFile(file=shared.file, content=emitter.getvalue())
 
     def generate_operations(
         self,
         definitions: list[GQLDefinition],
         schema: GraphQLSchema,
         fragments: list[Fragment],
+        jobs: int = 1,
+        *,
+        shared_models: Path | None = None,
     ) -> list[GeneratedFile]:
-        generated_files: list[GeneratedFile] = []
         fragment_map = {f.fragment_name: f for f in fragments}
-        fragment_definitions = {f.fragment_name: f.definition for f in fragments}
-        for definition in definitions:
-            fragment_imports = self._fragment_imports(
-                definition=definition,
+        # Closures of shared fragments are resolved once for all operations
+        graph = FragmentGraph(f.definition for f in fragments)
+        if shared_models and definitions:
+            return self._generate_with_shared_models(
+                definitions=definitions,
+                schema=schema,
                 fragment_map=fragment_map,
+                graph=graph,
+                file=shared_models,
             )
+        with RenderExecutor(plugin=self, schema=schema, jobs=jobs) as executor:
+            # Only hand the fragments of the closure to the operation, so
+            # the amount of data sent to workers stays small.
+            return executor.map(
+                _render_operation_task,
+                [
+                    (
+                        definition,
+                        {
+                            name: fragment_map[name]
+                            for name in graph.closure(definition)
+                        },
+                    )
+                    for definition in definitions
+                ],
+            )
+
+    def _generate_with_shared_models(
+        self,
+        definitions: list[GQLDefinition],
+        schema: GraphQLSchema,
+        fragment_map: Mapping[str, Fragment],
+        graph: FragmentGraph,
+        file: Path,
+    ) -> list[GeneratedFile]:
+        """Render operations importing identical classes from a shared module.
 
-            result = self.HEADER + self.IMPORTS
-            if fragment_imports:
-                result += "\n"
-                result += fragment_imports
-            result += "\n\n\n"
-            qf = definition.source_file
-            assembled_definition = "\n\n".join(
-                sorted(
-                    self._assemble_definition(
+        Shared classes depend on all operations, hence operations are parsed
+        and rendered in this process, i.e., jobs do not apply. Every
+        operation is parsed once, its ast is reused for rendering.
+        """
+        shared = SharedModels(
+            file=file,
+            asts={
+                definition_key(d): self._parse(definition=d, schema=schema)
+                for d in definitions
+            },
+        )
+        files: list[GeneratedFile] = []
+        if not shared.is_empty():
+            files.append(self.render_shared_models(shared))
+        for definition in definitions:
+            with active_profiler().step(definition, STEP_RENDER):
+                files.append(
+                    self.render_operation(
                         definition=definition,
-                        fragment_definitions=fragment_definitions,
+                        schema=schema,
+                        fragment_map={
+                            name: fragment_map[name]
+                            for name in graph.closure(definition)
+                        },
+                        shared=shared,
+                        ast=shared.asts[definition_key(definition)],
                     )
                 )
-            )
-            result += f'DEFINITION = """\n{assembled_definition}\n"""'
-            result += f"\n\n\n{self.CONF}"
-            parser = QueryParser()
-            ast = parser.parse(
-                definition=definition,
-                schema=schema,
-                feature_flags=definition.feature_flags,
-            )
-            result += self._traverse(ast)
-            result += "\n\n"
-            cls = ast.fields[0].parsed_type.unwrapped_python_type
-            if definition.kind == GQLDefinitionType.QUERY:
-                result += query_convenience_function(cls=f"{cls}QueryData")
-            else:
-                result += mutation_convenience_function(cls=f"{cls}MutationResponse")
-            generated_files.append(
-                GeneratedFile(file=qf.with_suffix(".py"), content=result)
-            )
+        return files
 
-        return generated_files
+
+def _render_fragment_task(
+    plugin: PydanticBase,
+    schema: GraphQLSchema,
+    task: tuple[GQLDefinition, Mapping[str, Fragment]],
+) -> Fragment | None:
+    definition, fragment_map = task
+    with active_profiler().step(definition, STEP_RENDER):
+        return plugin.render_fragment(
+            definition=definition, schema=schema, fragment_map=fragment_map
+        )
+
+
+def _render_operation_task(
+    plugin: PydanticBase,
+    schema: GraphQLSchema,
+    task: tuple[GQLDefinition, Mapping[str, Fragment]],
+) -> GeneratedFile:
+    definition, fragment_map = task
+    with active_profiler().step(definition, STEP_RENDER):
+        return plugin.render_operation(
+            definition=definition, schema=schema, fragment_map=fragment_map
+        )
 
 
 class PydanticV1Plugin(PydanticBase):
@@ -487,7 +1101,6 @@ class PydanticV1Plugin(PydanticBase):
     )
 
     IMPORTS = (
-        "from collections.abc import Callable  # noqa: F401 # pylint: disable=W0611\n"
         "from datetime import datetime  # noqa: F401 # pylint: disable=W0611\n"
         "from enum import Enum  # noqa: F401 # pylint: disable=W0611\n"
         "from typing import (  # noqa: F401 # pylint: disable=W0611\n"
@@ -504,6 +1117,15 @@ class PydanticV1Plugin(PydanticBase):
         ")"
     )
 
+    ITER_IMPORTS = (
+        "\nfrom pydantic import parse_obj_as  # noqa: F401 # pylint: disable=W0611"
+    )
+
+    CONVENIENCE_FUNCTIONS: Mapping[GQLDefinitionType, tuple[str, ...]] = {
+        GQLDefinitionType.QUERY: ("query", "query_async", "query_persisted"),
+        GQLDefinitionType.MUTATION: ("mutate", "mutate_async", "mutate_persisted"),
+    }
+
     CONF = (
         f"class {BASE_CLASS_NAME}(BaseModel):\n"
         f"{INDENT}class Config:\n"
@@ -513,6 +1135,18 @@ class PydanticV1Plugin(PydanticBase):
         f"{INDENT}{INDENT}extra=Extra.forbid"
     )
 
+    @staticmethod
+    def _convenience_function(kind: GQLDefinitionType, cls: str) -> str:
+        if kind == GQLDefinitionType.QUERY:
+            cls = f"{cls}QueryData"
+            return query_convenience_function(cls=cls) + (
+                query_async_convenience_function(cls=cls, validate=f"{cls}.parse_obj")
+            )
+        cls = f"{cls}MutationResponse"
+        return mutation_convenience_function(cls=cls) + (
+            mutation_async_convenience_function(cls=cls, validate=f"{cls}.parse_obj")
+        )
+
 
 class PydanticV2Plugin(PydanticBase):
     """Pydantic v2 plugin for Qenerate."""
@@ -522,7 +1156,6 @@ class PydanticV2Plugin(PydanticBase):
     )
 
     IMPORTS = (
-        "from collections.abc import Callable  # noqa: F401 # pylint: disable=W0611\n"
         "from datetime import datetime  # noqa: F401 # pylint: disable=W0611\n"
         "from enum import Enum  # noqa: F401 # pylint: disable=W0611\n"
         "from typing import (  # noqa: F401 # pylint: disable=W0611\n"
@@ -539,9 +1172,72 @@ class PydanticV2Plugin(PydanticBase):
         ")"
     )
 
+    ITER_IMPORTS = (
+        "\nfrom pydantic import TypeAdapter  # noqa: F401 # pylint: disable=W0611"
+    )
+
+    CONVENIENCE_FUNCTIONS: Mapping[GQLDefinitionType, tuple[str, ...]] = {
+        GQLDefinitionType.QUERY: (
+            "query",
+            "query_json",
+            "query_async",
+            "query_persisted",
+        ),
+        GQLDefinitionType.MUTATION: (
+            "mutate",
+            "mutate_json",
+            "mutate_async",
+            "mutate_persisted",
+        ),
+    }
+
     CONF = (
         f"class {BASE_CLASS_NAME}(BaseModel):\n"
         f"{INDENT}model_config = ConfigDict(\n"
         f"{INDENT}{INDENT}extra='forbid'\n"
         f"{INDENT})"
     )
+
+    @staticmethod
+    def _validate_expression(model: str, data: str) -> str:
+        return f"{model}.model_validate({data})"
+
+    @staticmethod
+    def _iter_function(name: str, gql_key: str, item_type: str) -> str:
+        adapter = f"_ITER_{name.upper()}_ADAPTER"
+        return query_iter_convenience_function(
+            name=name,
+            gql_key=gql_key,
+            item_type=item_type,
+            validate=f"{adapter}.validate_python(item)",
+            declarations=f"{adapter} = TypeAdapter({item_type})\n\n\n",
+        )
+
+    @staticmethod
+    def _convenience_function(kind: GQLDefinitionType, cls: str) -> str:
+        """Validate parsed responses via model_validate.
+
+        The *_json variants validate raw JSON responses via
+        model_validate_json, i.e., without decoding them into dictionaries.
+        """
+        if kind == GQLDefinitionType.QUERY:
+            cls = f"{cls}QueryData"
+            return (
+                query_convenience_function(
+                    cls=cls, validate=f"{cls}.model_validate(raw_data)"
+                )
+                + query_json_convenience_function(cls=cls)
+                + query_async_convenience_function(
+                    cls=cls, validate=f"{cls}.model_validate"
+                )
+            )
+        cls = f"{cls}MutationResponse"
+        return (
+            mutation_convenience_function(
+                cls=cls, validate=f"{cls}.model_validate(raw_data)"
+            )
+            + mutation_json_convenience_function(cls=cls)
+            + mutation_async_convenience_function(
+                cls=cls, validate=f"{cls}.model_validate"
+            )
+        )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from qenerate.plugins.pydantic.typed_ast import (
+    Emitter,
+    ParsedClassNode,
+    ParsedFragmentSpreadNode,
+    ParsedInlineFragmentNode,
+    ParsedNode,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+    from pathlib import Path
+
+
+class SharedModels:
+    """Classes declared identically by several operation modules.
+
+    Every class subtree of the parsed operations is hashed structurally,
+    i.e., by its own declaration and the hashes of its children. Subtrees
+    occurring in at least two modules are declared once in a shared module,
+    which the operations import. Subtrees spreading fragments stay in their
+    modules, as do class names used by differing shared subtrees.
+    """
+
+    def __init__(self, file: Path, asts: Mapping[str, ParsedNode]) -> None:
+        self.file = file
+        self.import_path = str(file.with_suffix("")).replace("/", ".")
+        self.asts = asts
+        # Structural hashes by node id, nodes are kept alive by the asts
+        self._hashes: dict[int, str] = {}
+        self._classes: dict[int, ParsedClassNode] = {}
+        modules: dict[str, set[str]] = defaultdict(set)
+        for key, ast in asts.items():
+            self._hash(ast)
+            for node in self._walk(ast):
+                if id(node) in self._classes:
+                    modules[self._hashes[id(node)]].add(key)
+
+        names: dict[str, set[str]] = defaultdict(set)
+        for node in self._classes.values():
+            key = self._hashes[id(node)]
+            if len(modules[key]) > 1:
+                names[node.parsed_type.unwrapped_python_type].add(key)
+        candidates = {key for keys in names.values() if len(keys) == 1 for key in keys}
+        self._shared: set[int] = set()
+        for ast in asts.values():
+            self._share(ast, candidates)
+
+    @staticmethod
+    def _walk(node: ParsedNode) -> Iterator[ParsedNode]:
+        yield node
+        for child in node.fields:
+            yield from SharedModels._walk(child)
+
+    def _hash(self, node: ParsedNode) -> str:
+        emitter = Emitter()
+        node.emit(emitter)
+        declaration = emitter.getvalue()
+        if declaration and isinstance(node, ParsedClassNode):
+            self._classes[id(node)] = node
+        h = hashlib.sha256()
+        h.update(type(node).__name__.encode())
+        h.update(declaration.encode())
+        for child in node.fields:
+            h.update(self._hash(child).encode())
+        self._hashes[id(node)] = h.hexdigest()
+        return self._hashes[id(node)]
+
+    def _share(self, node: ParsedNode, candidates: set[str]) -> bool:
+        """Whether the subtree of the node can be declared in the shared module."""
+        shareable = True
+        for child in node.fields:
+            # Shared subtrees may sit below subtrees which are not shared
+            shareable = self._share(child, candidates) and shareable
+        if isinstance(node, ParsedFragmentSpreadNode):
+            # Fragment classes are only imported by the operation modules
+            return False
+        if id(node) not in self._classes:
+            return shareable
+        if shareable and self._hashes[id(node)] in candidates:
+            self._shared.add(id(node))
+            return True
+        return False
+
+    def is_empty(self) -> bool:
+        """Whether no class is shared, i.e., no shared module is needed."""
+        return not self._shared
+
+    def is_shared(self, node: ParsedNode) -> bool:
+        return id(node) in self._shared
+
+    def key(self, node: ParsedNode) -> str | None:
+        """Structural hash of a shared node."""
+        return self._hashes[id(node)] if self.is_shared(node) else None
+
+    def roots(self, ast: ParsedNode) -> list[ParsedClassNode]:
+        """Outermost shared nodes of an operation."""
+        if self.is_shared(ast):
+            return [self._classes[id(ast)]]
+        return [root for child in ast.fields for root in self.roots(child)]
+
+    def imports(self, ast: ParsedNode) -> list[str]:
+        """Class names an operation module imports from the shared module.
+
+        Union field types also refer to the inline fragments of a class.
+        """
+        names: set[str] = set()
+        for root in self.roots(ast):
+            names.add(root.parsed_type.unwrapped_python_type)
+            names.update(
+                child.parsed_type.unwrapped_python_type
+                for child in root.fields
+                if isinstance(child, ParsedInlineFragmentNode)
+            )
+        return sorted(names)
@@ -1,22 +1,68 @@
 from __future__ import annotations
 
+import io
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from qenerate.core.preprocessor import GQLDefinitionType
 
+if TYPE_CHECKING:
+    from typing import TextIO
+
 BASE_CLASS_NAME = "ConfiguredBaseModel"
 INDENT = "    "
 
 
+class Emitter:
+    """Sink for generated code.
+
+    Chunks are written straight to a text stream, e.g., a file handle.
+    Without a stream they are buffered in memory. Either way, the cost
+    of rendering is linear in the size of the output.
+    """
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self._stream = stream if stream is not None else io.StringIO()
+
+    def write(self, chunk: str) -> None:
+        self._stream.write(chunk)
+
+    def class_header(self, declaration: str) -> None:
+        self.write(f"\n\n\nclass {declaration}:")
+
+    def line(self, line: str) -> None:
+        self.write(f"\n{INDENT}{line}")
+
+    def getvalue(self) -> str:
+        if not isinstance(self._stream, io.StringIO):
+            raise TypeError("Emitter writes to a stream and holds no value")
+        return self._stream.getvalue()
+
+
 @dataclass
 class ParsedNode:
     parent: ParsedNode | None
     fields: list[ParsedNode]
     parsed_type: ParsedFieldType
 
-    def class_code_string(self) -> str:  # ruff: ignore[no-self-use]
-        return ""
+    def emit(self, emitter: Emitter) -> None:
+        """Write the class declaration of this node, if any."""
+
+    def _emit_fields(self, emitter: Emitter, *, optional_enums: bool = False) -> None:
+        fields_added = False
+        for field in self.fields:
+            if isinstance(field, ParsedClassNode):
+                field_arg = (
+                    "" if optional_enums and field.parsed_type.enum_map else "..., "
+                )
+                emitter.line(
+                    f"{field.py_key}: {field.field_type()} = "
+                    f'Field({field_arg}alias="{field.gql_key}")'
+                )
+                fields_added = True
+
+        if not fields_added:
+            emitter.line("...")
 
     def _needs_class_rendering(self) -> bool:
         if self.parsed_type.is_primitive:
@@ -29,40 +75,23 @@ class ParsedNode:
             self.fields[0], ParsedFragmentSpreadNode
         )
 
-    @staticmethod
-    def _empty() -> str:
-        return f"{INDENT}..."
-
 
 @dataclass
 class ParsedInlineFragmentNode(ParsedNode):
-    def class_code_string(self) -> str:
+    def emit(self, emitter: Emitter) -> None:
         # Assure not Optional[]
         if not (self.parent and self.parsed_type):  # type: ignore[truthy-bool]
-            return ""
+            return
 
         if self.parsed_type.is_primitive:
-            return ""
+            return
 
         base_class = self.parent.parsed_type.unwrapped_python_type
         if isinstance(self.parent, ParsedFragmentDefinitionNode):
             base_class = self.parent.fragment_name
 
-        lines = ["\n\n"]
-        lines.append(f"class {self.parsed_type.unwrapped_python_type}({base_class}):")
-        fields_added = False
-        for field in self.fields:
-            if isinstance(field, ParsedClassNode):
-                lines.append(
-                    f"{INDENT}{field.py_key}: {field.field_type()} = "
-                    f'Field(..., alias="{field.gql_key}")'
-                )
-                fields_added = True
-
-        if not fields_added:
-            lines.append(self._empty())
-
-        return "\n".join(lines)
+        emitter.class_header(f"{self.parsed_type.unwrapped_python_type}({base_class})")
+        self._emit_fields(emitter)
 
 
 @dataclass
@@ -70,42 +99,27 @@ class ParsedClassNode(ParsedNode):
     gql_key: str
     py_key: str
 
-    def class_code_string(self) -> str:
+    def emit(self, emitter: Emitter) -> None:
         if not self._needs_class_rendering():
-            return ""
+            return
 
         if self.parsed_type.enum_map:
-            return self._enum_code()
-        return self._class_code()
+            self._emit_enum(emitter)
+        else:
+            self._emit_class(emitter)
 
-    def _class_code(self) -> str:
+    def _emit_class(self, emitter: Emitter) -> None:
         base_classes = ", ".join(self._base_classes())
-        lines = ["\n\n"]
-        lines.append(f"class {self.parsed_type.unwrapped_python_type}({base_classes}):")
-        fields_added = False
-        for field in self.fields:
-            field_arg = "..., "
-            if field.parsed_type.enum_map:
-                field_arg = ""
-            if isinstance(field, ParsedClassNode):
-                lines.append(
-                    f"{INDENT}{field.py_key}: {field.field_type()} = "
-                    f'Field({field_arg}alias="{field.gql_key}")'
-                )
-                fields_added = True
-
-        if not fields_added:
-            lines.append(self._empty())
-
-        return "\n".join(lines)
+        emitter.class_header(
+            f"{self.parsed_type.unwrapped_python_type}({base_classes})"
+        )
+        self._emit_fields(emitter, optional_enums=True)
 
-    def _enum_code(self) -> str:
-        lines = ["\n\n"]
-        lines.append(f"class {self.parsed_type.unwrapped_python_type}(Enum):")
+    def _emit_enum(self, emitter: Emitter) -> None:
+        emitter.class_header(f"{self.parsed_type.unwrapped_python_type}(Enum)")
         for k, v in self.parsed_type.enum_map.items():
             val = f'"{v}"' if isinstance(v, str) else v
-            lines.append(f"{INDENT}{k} = {val}")
-        return "\n".join(lines)
+            emitter.line(f"{k} = {val}")
 
     def _base_classes(self) -> list[str]:
         base_classes: list[str] = []
@@ -128,18 +142,19 @@ class ParsedClassNode(ParsedNode):
             )
 
         unions: list[str] = []
-        # TODO: sorting does not need to happen on each call
         """
         Pydantic does best-effort matching on Unions.
         Declare most significant type first.
         This, smart_union and disallowing extra fields gives high confidence
         in matching.
         https://pydantic-docs.helpmanual.io/usage/types/#unions
+        The fields are not sorted in place, i.e., rendering a class does not
+        change the declarations of its fields.
         """
-        self.fields.sort(key=lambda a: len(a.fields), reverse=True)
+        fields = sorted(self.fields, key=lambda a: len(a.fields), reverse=True)
         unions.extend(
             field.parsed_type.unwrapped_python_type
-            for field in self.fields
+            for field in fields
             if isinstance(field, ParsedInlineFragmentNode)
         )
         if len(unions) > 0:
@@ -154,28 +169,14 @@ class ParsedClassNode(ParsedNode):
 class ParsedOperationNode(ParsedNode):
     operation_type: GQLDefinitionType
 
-    def class_code_string(self) -> str:
-        lines = ["\n\n"]
+    def emit(self, emitter: Emitter) -> None:
         class_suffix = "QueryData"
         if self.operation_type == GQLDefinitionType.MUTATION:
             class_suffix = "MutationResponse"
-        lines.append(
-            f"class {self.parsed_type.unwrapped_python_type}{class_suffix}"
-            f"({BASE_CLASS_NAME}):"
+        emitter.class_header(
+            f"{self.parsed_type.unwrapped_python_type}{class_suffix}({BASE_CLASS_NAME})"
         )
-        fields_added = False
-        for field in self.fields:
-            if isinstance(field, ParsedClassNode):
-                lines.append(
-                    f"{INDENT}{field.py_key}: {field.field_type()} = "
-                    f'Field(..., alias="{field.gql_key}")'
-                )
-                fields_added = True
-
-        if not fields_added:
-            lines.append(self._empty())
-
-        return "\n".join(lines)
+        self._emit_fields(emitter)
 
 
 @dataclass
@@ -183,28 +184,14 @@ class ParsedFragmentDefinitionNode(ParsedNode):
     class_name: str
     fragment_name: str
 
-    def class_code_string(self) -> str:
-        lines = ["\n\n"]
-        lines.append(f"class {self.class_name}({BASE_CLASS_NAME}):")
-        fields_added = False
-        for field in self.fields:
-            if isinstance(field, ParsedClassNode):
-                lines.append(
-                    f"{INDENT}{field.py_key}: {field.field_type()} = "
-                    f'Field(..., alias="{field.gql_key}")'
-                )
-                fields_added = True
-
-        if not fields_added:
-            lines.append(self._empty())
-
-        return "\n".join(lines)
+    def emit(self, emitter: Emitter) -> None:
+        emitter.class_header(f"{self.class_name}({BASE_CLASS_NAME})")
+        self._emit_fields(emitter)
 
 
 @dataclass
 class ParsedFragmentSpreadNode(ParsedNode):
-    def class_code_string(self) -> str:  # ruff: ignore[no-self-use]
-        return ""
+    pass
 
 
 @dataclass
@@ -213,3 +200,5 @@ class ParsedFieldType:
     wrapped_python_type: str
     is_primitive: bool
     enum_map: dict[str, Any]
+    # Names of the GraphQL object types a value of this type can have
+    possible_types: tuple[str, ...] = ()
@@ -1,18 +1,24 @@
 # ruff: file-ignore[no-self-use, unused-method-argument, hardcoded-temp-file, os-path-exists]
 import os
+import sys
 from pathlib import Path
 from typing import TYPE_CHECKING
 from unittest.mock import MagicMock
 
 import pytest
 
+from qenerate.cli import run
+from qenerate.core import preprocessor as preprocessor_module
 from qenerate.core.code_command import CodeCommand
 from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.parallel import resolve_jobs
 from qenerate.core.plugin import Fragment, GeneratedFile, Plugin
 from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType, Preprocessor
 
 if TYPE_CHECKING:
-    from graphql import GraphQLSchema
+    from collections.abc import Sequence
+
+    from graphql import ASTValidationRule, DocumentNode, GraphQLError, GraphQLSchema
     from pyfakefs.fake_filesystem_unittest import FakeFilesystem
 
 SCHEMA_DIR = "tests/generator"
@@ -21,7 +27,7 @@ APP_INTERFACE_INTROSPECTION = "introspection-app-interface.json"
 
 class FakePlugin(Plugin):
     def generate_fragments(
-        self, definitions: list[GQLDefinition], schema: GraphQLSchema
+        self, definitions: list[GQLDefinition], schema: GraphQLSchema, jobs: int = 1
     ) -> list[Fragment]:
         return []
 
@@ -30,6 +36,9 @@ class FakePlugin(Plugin):
         definitions: list[GQLDefinition],
         schema: GraphQLSchema,
         fragments: list[Fragment],
+        jobs: int = 1,
+        *,
+        shared_models: Path | None = None,
     ) -> list[GeneratedFile]:
         return [
             GeneratedFile(
@@ -178,3 +187,257 @@ def test_sanitize_introspection_no_directives() -> None:
     introspection: dict = {"__schema": {}}
     result = CodeCommand.sanitize_introspection(introspection)
     assert result == {"__schema": {}}
+
+
+def test_cache_dir_skips_unchanged_definitions(fs: FakeFilesystem) -> None:
+    fs.add_real_directory(SCHEMA_DIR)
+    fs.create_file("/tmp/my_query.gql", contents="")
+    fs.create_file("/tmp/other_query.gql", contents="")
+    files = [
+        ("/tmp/my_query.gql", GQLDefinitionType.QUERY),
+        ("/tmp/other_query.gql", GQLDefinitionType.QUERY),
+    ]
+
+    CodeCommand(
+        preprocessor=fake_preprocessor(files=files),
+        plugins={"fake": FakePlugin()},
+    ).generate_code(
+        introspection_file_path=f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}",
+        directory="/tmp",
+        cache_dir="/cache",
+    )
+    assert os.path.exists("/cache/manifest.json")
+
+    Path("/tmp/my_query.py").write_text("changed", encoding="utf-8")
+    Path("/tmp/other_query.py").unlink()
+
+    CodeCommand(
+        preprocessor=fake_preprocessor(files=files),
+        plugins={"fake": FakePlugin()},
+    ).generate_code(
+        introspection_file_path=f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}",
+        directory="/tmp",
+        cache_dir="/cache",
+    )
+
+    # unchanged definition is not rendered again
+    assert Path("/tmp/my_query.py").read_text(encoding="utf-8") == "changed"
+    # missing output is rendered again
+    assert Path("/tmp/other_query.py").read_text(encoding="utf-8") == "fake"
+
+
+def test_parallel_preprocessing_keeps_discovery_order(fs: FakeFilesystem) -> None:
+    files = [f"/tmp/{d}/q_{i}.gql" for d in ("b", "a", "a/c") for i in range(5)]
+    for file in files:
+        fs.create_file(file, contents="")
+
+    def process_file(file_path: Path) -> list[GQLDefinition]:
+        return [
+            GQLDefinition(
+                feature_flags=FeatureFlags(plugin="fake", gql_scalar_mappings={}),
+                definition="",
+                fragment_dependencies=set(),
+                kind=GQLDefinitionType.QUERY,
+                name=file_path.name,
+                source_file=file_path,
+            )
+        ]
+
+    preprocessor = MagicMock()
+    preprocessor.process_file = MagicMock(side_effect=process_file)
+    code_command = CodeCommand(preprocessor=preprocessor, plugins={})
+
+    definitions = code_command._preprocess(  # ruff: ignore[private-member-access]
+        directory="/tmp", schema=MagicMock(), jobs=4
+    )
+
+    assert [str(d.source_file) for d in definitions] == [
+        *(f"/tmp/a/q_{i}.gql" for i in range(5)),
+        *(f"/tmp/a/c/q_{i}.gql" for i in range(5)),
+        *(f"/tmp/b/q_{i}.gql" for i in range(5)),
+    ]
+
+
+def test_lazy_schema_generates_identical_code(tmp_path: Path) -> None:
+    (tmp_path / "fragment.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "fragment UserName on User_v1 { name org_username }",
+        encoding="utf-8",
+    )
+    (tmp_path / "query.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "query Users($path: String) { users_v1(path: $path) { ... UserName } }",
+        encoding="utf-8",
+    )
+    introspection = f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}"
+
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=introspection, directory=str(tmp_path)
+    )
+    expected = {f: f.read_text(encoding="utf-8") for f in tmp_path.glob("*.py")}
+    for f in expected:
+        f.unlink()
+
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=introspection,
+        directory=str(tmp_path),
+        lazy_schema=True,
+    )
+    assert {f: f.read_text(encoding="utf-8") for f in tmp_path.glob("*.py")} == expected
+
+
+def test_package_index_exports_generated_names(tmp_path: Path) -> None:
+    (tmp_path / "fragment.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "fragment UserName on User_v1 { name org_username }",
+        encoding="utf-8",
+    )
+    (tmp_path / "users.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "query Users($path: String) { users_v1(path: $path) { ... UserName } }",
+        encoding="utf-8",
+    )
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}",
+        directory=str(tmp_path),
+        package_index=True,
+    )
+
+    index = (tmp_path / "__init__.py").read_text(encoding="utf-8")
+    assert '"UserName": ("fragment", "UserName"),' in index
+    assert '"UsersQueryData": ("users", "UsersQueryData"),' in index
+    assert '"query_users": ("users", "query"),' in index
+    assert '"query_json_users": ("users", "query_json"),' in index
+    assert '"query_async_users": ("users", "query_async"),' in index
+    assert '"query_persisted_users": ("users", "query_persisted"),' in index
+
+
+def test_persisted_queries_match_generated_hashes(tmp_path: Path) -> None:
+    (tmp_path / "fragment.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "fragment UserName on User_v1 { name org_username }",
+        encoding="utf-8",
+    )
+    (tmp_path / "users.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "query Users($path: String) { users_v1(path: $path) { ... UserName } }",
+        encoding="utf-8",
+    )
+    (tmp_path / "clusters.gql").write_text(
+        "# qenerate: plugin=msgspec\n"
+        "query Clusters { clusters_v1 { auth { ... on ClusterAuthGithubOrg_v1 { org } } } }",
+        encoding="utf-8",
+    )
+    code_command = CodeCommand(preprocessor=Preprocessor())
+    code_command.generate_code(
+        introspection_file_path=f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}",
+        directory=str(tmp_path),
+    )
+
+    queries = {q.name: q for q in code_command.persisted_queries(str(tmp_path))}
+
+    assert sorted(queries) == ["Clusters", "Users"]
+    assert "fragment UserName on User_v1" in queries["Users"].body
+    # The hash covers the DEFINITION as sent, e.g., with the injected __typename
+    assert "auth { __typename ... on" in queries["Clusters"].body
+    for name, module in (("Users", "users.py"), ("Clusters", "clusters.py")):
+        content = (tmp_path / module).read_text(encoding="utf-8")
+        assert f'DEFINITION_SHA256 = "{queries[name].hash}"' in content
+
+
+def test_lazy_schema_keeps_msgspec_tagged_unions(tmp_path: Path) -> None:
+    # msgspec tags every possible type of ClusterAuth_v1, not only the
+    # ones selected through inline fragments
+    (tmp_path / "query.gql").write_text(
+        "# qenerate: plugin=msgspec\n"
+        "query Auth { clusters_v1 { auth { service "
+        "... on ClusterAuthGithubOrg_v1 { org } } } }",
+        encoding="utf-8",
+    )
+    introspection = f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}"
+    query = tmp_path / "query.py"
+
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=introspection, directory=str(tmp_path)
+    )
+    expected = query.read_text(encoding="utf-8")
+    query.unlink()
+
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=introspection,
+        directory=str(tmp_path),
+        lazy_schema=True,
+    )
+    assert "ClusterAuthOIDCV1" in expected
+    assert query.read_text(encoding="utf-8") == expected
+
+
+def test_cache_dir_regenerates_on_changed_feature_flags(tmp_path: Path) -> None:
+    query = tmp_path / "query.gql"
+    body = "query Users { users_v1 { name } }"
+    introspection = f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}"
+
+    def generate(flags: str) -> str:
+        query.write_text(f"# qenerate: plugin=pydantic_v2\n{flags}{body}", "utf-8")
+        CodeCommand(preprocessor=Preprocessor()).generate_code(
+            introspection_file_path=introspection,
+            directory=str(tmp_path),
+            cache_dir=str(tmp_path / "cache"),
+        )
+        return (tmp_path / "query.py").read_text(encoding="utf-8")
+
+    expanded = generate("")
+    minified = generate("# qenerate: minify_definition=true\n")
+
+    assert 'DEFINITION = """query Users{users_v1{name}}"""' in minified
+    assert minified != expanded
+    assert generate("") == expanded
+
+
+def test_cache_dir_skips_validated_definitions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "query.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\nquery Users { users_v1 { name } }", "utf-8"
+    )
+    validated: list[DocumentNode] = []
+    validate = preprocessor_module.validate
+
+    def recording_validate(
+        schema: GraphQLSchema,
+        document_ast: DocumentNode,
+        rules: Sequence[type[ASTValidationRule]],
+    ) -> list[GraphQLError]:
+        validated.append(document_ast)
+        return validate(schema, document_ast, rules)
+
+    monkeypatch.setattr(preprocessor_module, "validate", recording_validate)
+
+    def generate() -> None:
+        # Each run starts with a fresh in-memory validation cache
+        CodeCommand(preprocessor=Preprocessor()).generate_code(
+            introspection_file_path=f"{SCHEMA_DIR}/{APP_INTERFACE_INTROSPECTION}",
+            directory=str(tmp_path),
+            cache_dir=str(tmp_path / "cache"),
+        )
+
+    generate()
+    assert len(validated) == 1
+
+    validated.clear()
+    generate()
+    assert not validated
+
+
+def test_negative_jobs_are_rejected(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert resolve_jobs(0) >= 1
+    with pytest.raises(ValueError, match="must not be negative"):
+        resolve_jobs(-1)
+
+    for command in (["code", "-i", "introspection.json"], ["persisted-queries"]):
+        monkeypatch.setattr(sys, "argv", ["qenerate", *command, "-j", "-1", "."])
+        with pytest.raises(SystemExit):
+            run()
+        assert "must not be negative" in capsys.readouterr().err
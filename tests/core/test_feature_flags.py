@@ -71,6 +71,43 @@ from qenerate.core.feature_flag_parser import (
                 gql_scalar_mappings={"JSON": "str", "A": "B"},
             ),
         ),
+        (
+            """
+            # qenerate: plugin=PluginV1
+            # qenerate: query_many=true
+            query {}
+            """,
+            FeatureFlags(
+                plugin="PluginV1",
+                gql_scalar_mappings={},
+                query_many=True,
+            ),
+        ),
+        (
+            """
+            # qenerate: plugin=PluginV1
+            # qenerate: query_iter=true
+            # qenerate: query_many=false
+            query {}
+            """,
+            FeatureFlags(
+                plugin="PluginV1",
+                gql_scalar_mappings={},
+                query_iter=True,
+            ),
+        ),
+        (
+            """
+            # qenerate: plugin=PluginV1
+            # qenerate: minify_definition=true
+            query {}
+            """,
+            FeatureFlags(
+                plugin="PluginV1",
+                gql_scalar_mappings={},
+                minify_definition=True,
+            ),
+        ),
     ],
 )
 def test_valid_feature_flags(definition: str, expected_flags: FeatureFlags) -> None:
@@ -101,6 +138,14 @@ def test_valid_feature_flags(definition: str, expected_flags: FeatureFlags) -> N
             """,
             ("Unknown naming_collision_strategy: DOES_NOT_EXIST"),
         ),
+        (
+            """
+            # qenerate: plugin=PluginV1
+            # qenerate: query_many=yes
+            query {}
+            """,
+            ("Invalid query_many: yes"),
+        ),
     ],
 )
 def test_feature_flags_exceptions(definition: str, expected_message: str) -> None:
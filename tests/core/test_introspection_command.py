@@ -1,7 +1,10 @@
+import json
 from json import JSONDecodeError
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
+from graphql import build_client_schema, parse, validate
 
 from qenerate.core.introspection_command import IntrospectionCommand
 
@@ -21,3 +24,28 @@ def test_does_not_return_json(requests_mock: requests_mock.Mocker) -> None:
 
     with pytest.raises(JSONDecodeError):
         IntrospectionCommand.introspection_query(TEST_URL)
+
+
+def test_prune_to(
+    requests_mock: requests_mock.Mocker,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    introspection = json.loads(
+        Path("tests/generator/introspection-app-interface.json").read_text(
+            encoding="utf-8"
+        )
+    )
+    query = "query Users { users_v1 { name } }"
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "users.gql").write_text(query, encoding="utf-8")
+    requests_mock.post(TEST_URL, json=introspection)
+
+    IntrospectionCommand.introspection_query(TEST_URL, prune_to=str(tmp_path))
+
+    pruned = json.loads(capsys.readouterr().out)
+    types = {t["name"] for t in pruned["data"]["__schema"]["types"]}
+    assert {"Query", "User_v1", "String"} <= types
+    assert len(types) < len(introspection["data"]["__schema"]["types"])
+    schema = build_client_schema(pruned["data"])
+    assert not validate(schema, parse(query))
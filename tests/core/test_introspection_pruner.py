@@ -0,0 +1,233 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from graphql import (
+    build_client_schema,
+    build_schema,
+    get_introspection_query,
+    graphql_sync,
+    parse,
+    validate,
+    visit,
+)
+
+from qenerate.core.code_command import CodeCommand
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.introspection_pruner import IntrospectionPruner
+from qenerate.core.preprocessor import (
+    VALIDATION_RULES,
+    DefinitionVisitor,
+    GQLDefinition,
+    GQLDefinitionType,
+)
+from qenerate.plugins.msgspec.plugin import MsgspecPlugin
+from qenerate.plugins.pydantic.plugin import PydanticBase, PydanticV2Plugin
+
+SDL = """
+directive @cached(ttl: Int) on FIELD
+directive @unused(reason: UnusedReason) on FIELD
+
+input UnusedReason {
+    text: String
+}
+
+interface Node {
+    id: ID!
+    createdAt: String
+}
+
+type User implements Node {
+    id: ID!
+    createdAt: String
+    name: String
+    role: Role
+    friends(first: Int, filter: UserFilter): [User!]
+}
+
+type Bot implements Node {
+    id: ID!
+    createdAt: String
+    owner: User
+}
+
+union Actor = User | Bot
+
+enum Role {
+    ADMIN
+    MEMBER
+}
+
+input UserFilter {
+    role: Role
+    nested: NestedFilter
+}
+
+input NestedFilter {
+    name: String
+}
+
+type Unused {
+    value: String
+}
+
+type Query {
+    users: [User!]
+    actors: [Actor!]
+    node(id: ID!): Node
+    unused: Unused
+}
+
+type Mutation {
+    rename(id: ID!, name: String!): User
+}
+"""
+
+
+def _introspection(sdl: str = SDL) -> dict[str, Any]:
+    result = graphql_sync(build_schema(sdl), get_introspection_query())
+    assert result.data
+    return result.data
+
+
+def _types(pruned: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return {t["name"]: t for t in pruned["__schema"]["types"]}
+
+
+def _field_names(t: dict[str, Any]) -> set[str]:
+    return {f["name"] for f in t["fields"]}
+
+
+def test_prune_keeps_selected_fields() -> None:
+    query = "query Q { users { name friends(filter: {role: ADMIN}) { id } } }"
+    pruned = IntrospectionPruner(_introspection()).prune([parse(query)])
+    types = _types(pruned)
+
+    assert _field_names(types["Query"]) == {"users"}
+    assert _field_names(types["User"]) == {"id", "name", "friends"}
+    # Arguments keep their whole input type closure
+    assert {"UserFilter", "NestedFilter", "Role", "Int"} <= types.keys()
+    assert "Unused" not in types
+    assert "Bot" not in types
+    assert pruned["__schema"]["mutationType"] is None
+
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert not validate(schema, parse(query), VALIDATION_RULES)
+
+
+def test_prune_keeps_used_directives() -> None:
+    query = "query Q { users @cached(ttl: 5) { name @include(if: true) } }"
+    pruned = IntrospectionPruner(_introspection()).prune([parse(query)])
+
+    directives = {d["name"] for d in pruned["__schema"]["directives"]}
+    assert {"cached", "include", "skip", "deprecated"} <= directives
+    assert "unused" not in directives
+    assert "UnusedReason" not in _types(pruned)
+
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert not validate(schema, parse(query), VALIDATION_RULES)
+
+
+def test_prune_keeps_interfaces_consistent() -> None:
+    query = """
+    query Q { node(id: "1") { createdAt ... on User { name } } }
+    fragment BotOwner on Bot { owner { id } }
+    """
+    pruned = IntrospectionPruner(_introspection()).prune([parse(query)])
+    types = _types(pruned)
+
+    # Implementations provide every kept field of their interfaces
+    assert _field_names(types["Node"]) == {"createdAt"}
+    assert _field_names(types["User"]) >= {"createdAt", "name"}
+    assert _field_names(types["Bot"]) == {"createdAt", "owner"}
+
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert not validate(schema, parse(query), VALIDATION_RULES)
+
+
+def test_prune_keeps_all_possible_types() -> None:
+    query = "query Q { actors { __typename } }"
+    pruned = IntrospectionPruner(_introspection()).prune([parse(query)])
+    types = _types(pruned)
+
+    # Unselected possible types are kept as stubs
+    assert [p["name"] for p in types["Actor"]["possibleTypes"]] == ["User", "Bot"]
+    assert len(types["Bot"]["fields"]) == 1
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert not validate(schema, parse(query), VALIDATION_RULES)
+
+
+def test_prune_keeps_used_mutation_type() -> None:
+    mutation = 'mutation M { rename(id: "1", name: "x") { name } }'
+    pruned = IntrospectionPruner(_introspection()).prune([parse(mutation)])
+
+    assert pruned["__schema"]["mutationType"]["name"] == "Mutation"
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert not validate(schema, parse(mutation), VALIDATION_RULES)
+
+
+def test_prune_reports_unknown_fields_via_validation() -> None:
+    query = "query Q { users { does_not_exist } }"
+    pruned = IntrospectionPruner(_introspection()).prune([parse(query)])
+    schema = build_client_schema(pruned)  # type: ignore[arg-type]
+    assert validate(schema, parse(query), VALIDATION_RULES)
+
+
+@pytest.mark.parametrize(
+    ("case", "introspection_file", "plugin"),
+    [
+        ("complex_queries", "introspection-app-interface.json", PydanticV2Plugin()),
+        (
+            "fragments_2023_03",
+            "introspection-app-interface_2023_03.json",
+            PydanticV2Plugin(),
+        ),
+        ("github", "introspection-github.json", PydanticV2Plugin()),
+        (
+            "simple_queries_with_fragments",
+            "introspection-app-interface.json",
+            PydanticV2Plugin(),
+        ),
+        # msgspec declares a tagged class for every possible type
+        ("complex_queries", "introspection-app-interface.json", MsgspecPlugin()),
+        ("github", "introspection-github.json", MsgspecPlugin()),
+    ],
+)
+def test_prune_renders_identical_code(
+    case: str, introspection_file: str, plugin: PydanticBase
+) -> None:
+    introspection = CodeCommand.sanitize_introspection(
+        json.loads(
+            Path(f"tests/generator/{introspection_file}").read_text(encoding="utf-8")
+        )["data"]
+    )
+    definitions: list[GQLDefinition] = []
+    for file in sorted(Path(f"tests/generator/definitions/{case}").glob("*.gql")):
+        visitor = DefinitionVisitor(
+            source_file_path=file,
+            feature_flags=FeatureFlags(plugin="pydantic_v2", gql_scalar_mappings={}),
+        )
+        visit(parse(file.read_text(encoding="utf-8")), visitor)
+        definitions.extend(visitor.definitions)
+    pruned = IntrospectionPruner(introspection).prune(
+        d.document_ast() for d in definitions
+    )
+
+    fragment_definitions = [
+        d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT
+    ]
+    operation_definitions = [
+        d for d in definitions if d.kind != GQLDefinitionType.FRAGMENT
+    ]
+    rendered = []
+    for introspection_data in (introspection, pruned):
+        schema = build_client_schema(introspection_data)  # type: ignore[arg-type]
+        fragments = plugin.generate_fragments(fragment_definitions, schema)
+        operations = plugin.generate_operations(
+            operation_definitions, schema, fragments
+        )
+        rendered.append([f.content for f in [*fragments, *operations]])
+
+    assert rendered[0] == rendered[1]
+    assert len(pruned["__schema"]["types"]) < len(introspection["__schema"]["types"])
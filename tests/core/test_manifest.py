@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.manifest import Manifest, definition_key
+from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+
+
+def definition(
+    name: str,
+    kind: GQLDefinitionType,
+    text: str,
+    dependencies: set[str] | None = None,
+) -> GQLDefinition:
+    return GQLDefinition(
+        feature_flags=FeatureFlags(plugin="fake", gql_scalar_mappings={}),
+        source_file=Path(f"/tmp/{name}.gql"),  # ruff: ignore[hardcoded-temp-file]
+        kind=kind,
+        definition=text,
+        name=name,
+        fragment_dependencies=dependencies or set(),
+    )
+
+
+def definitions(leaf_text: str) -> list[GQLDefinition]:
+    return [
+        definition("Leaf", GQLDefinitionType.FRAGMENT, leaf_text),
+        definition("Middle", GQLDefinitionType.FRAGMENT, "middle", {"Leaf"}),
+        definition("Other", GQLDefinitionType.FRAGMENT, "other"),
+        definition("MyQuery", GQLDefinitionType.QUERY, "query", {"Middle"}),
+        definition("OtherQuery", GQLDefinitionType.QUERY, "query", {"Other"}),
+    ]
+
+
+def test_compute_entries_fragment_closure() -> None:
+    entries = Manifest.compute_entries(definitions("leaf"), salt="")
+    by_name = {key.split("::")[-1]: entry for key, entry in entries.items()}
+    assert by_name["MyQuery"].fragments == ["Leaf", "Middle"]
+    assert by_name["Middle"].fragments == ["Leaf"]
+    assert by_name["OtherQuery"].fragments == ["Other"]
+
+
+def test_changed_fragment_invalidates_dependents() -> None:
+    before = Manifest.compute_entries(definitions("leaf"), salt="")
+    after_definitions = definitions("changed leaf")
+    after = Manifest.compute_entries(after_definitions, salt="")
+
+    changed = {
+        key.split("::")[-1] for key in before if before[key].hash != after[key].hash
+    }
+    assert changed == {"Leaf", "Middle", "MyQuery"}
+
+
+def test_salt_invalidates_everything() -> None:
+    before = Manifest.compute_entries(definitions("leaf"), salt="a")
+    after = Manifest.compute_entries(definitions("leaf"), salt="b")
+    assert all(before[key].hash != after[key].hash for key in before)
+
+
+def test_load_and_save(tmp_path: Path) -> None:
+    defs = definitions("leaf")
+    manifest = Manifest.load(tmp_path / "manifest.json")
+    assert not manifest.entries
+
+    manifest.entries = Manifest.compute_entries(defs, salt="")
+    manifest.save()
+
+    loaded = Manifest.load(tmp_path / "manifest.json")
+    assert loaded.entries == manifest.entries
+    assert loaded.changed(entries=manifest.entries, definitions=defs) == {
+        definition_key(d) for d in defs
+    }, "outputs do not exist"
@@ -0,0 +1,41 @@
+from qenerate.core.minifier import minify_document
+
+OPERATION = """
+# qenerate: plugin=pydantic_v2
+query Users($path: String) {
+  users_v1(path: $path) {
+    ... UserName
+    roles { ... RoleName }
+  }
+}
+"""
+
+
+def test_minify_document() -> None:
+    minified = minify_document(
+        operation=OPERATION,
+        fragments=[
+            "# qenerate: plugin=pydantic_v2\nfragment UserName on User_v1 { name }",
+            "fragment RoleName on Role_v1 {\n  name\n}",
+        ],
+    )
+
+    # Comments and whitespace are stripped, fragments are sorted by name
+    assert minified == (
+        "query Users($path:String){users_v1(path:$path){...UserName roles{...RoleName}}}"
+        "fragment RoleName on Role_v1{name}"
+        "fragment UserName on User_v1{name}"
+    )
+
+
+def test_minify_document_is_canonical() -> None:
+    reformatted = "query Users( $path : String ) { users_v1( path : $path ) , { "
+    reformatted += "...UserName roles { ...RoleName } } }"
+    fragments = [
+        "fragment UserName on User_v1 { name }",
+        "fragment RoleName on Role_v1 { name }",
+    ]
+
+    assert minify_document(reformatted, fragments) == minify_document(
+        OPERATION, list(reversed(fragments))
+    )
@@ -0,0 +1,80 @@
+import importlib
+import sys
+from typing import TYPE_CHECKING
+
+from qenerate.core.package_index import PackageIndex
+from qenerate.core.plugin import GeneratedFile
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_package_index_imports_lazily(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    package = tmp_path / "lazy_package"
+    package.mkdir()
+    files = [
+        GeneratedFile(
+            file=package / "users.py",
+            content="class UsersQueryData: ...\n\ndef query() -> str:\n    return 'users'\n",
+            exports={"UsersQueryData": "UsersQueryData", "query_users": "query"},
+        ),
+        GeneratedFile(
+            file=package / "roles.py",
+            content="def query() -> str:\n    return 'roles'\n",
+            exports={"query_roles": "query", "Duplicate": "query"},
+        ),
+        GeneratedFile(
+            file=package / "other.py",
+            content="Duplicate = 1\n",
+            exports={"Duplicate": "Duplicate"},
+        ),
+        # Files without exports do not get an index
+        GeneratedFile(file=tmp_path / "standalone.py", content=""),
+    ]
+    for file in [*files, *PackageIndex.render(files)]:
+        file.save()
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_package", raising=False)
+    lazy_package = importlib.import_module("lazy_package")
+    assert "lazy_package.users" not in sys.modules
+
+    assert lazy_package.query_users() == "users"
+    assert "lazy_package.users" in sys.modules
+    assert "lazy_package.roles" not in sys.modules
+    assert lazy_package.query_roles() == "roles"
+
+    assert lazy_package.__all__ == ["UsersQueryData", "query_roles", "query_users"]
+    assert "UsersQueryData" in dir(lazy_package)
+    assert not hasattr(lazy_package, "Duplicate")
+    assert not (tmp_path / "__init__.py").exists()
+    for module in ("lazy_package", "lazy_package.users", "lazy_package.roles"):
+        monkeypatch.delitem(sys.modules, module)
+
+
+def test_package_index_skips_hand_written_packages(tmp_path: Path) -> None:
+    generated = tmp_path / "generated"
+    generated.mkdir()
+    (generated / "__init__.py").write_text(
+        PackageIndex.render([
+            GeneratedFile(file=generated / "a.py", content="", exports={"A": "A"})
+        ])[0].content
+    )
+    hand_written = tmp_path / "hand_written"
+    hand_written.mkdir()
+    (hand_written / "__init__.py").write_text("from .helpers import *\n")
+    files = [
+        GeneratedFile(file=generated / "b.py", content="", exports={"B": "B"}),
+        GeneratedFile(file=generated / "my-query.py", content="", exports={"C": "C"}),
+        GeneratedFile(file=hand_written / "d.py", content="", exports={"D": "D"}),
+    ]
+
+    [index] = PackageIndex.render(files)
+
+    assert index.file == generated / "__init__.py"
+    assert '"B": ("b", "B")' in index.content
+    assert '"C"' not in index.content
@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+from qenerate.core.persisted_queries import (
+    PersistedQuery,
+    PersistedQueryManifest,
+    query_hash,
+)
+from qenerate.core.preprocessor import GQLDefinitionType
+
+
+def test_query_hash() -> None:
+    body = "\nquery Users { users_v1 { name } }\n"
+    assert query_hash(body) == hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def test_manifest_is_sorted_by_name() -> None:
+    users = PersistedQuery(
+        name="Users", kind=GQLDefinitionType.QUERY, body="query Users { a }"
+    )
+    comment = PersistedQuery(
+        name="AddComment",
+        kind=GQLDefinitionType.MUTATION,
+        body="mutation AddComment { b }",
+    )
+
+    manifest = json.loads(PersistedQueryManifest.render([users, comment]))
+
+    assert manifest["format"] == "apollo-persisted-query-manifest"
+    assert manifest["version"] == 1
+    assert manifest["operations"] == [
+        {
+            "id": comment.hash,
+            "name": "AddComment",
+            "type": "mutation",
+            "body": "mutation AddComment { b }",
+        },
+        {
+            "id": users.hash,
+            "name": "Users",
+            "type": "query",
+            "body": "query Users { a }",
+        },
+    ]
@@ -1,19 +1,31 @@
+import pickle  # ruff: ignore[suspicious-pickle-import]
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
-from graphql import GraphQLError, GraphQLSchema, GraphQLSyntaxError
+from graphql import (
+    ASTValidationRule,
+    DocumentNode,
+    GraphQLError,
+    GraphQLSchema,
+    GraphQLSyntaxError,
+    parse,
+    print_ast,
+)
 
+from qenerate.core import preprocessor as preprocessor_module
 from qenerate.core.feature_flag_parser import FeatureFlags
 from qenerate.core.preprocessor import (
     AnonymousOperationError,
+    FragmentDependencyError,
+    FragmentGraph,
     GQLDefinition,
     GQLDefinitionType,
     Preprocessor,
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Sequence
 
 
 def normalize_definition(definition: str) -> str:
@@ -247,6 +259,38 @@ def test_preprocessor(file: Path, expected: Iterable[GQLDefinition]) -> None:
             ],
             GraphQLError,
         ),
+        (
+            # Fragment used within a nested fragment
+            [
+                "query Test { users_v1 { ... Outer } }",
+                "fragment Outer on User_v1 { roles { ... Inner } }",
+                "fragment Inner on Role_v1 { name }",
+            ],
+            None,
+        ),
+        (
+            # Duplicate fragment names
+            [
+                "fragment MyFragment on User_v1 { name }",
+                "fragment MyFragment on User_v1 { org_username }",
+            ],
+            GraphQLError,
+        ),
+        (
+            # Duplicate operation names
+            [
+                "query Test { users_v1 { name } }",
+                "query Test { roles_v1 { name } }",
+            ],
+            GraphQLError,
+        ),
+        (
+            # Invalid field in a fragment which is not used by any query
+            [
+                "fragment MyFragment on User_v1 { does_not_exist }",
+            ],
+            GraphQLError,
+        ),
         (
             # Anonymous query
             [
@@ -284,3 +328,143 @@ def test_preprocessor_exception(
         preprocessor.validate(
             definitions=definition_objects, schema=app_interface_schema
         )
+
+
+def test_preprocessor_validation_cache(
+    app_interface_schema: GraphQLSchema, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def definition(text: str) -> GQLDefinition:
+        return GQLDefinition(
+            definition=text,
+            feature_flags=FeatureFlags(plugin="fake", gql_scalar_mappings={}),
+            fragment_dependencies=set(),
+            kind=GQLDefinitionType.QUERY,
+            source_file=Path("/tmp"),  # ruff: ignore[hardcoded-temp-file]
+            name="",
+        )
+
+    validated: list[str] = []
+    validate = preprocessor_module.validate
+
+    def recording_validate(
+        schema: GraphQLSchema,
+        document_ast: DocumentNode,
+        rules: Sequence[type[ASTValidationRule]],
+    ) -> list[GraphQLError]:
+        validated.append(print_ast(document_ast.definitions[0]))
+        return validate(schema, document_ast, rules)
+
+    monkeypatch.setattr(preprocessor_module, "validate", recording_validate)
+
+    query = definition("query Test { users_v1 { ... MyFragment } }")
+    other = definition("query Other { roles_v1 { name } }")
+    fragment = definition("fragment MyFragment on User_v1 { name }")
+    preprocessor = Preprocessor()
+
+    preprocessor.validate([query, other, fragment], schema=app_interface_schema)
+    assert len(validated) == len([query, other, fragment])
+
+    # Nothing changed
+    validated.clear()
+    preprocessor.validate([query, other, fragment], schema=app_interface_schema)
+    assert not validated
+
+    # Only the fragment and the query using it are validated again
+    fragment.definition = "fragment MyFragment on User_v1 { org_username }"
+    preprocessor.validate([query, other, fragment], schema=app_interface_schema)
+    assert [v.split()[1] for v in validated] == ["Test", "MyFragment"]
+
+
+def test_preprocessor_parses_files_once(
+    app_interface_schema: GraphQLSchema, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    file = Path("tests/core/preprocessor/queries/query_with_fragments.gql")
+    definitions = Preprocessor().process_file(file)
+    assert all(d.document for d in definitions)
+    assert [print_ast(d.document_ast()) for d in definitions] == [
+        print_ast(parse(d.definition)) for d in definitions
+    ]
+
+    def fail(*_: object) -> None:
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(preprocessor_module, "parse", fail)
+    with pytest.raises(GraphQLError, match="Cannot query field"):
+        # The test file uses types which are not in the schema
+        Preprocessor().validate(definitions, schema=app_interface_schema)
+
+    # Documents are not pickled along, workers parse on demand
+    monkeypatch.undo()
+    restored = pickle.loads(pickle.dumps(definitions[0]))  # ruff: ignore[suspicious-pickle-usage]
+    assert restored.document is None
+    assert restored == definitions[0]
+    assert print_ast(restored.document_ast()) == print_ast(
+        definitions[0].document_ast()
+    )
+
+
+def _fragment(name: str, *dependencies: str) -> GQLDefinition:
+    return GQLDefinition(
+        definition=f"fragment {name} on User_v1 {{ name }}",
+        feature_flags=FeatureFlags(plugin="fake", gql_scalar_mappings={}),
+        fragment_dependencies=set(dependencies),
+        kind=GQLDefinitionType.FRAGMENT,
+        source_file=Path(f"{name}.gql"),
+        name=name,
+    )
+
+
+def test_fragment_graph_layers() -> None:
+    graph = FragmentGraph([
+        _fragment("Top", "Left", "Right"),
+        _fragment("Left", "Base"),
+        _fragment("Right", "Base"),
+        _fragment("Base"),
+        _fragment("Other"),
+    ])
+    assert [[d.name for d in layer] for layer in graph.layers()] == [
+        ["Base", "Other"],
+        ["Left", "Right"],
+        ["Top"],
+    ]
+
+
+def test_fragment_graph_closure() -> None:
+    base = _fragment("Base")
+    left = _fragment("Left", "Base")
+    right = _fragment("Right", "Base")
+    top = _fragment("Top", "Right", "Left")
+    graph = FragmentGraph([top, left, right, base])
+
+    assert graph.closure(base) == []
+    assert graph.closure(top) == ["Base", "Left", "Right"]
+    # Closures are shared between all definitions spreading a fragment
+    assert graph.closure(_fragment("Query", "Top")) == ["Base", "Left", "Right", "Top"]
+    assert graph.closure(right) == ["Base"]
+
+
+@pytest.mark.parametrize(
+    ("fragments", "message"),
+    [
+        (
+            [_fragment("A", "B"), _fragment("B", "C"), _fragment("C", "B")],
+            "Cyclic fragment dependency detected: B -> C -> B",
+        ),
+        (
+            [_fragment("A", "A")],
+            "Cyclic fragment dependency detected: A -> A",
+        ),
+        (
+            [_fragment("A", "Missing")],
+            "A depends on unknown fragment Missing",
+        ),
+    ],
+)
+def test_fragment_graph_errors(fragments: list[GQLDefinition], message: str) -> None:
+    for resolve in (
+        lambda graph: graph.layers(),
+        lambda graph: graph.closure(fragments[0]),
+    ):
+        with pytest.raises(FragmentDependencyError) as error:
+            resolve(FragmentGraph(fragments))
+        assert str(error.value) == message
@@ -0,0 +1,96 @@
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from qenerate.cli import run
+from qenerate.core.code_command import CodeCommand
+from qenerate.core.preprocessor import Preprocessor
+from qenerate.core.profiler import (
+    STEP_PARSE,
+    STEP_RENDER,
+    STEP_TYPE_WALK,
+    STEP_WRITE,
+    Profiler,
+    active_profiler,
+    profiling,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+INTROSPECTION = "tests/generator/introspection-app-interface.json"
+
+
+def _write_definitions(directory: Path) -> None:
+    (directory / "fragment.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "fragment UserName on User_v1 { name org_username }",
+        encoding="utf-8",
+    )
+    (directory / "query.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\n"
+        "query Users($path: String) { users_v1(path: $path) { ... UserName } }",
+        encoding="utf-8",
+    )
+
+
+def test_profile_code_generation(tmp_path: Path) -> None:
+    _write_definitions(tmp_path)
+    profiler = Profiler()
+    with profiling(profiler):
+        assert active_profiler() is profiler
+        CodeCommand(preprocessor=Preprocessor()).generate_code(
+            introspection_file_path=INTROSPECTION, directory=str(tmp_path)
+        )
+    assert not active_profiler().enabled
+
+    assert set(profiler.phases) == {
+        "introspection_load",
+        "schema_build",
+        "preprocess",
+        "validate",
+        "render",
+        "write",
+    }
+    assert set(profiler.definitions) == {
+        f"{tmp_path / 'fragment.gql'}::UserName",
+        f"{tmp_path / 'query.gql'}::Users",
+    }
+    query = profiler.definitions[f"{tmp_path / 'query.gql'}::Users"]
+    for step in (STEP_PARSE, STEP_TYPE_WALK, STEP_RENDER, STEP_WRITE):
+        assert query.steps[step] > 0
+        assert query.cpu[step] >= 0
+    assert query.cpu_total > 0
+    assert query.output_size == len(
+        (tmp_path / "query.py").read_text(encoding="utf-8").encode()
+    )
+    assert query.classes > 0
+
+    report = profiler.report(top=1)
+    assert "schema_build" in report
+    # Only the slowest definition is listed
+    assert ("query.gql::Users" in report) != ("fragment.gql::UserName" in report)
+    assert set(profiler.to_dict()) == {"phases", "definitions"}
+
+
+def test_disabled_profiler_records_nothing(tmp_path: Path) -> None:
+    _write_definitions(tmp_path)
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=INTROSPECTION, directory=str(tmp_path)
+    )
+    assert not active_profiler().phases
+    assert not active_profiler().definitions
+
+
+def test_profile_requires_a_single_job(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["qenerate", "code", "-i", INTROSPECTION, "--profile", "-j", "2", "."],
+    )
+    with pytest.raises(SystemExit):
+        run()
+    assert "--profile cannot be combined with --jobs" in capsys.readouterr().err
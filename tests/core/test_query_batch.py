@@ -0,0 +1,72 @@
+from typing import TYPE_CHECKING
+
+import pytest
+from graphql import parse, validate
+
+from qenerate.core.query_batch import BATCH_INDEX, BatchTemplate, QueryBatchError
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+FRAGMENT = """
+fragment VaultSecret on VaultSecret_v1 {
+  path
+  field
+}
+"""
+
+
+def _assemble(template: BatchTemplate, indexes: list[str], fragments: str) -> str:
+    variables = ", ".join(template.variables.replace(BATCH_INDEX, i) for i in indexes)
+    selections = "\n".join(template.selections.replace(BATCH_INDEX, i) for i in indexes)
+    return f"query {template.name}({variables}) {{\n{selections}\n}}\n{fragments}"
+
+
+def test_render_batch_template(app_interface_schema: GraphQLSchema) -> None:
+    template = BatchTemplate.render(
+        operation="""
+        query Clusters($name: String) {
+          clusters: clusters_v1(name: $name) {
+            name
+            automationToken { ...VaultSecret }
+          }
+          namespaces_v1 { name }
+        }
+        """,
+        fragments=[FRAGMENT],
+    )
+
+    assert template.name == "ClustersBatch"
+    assert template.variables == f"$name_{BATCH_INDEX}: String"
+    assert template.selections.startswith(
+        f"b_{BATCH_INDEX}_clusters: clusters_v1(name: $name_{BATCH_INDEX}) {{"
+    )
+    assert f"b_{BATCH_INDEX}_namespaces_v1: namespaces_v1 {{" in template.selections
+
+    document = _assemble(template, indexes=["0", "1"], fragments=FRAGMENT)
+    assert not validate(app_interface_schema, parse(document))
+    assert "$name_1: String" in document
+
+
+@pytest.mark.parametrize(
+    ("operation", "fragments", "message"),
+    [
+        ("mutation Noop { noop }", [], "Only named queries can be batched"),
+        ("{ clusters_v1 { name } }", [], "Only named queries can be batched"),
+        (
+            "query Secrets { ...Root }",
+            ["fragment Root on Query { vault_secrets_v1 { path } }"],
+            "Secrets cannot be batched, as it spreads fragments at the top-level",
+        ),
+        (
+            "query Clusters { clusters_v1 { ...Named } }",
+            ["fragment Named on Cluster_v1 { peering(name: $name) { name } }"],
+            "Clusters cannot be batched, as its fragments use variables",
+        ),
+    ],
+)
+def test_render_batch_template_errors(
+    operation: str, fragments: list[str], message: str
+) -> None:
+    with pytest.raises(QueryBatchError, match=message):
+        BatchTemplate.render(operation=operation, fragments=fragments)
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+from typing import cast
+
+from graphql import IntrospectionQuery, build_client_schema, parse, validate
+
+from qenerate.core.schema_cache import SchemaCache, ValidationCache
+
+INTROSPECTION = Path("tests/generator/introspection-app-interface.json")
+
+
+def test_store_and_load(tmp_path: Path) -> None:
+    content = INTROSPECTION.read_bytes()
+    schema = build_client_schema(
+        cast("IntrospectionQuery", json.loads(content)["data"])
+    )
+    cache = SchemaCache(tmp_path)
+    assert cache.load(content) is None
+
+    cache.store(content, schema)
+    loaded = cache.load(content)
+
+    assert loaded is not None
+    assert set(loaded.type_map) == set(schema.type_map)
+    assert not validate(loaded, parse("query Test { users_v1 { name } }"))
+
+
+def test_key_depends_on_content(tmp_path: Path) -> None:
+    content = INTROSPECTION.read_bytes()
+    assert SchemaCache.key(content) != SchemaCache.key(content + b" ")
+    assert SchemaCache(tmp_path).load(content + b" ") is None
+
+
+def test_corrupt_entry(tmp_path: Path) -> None:
+    content = INTROSPECTION.read_bytes()
+    cache = SchemaCache(tmp_path)
+    path = tmp_path / "schemas" / f"{SchemaCache.key(content)}.pickle"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"not a pickle")
+    assert cache.load(content) is None
+
+
+def test_validation_cache(tmp_path: Path) -> None:
+    content = INTROSPECTION.read_bytes()
+    cache = ValidationCache(tmp_path)
+    assert cache.load(content) == set()
+
+    cache.store(content, {"b", "a"})
+    assert ValidationCache(tmp_path).load(content) == {"a", "b"}
+    # Hashes only hold for the schema they were validated against
+    assert cache.load(content + b" ") == set()
+
+    (tmp_path / "validated" / f"{SchemaCache.key(content)}.json").write_text("{")
+    assert cache.load(content) == set()
@@ -0,0 +1,120 @@
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from qenerate.core.client_command import ClientCommand
+from qenerate.core.serve_command import ServeCommand
+
+INTROSPECTION = "tests/generator/introspection-app-interface.json"
+
+QUERY = """
+# qenerate: plugin=pydantic_v2
+query Roles {
+    roles_v1 {
+        name
+    }
+}
+"""
+
+
+def _request(command: str, directory: Path) -> dict[str, object]:
+    return {
+        "command": command,
+        "cwd": str(Path.cwd()),
+        "introspection": INTROSPECTION,
+        "directory": str(directory),
+    }
+
+
+def test_handle_request(tmp_path: Path) -> None:
+    (tmp_path / "query.gql").write_text(QUERY, encoding="utf-8")
+    serve_command = ServeCommand()
+
+    assert serve_command.handle_request(_request("check", tmp_path)) == {
+        "ok": True,
+        "stale": [str(tmp_path / "query.py")],
+    }
+    assert not (tmp_path / "query.py").exists()
+
+    assert serve_command.handle_request(_request("generate", tmp_path)) == {
+        "ok": True,
+        "written": 1,
+        "skipped": 0,
+    }
+    assert serve_command.handle_request(_request("check", tmp_path)) == {
+        "ok": True,
+        "stale": [],
+    }
+
+    # Deleted outputs are restored although no .gql file changed
+    (tmp_path / "query.py").unlink()
+    assert serve_command.handle_request(_request("generate", tmp_path)) == {
+        "ok": True,
+        "written": 1,
+        "skipped": 0,
+    }
+
+
+def test_handle_request_reports_errors(tmp_path: Path) -> None:
+    serve_command = ServeCommand()
+
+    response = serve_command.handle_request(_request("unknown", tmp_path))
+    assert not response["ok"]
+    assert "Unknown command" in response["error"]
+
+    (tmp_path / "query.gql").write_text(
+        QUERY.replace("name", "does_not_exist"), encoding="utf-8"
+    )
+    response = serve_command.handle_request(_request("generate", tmp_path))
+    assert not response["ok"]
+
+
+def test_serve_over_socket(tmp_path: Path) -> None:
+    (tmp_path / "query.gql").write_text(QUERY, encoding="utf-8")
+    # Unix socket paths are limited to ~100 characters
+    with tempfile.TemporaryDirectory() as socket_dir:
+        socket_path = str(Path(socket_dir) / "qenerate.sock")
+        serve_command = ServeCommand()
+        ready = threading.Event()
+        server = threading.Thread(
+            target=serve_command.serve,
+            kwargs={"socket_path": socket_path, "ready": ready},
+        )
+        server.start()
+        ready.wait(timeout=10)
+
+        assert ClientCommand.run(
+            socket_path=socket_path,
+            command="generate",
+            introspection_file_path=INTROSPECTION,
+            directory=str(tmp_path),
+        )
+        assert ClientCommand.run(
+            socket_path=socket_path,
+            command="check",
+            introspection_file_path=INTROSPECTION,
+            directory=str(tmp_path),
+        )
+        assert (tmp_path / "query.py").exists()
+
+        assert ClientCommand.request(socket_path, {"command": "shutdown"}) == {
+            "ok": True
+        }
+        server.join(timeout=10)
+        assert not server.is_alive()
+        assert not Path(socket_path).exists()
+
+
+def test_client_does_not_import_generator() -> None:
+    # The thin client must stay cheap to start
+    code = (
+        "import sys, qenerate.cli, qenerate.core.client_command; "
+        "print(sorted(m for m in ('graphql', 'qenerate.core.code_command') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run(  # ruff: ignore[subprocess-without-shell-equals-true]
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,102 @@
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+from graphql import GraphQLError
+
+from qenerate.core.preprocessor import Preprocessor
+from qenerate.core.watch_command import WatchCommand
+from qenerate.core.writer import WriteReport
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+INTROSPECTION = "tests/generator/introspection-app-interface.json"
+
+FRAGMENT = """
+# qenerate: plugin=pydantic_v2
+fragment UserName on User_v1 {
+    name
+}
+"""
+
+QUERY = """
+# qenerate: plugin=pydantic_v2
+query Users {
+    users_v1 {
+        ... UserName
+    }
+}
+"""
+
+OTHER_QUERY = """
+# qenerate: plugin=pydantic_v2
+query Roles {
+    roles_v1 {
+        name
+    }
+}
+"""
+
+
+def test_poll_regenerates_affected_definitions(tmp_path: Path) -> None:
+    (tmp_path / "fragment.gql").write_text(FRAGMENT, encoding="utf-8")
+    (tmp_path / "query.gql").write_text(QUERY, encoding="utf-8")
+    (tmp_path / "other.gql").write_text(OTHER_QUERY, encoding="utf-8")
+    watch_command = WatchCommand(
+        preprocessor=Preprocessor(),
+        introspection_file_path=INTROSPECTION,
+        directory=str(tmp_path),
+    )
+
+    assert watch_command.poll() == WriteReport(written=3, skipped=0)
+    assert watch_command.poll() is None
+
+    os.utime(tmp_path / "other.py", ns=(0, 0))
+    (tmp_path / "fragment.gql").write_text(
+        FRAGMENT.replace("name", "name\n    org_username"), encoding="utf-8"
+    )
+
+    # The fragment and the query using it are generated again
+    assert watch_command.poll() == WriteReport(written=2, skipped=0)
+    assert "org_username" in (tmp_path / "fragment.py").read_text(encoding="utf-8")
+    assert (tmp_path / "other.py").stat().st_mtime_ns == 0
+
+
+def test_poll_survives_syntax_errors(tmp_path: Path) -> None:
+    (tmp_path / "other.gql").write_text(OTHER_QUERY, encoding="utf-8")
+    watch_command = WatchCommand(
+        preprocessor=Preprocessor(),
+        introspection_file_path=INTROSPECTION,
+        directory=str(tmp_path),
+    )
+    assert watch_command.poll() == WriteReport(written=1, skipped=0)
+
+    (tmp_path / "broken.gql").write_text(
+        "# qenerate: plugin=pydantic_v2\nquery {", encoding="utf-8"
+    )
+    assert watch_command.poll() == WriteReport(written=0, skipped=0)
+
+    (tmp_path / "broken.gql").write_text(
+        OTHER_QUERY.replace("Roles", "MoreRoles"), encoding="utf-8"
+    )
+    assert watch_command.poll() == WriteReport(written=1, skipped=0)
+    assert (tmp_path / "broken.py").exists()
+
+
+def test_poll_retries_after_validation_errors(tmp_path: Path) -> None:
+    (tmp_path / "query.gql").write_text(QUERY, encoding="utf-8")
+    watch_command = WatchCommand(
+        preprocessor=Preprocessor(),
+        introspection_file_path=INTROSPECTION,
+        directory=str(tmp_path),
+    )
+
+    # The fragment is missing, every poll fails until it is fixed
+    for _ in range(2):
+        with pytest.raises(GraphQLError, match="UserName"):
+            watch_command.poll()
+
+    (tmp_path / "fragment.gql").write_text(FRAGMENT, encoding="utf-8")
+    assert watch_command.poll() == WriteReport(written=2, skipped=0)
+    assert watch_command.poll() is None
@@ -0,0 +1,56 @@
+import os
+from typing import TYPE_CHECKING
+
+from qenerate.core.plugin import GeneratedFile
+from qenerate.core.writer import OutputWriter, WriteReport
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_save_skips_identical_content(tmp_path: Path) -> None:
+    file = GeneratedFile(file=tmp_path / "query.py", content="content")
+    assert file.save()
+    os.utime(file.file, ns=(0, 0))
+
+    assert not file.save()
+    assert file.file.stat().st_mtime_ns == 0
+
+    file.content = "changed"
+    assert file.save()
+    assert file.file.read_text(encoding="utf-8") == "changed"
+    assert file.file.stat().st_mtime_ns != 0
+
+
+def test_save_keeps_mode_and_leaves_no_temp_files(tmp_path: Path) -> None:
+    path = tmp_path / "query.py"
+    path.write_text("old", encoding="utf-8")
+    path.chmod(0o640)
+
+    GeneratedFile(file=path, content="new").save()
+
+    assert path.stat().st_mode & 0o777 == 0o640  # ruff: ignore[magic-value-comparison]
+    assert [p.name for p in tmp_path.iterdir()] == ["query.py"]
+
+
+def test_writer_report(tmp_path: Path) -> None:
+    (tmp_path / "unchanged.py").write_text("same", encoding="utf-8")
+    files = [
+        GeneratedFile(file=tmp_path / "unchanged.py", content="same"),
+        GeneratedFile(file=tmp_path / "new.py", content="new"),
+    ]
+
+    assert OutputWriter().write(files) == WriteReport(written=1, skipped=1)
+
+
+def test_writer_thread_pool(tmp_path: Path) -> None:
+    files = [
+        GeneratedFile(file=tmp_path / f"query_{i}.py", content=str(i))
+        for i in range(10)
+    ]
+    writer = OutputWriter(max_workers=4, parallel_threshold=2)
+
+    assert writer.write(files) == WriteReport(written=10, skipped=0)
+    assert writer.write(files) == WriteReport(written=0, skipped=10)
+    for i in range(10):
+        assert (tmp_path / f"query_{i}.py").read_text(encoding="utf-8") == str(i)
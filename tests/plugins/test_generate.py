@@ -3,18 +3,39 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
+from graphql import ExecutableDefinitionNode, parse
 
 from qenerate.core.code_command import plugins
 from qenerate.core.feature_flag_parser import FeatureFlags, NamingCollisionStrategy
 from qenerate.core.plugin import GeneratedFile
-from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.core.preprocessor import (
+    FragmentGraph,
+    GQLDefinition,
+    GQLDefinitionType,
+)
+from qenerate.plugins.pydantic import plugin as plugin_module
+from qenerate.plugins.pydantic.plugin import PydanticBase
+from qenerate.plugins.pydantic.typed_ast import Emitter
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Mapping
+    from collections.abc import Callable, Iterable, Mapping
 
     from graphql import GraphQLSchema
 
 
+def _definition_name(content: str) -> str:
+    # Fragment dependencies refer to the GraphQL names of fragments
+    node = parse(content).definitions[0]
+    assert isinstance(node, ExecutableDefinitionNode)
+    assert node.name
+    return node.name.value
+
+
+# Definitions a plugin rejects, e.g., msgspec structs cannot inherit from
+# several fragments
+UNSUPPORTED = {"msgspec": {"ocp_query_multiple"}}
+
+
 class Schema(Enum):
     APP_INTERFACE = "app-interface"
     APP_INTERFACE_2023_03 = "app-interface_2023_03"
@@ -166,6 +187,8 @@ def test_rendering(
     operation_definitions = []
     for source_file in Path(f"tests/generator/definitions/{case}").glob("**/*"):
         file_id = source_file.with_suffix("").name
+        if file_id in UNSUPPORTED.get(plugin_name, set()):
+            continue
         content = source_file.read_text()
         kind = type_map[file_id]
         collision_strategy = collision_strategies.get(
@@ -181,7 +204,7 @@ def test_rendering(
             definition=content,
             fragment_dependencies=dep_graph.get(file_id, set()),
             kind=kind,
-            name=file_id,
+            name=_definition_name(content),
         )
         if kind == GQLDefinitionType.FRAGMENT:
             fragment_definitions.append(definition)
@@ -225,3 +248,174 @@ def test_rendering(
         assert generated[i].content == expected[i].content
 
     assert generated == expected
+
+
+@pytest.mark.parametrize("plugin_name", plugins.keys())
+def test_parallel_rendering(
+    app_interface_schema: GraphQLSchema, plugin_name: str
+) -> None:
+    """Rendering with a process pool yields the same output in the same order."""
+    dep_graph = {
+        "ocp_query": {"VaultSecret"},
+        "ocp_query_partial": {"VaultSecretPartial"},
+        "ocp_query_multiple": {"VaultSecretPartial", "VaultSecretVersion"},
+    }
+    fragment_definitions = []
+    operation_definitions = []
+    for source_file in sorted(
+        Path("tests/generator/definitions/simple_queries_with_fragments").glob("*")
+    ):
+        file_id = source_file.with_suffix("").name
+        if file_id in UNSUPPORTED.get(plugin_name, set()):
+            continue
+        kind = (
+            GQLDefinitionType.FRAGMENT
+            if file_id.endswith("_fragment")
+            else GQLDefinitionType.QUERY
+        )
+        definition = GQLDefinition(
+            feature_flags=FeatureFlags(plugin=plugin_name, gql_scalar_mappings={}),
+            source_file=source_file,
+            definition=source_file.read_text(),
+            fragment_dependencies=dep_graph.get(file_id, set()),
+            kind=kind,
+            name=_definition_name(source_file.read_text()),
+        )
+        if kind == GQLDefinitionType.FRAGMENT:
+            fragment_definitions.append(definition)
+        else:
+            operation_definitions.append(definition)
+
+    plugin = plugins[plugin_name]
+
+    def render(jobs: int) -> list[GeneratedFile]:
+        fragments = plugin.generate_fragments(
+            definitions=fragment_definitions, schema=app_interface_schema, jobs=jobs
+        )
+        operations = plugin.generate_operations(
+            definitions=operation_definitions,
+            fragments=fragments,
+            schema=app_interface_schema,
+            jobs=jobs,
+        )
+        return [*fragments, *operations]
+
+    sequential = render(jobs=1)
+    parallel = render(jobs=2)
+    assert [f.file for f in parallel] == [f.file for f in sequential]
+    assert [f.content for f in parallel] == [f.content for f in sequential]
+
+
+@pytest.mark.parametrize("plugin_name", plugins.keys())
+def test_emit_operation_to_file(
+    app_interface_schema: GraphQLSchema, plugin_name: str, tmp_path: Path
+) -> None:
+    """Streaming a module to a file handle yields the rendered content."""
+    source_file = Path("tests/generator/definitions/complex_queries/saas_humongous.gql")
+    content = source_file.read_text(encoding="utf-8")
+    definition = GQLDefinition(
+        feature_flags=FeatureFlags(plugin=plugin_name, gql_scalar_mappings={}),
+        source_file=source_file,
+        definition=content,
+        fragment_dependencies=set(),
+        kind=GQLDefinitionType.QUERY,
+        name=_definition_name(content),
+    )
+    plugin = plugins[plugin_name]
+    assert isinstance(plugin, PydanticBase)
+
+    output = tmp_path / "saas_humongous.py"
+    with output.open("w", encoding="utf-8") as f:
+        plugin.emit_operation(
+            definition=definition,
+            schema=app_interface_schema,
+            fragment_map={},
+            emitter=Emitter(f),
+        )
+    rendered = plugin.render_operation(
+        definition=definition, schema=app_interface_schema, fragment_map={}
+    )
+    assert output.read_text(encoding="utf-8") == rendered.content
+
+
+LEAF_FRAGMENT = "fragment Leaf on User_v1 { name }"
+USER_FRAGMENT = "fragment User on User_v1 { ... Leaf }"
+
+
+def _closure_definition(
+    content: str, kind: GQLDefinitionType, dependencies: set[str]
+) -> GQLDefinition:
+    return GQLDefinition(
+        feature_flags=FeatureFlags(plugin="pydantic_v2", gql_scalar_mappings={}),
+        source_file=Path(f"defs/{_definition_name(content)}.gql"),
+        definition=content,
+        fragment_dependencies=dependencies,
+        kind=kind,
+        name=_definition_name(content),
+    )
+
+
+def _closure_definitions() -> list[GQLDefinition]:
+    """Fragment Leaf, fragment User spreading Leaf and queries spreading User."""
+    return [
+        _closure_definition(LEAF_FRAGMENT, GQLDefinitionType.FRAGMENT, set()),
+        _closure_definition(USER_FRAGMENT, GQLDefinitionType.FRAGMENT, {"Leaf"}),
+        *(
+            _closure_definition(
+                f"query Q{i} {{ users_v1 {{ ... User }} }}",
+                GQLDefinitionType.QUERY,
+                {"User"},
+            )
+            for i in range(3)
+        ),
+    ]
+
+
+def _count_fragment_graphs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> list[plugin_module.FragmentGraph]:
+    graphs: list[plugin_module.FragmentGraph] = []
+
+    def fragment_graph(
+        fragments: Iterable[GQLDefinition],
+    ) -> plugin_module.FragmentGraph:
+        graphs.append(FragmentGraph(fragments))
+        return graphs[-1]
+
+    monkeypatch.setattr(plugin_module, "FragmentGraph", fragment_graph)
+    return graphs
+
+
+def test_persisted_queries_resolve_fragments_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    graphs = _count_fragment_graphs(monkeypatch)
+    queries = plugins["pydantic_v2"].persisted_queries(_closure_definitions())
+
+    assert len(graphs) == 1
+    assert [q.name for q in queries] == ["Q0", "Q1", "Q2"]
+    assert all(LEAF_FRAGMENT in q.body and USER_FRAGMENT in q.body for q in queries)
+
+
+def test_generate_operations_resolve_fragments_once(
+    app_interface_schema: GraphQLSchema, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    definitions = _closure_definitions()
+    plugin = plugins["pydantic_v2"]
+    fragments = plugin.generate_fragments(
+        [d for d in definitions if d.kind == GQLDefinitionType.FRAGMENT],
+        app_interface_schema,
+    )
+    graphs = _count_fragment_graphs(monkeypatch)
+
+    operations = plugin.generate_operations(
+        [d for d in definitions if d.kind == GQLDefinitionType.QUERY],
+        app_interface_schema,
+        fragments,
+    )
+
+    assert len(graphs) == 1
+    assert [o.file.stem for o in operations] == ["Q0", "Q1", "Q2"]
+    assert all(
+        LEAF_FRAGMENT in o.content and USER_FRAGMENT in o.content for o in operations
+    )
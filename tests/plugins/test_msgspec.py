@@ -0,0 +1,153 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from graphql import ExecutableDefinitionNode, parse
+
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.plugins.msgspec.plugin import MsgspecPlugin, MsgspecPluginError
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+
+def _definition(
+    content: str, kind: GQLDefinitionType, dependencies: set[str] | None = None
+) -> GQLDefinition:
+    node = parse(content).definitions[0]
+    assert isinstance(node, ExecutableDefinitionNode)
+    assert node.name
+    return GQLDefinition(
+        feature_flags=FeatureFlags(plugin="msgspec", gql_scalar_mappings={}),
+        source_file=Path(f"defs/{node.name.value}.gql"),
+        definition=content,
+        fragment_dependencies=dependencies or set(),
+        kind=kind,
+        name=node.name.value,
+    )
+
+
+def test_typename_tags_inline_fragments(app_interface_schema: GraphQLSchema) -> None:
+    definition = _definition(
+        """
+        query Clusters {
+          clusters_v1 {
+            name
+            auth {
+              __typename
+              ... on ClusterAuthGithubOrg_v1 { org }
+            }
+            peering { connections { ... on ClusterPeeringConnectionAccount_v1 { name } } }
+          }
+        }
+        """,
+        GQLDefinitionType.QUERY,
+    )
+    [generated] = MsgspecPlugin().generate_operations(
+        definitions=[definition], schema=app_interface_schema, fragments=[]
+    )
+
+    # Only the selection lacking the tag selects __typename in addition
+    assert generated.content.count("__typename\n") == 1
+    assert "connections { __typename ... on" in generated.content
+    # The tag is no field of the tagged structs
+    assert "typename:" not in generated.content
+    assert (
+        "class ClusterAuthGithubOrgV1(ClusterAuthV1, "
+        'tag_field="__typename", tag="ClusterAuthGithubOrg_v1"):\n    org: str'
+    ) in generated.content
+    # Types without inline fragment are tagged on subclasses of the selection
+    assert (
+        'class ClusterAuthV1_ClusterAuthOIDCV1(ClusterAuthV1, tag_field="__typename", '
+        'tag="ClusterAuthOIDC_v1"):\n    ...'
+    ) in generated.content
+    assert (
+        "auth: Optional[Union[ClusterAuthGithubOrgV1, "
+        "ClusterAuthV1_ClusterAuthGithubOrgTeamV1, ClusterAuthV1_ClusterAuthOIDCV1]]"
+    ) in generated.content
+
+
+def test_several_fragment_spreads_are_rejected(
+    app_interface_schema: GraphQLSchema,
+) -> None:
+    plugin = MsgspecPlugin()
+    fragments = plugin.generate_fragments(
+        definitions=[
+            _definition(
+                "fragment SecretPath on VaultSecret_v1 { path }",
+                GQLDefinitionType.FRAGMENT,
+            ),
+            _definition(
+                "fragment SecretVersion on VaultSecret_v1 { version }",
+                GQLDefinitionType.FRAGMENT,
+            ),
+        ],
+        schema=app_interface_schema,
+    )
+    query = _definition(
+        """
+        query Clusters {
+          clusters_v1 { automationToken { ... SecretPath ... SecretVersion } }
+        }
+        """,
+        GQLDefinitionType.QUERY,
+        dependencies={"SecretPath", "SecretVersion"},
+    )
+
+    with pytest.raises(MsgspecPluginError, match="SecretPath, SecretVersion"):
+        plugin.generate_operations(
+            definitions=[query], schema=app_interface_schema, fragments=fragments
+        )
+
+
+def test_minified_definition_keeps_typename(
+    app_interface_schema: GraphQLSchema,
+) -> None:
+    definition = _definition(
+        """
+        query Clusters {
+          clusters_v1 { auth { ... on ClusterAuthGithubOrg_v1 { org } } }
+        }
+        """,
+        GQLDefinitionType.QUERY,
+    )
+    definition.feature_flags.minify_definition = True
+    [generated] = MsgspecPlugin().generate_operations(
+        definitions=[definition], schema=app_interface_schema, fragments=[]
+    )
+
+    assert (
+        'DEFINITION = """query Clusters{clusters_v1{auth{__typename '
+        '...on ClusterAuthGithubOrg_v1{org}}}}"""'
+    ) in generated.content
+
+
+def test_decode_response_body(app_interface_schema: GraphQLSchema) -> None:
+    pytest.importorskip("msgspec")
+    definition = _definition(
+        "query Clusters { clusters_v1 { name } }", GQLDefinitionType.QUERY
+    )
+    definition.feature_flags.query_iter = True
+    [generated] = MsgspecPlugin().generate_operations(
+        definitions=[definition], schema=app_interface_schema, fragments=[]
+    )
+    module: dict[str, Any] = {}
+    exec(  # ruff: ignore[exec-builtin]
+        compile(generated.content, str(generated.file), "exec", dont_inherit=True),
+        module,
+    )
+    body = (
+        b'{"data": {"clusters_v1": [{"name": "a"}, {"name": "b"}]}, "extensions": {}}'
+    )
+
+    data = module["query"](lambda *_, **__: body)
+    assert [cluster.name for cluster in data.clusters_v1] == ["a", "b"]
+    items = module["iter_clusters_v1"](lambda *_, **__: body)
+    assert [cluster.name for cluster in items] == ["a", "b"]
+
+    failed = b'{"data": null, "errors": [{"message": "boom"}]}'
+    with pytest.raises(RuntimeError, match="boom"):
+        module["query"](lambda *_, **__: failed)
+    with pytest.raises(RuntimeError, match="boom"):
+        list(module["iter_clusters_v1"](lambda *_, **__: failed))
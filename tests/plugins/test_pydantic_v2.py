@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.plugins.pydantic.plugin import PydanticV2Plugin
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+
+def test_query_json_validates_response_body(
+    app_interface_schema: GraphQLSchema,
+) -> None:
+    pytest.importorskip("pydantic", minversion="2")
+    query = GQLDefinition(
+        feature_flags=FeatureFlags(plugin="pydantic_v2", gql_scalar_mappings={}),
+        source_file=Path("defs/clusters.gql"),
+        definition="query Clusters { clusters_v1 { name } }",
+        fragment_dependencies=set(),
+        kind=GQLDefinitionType.QUERY,
+        name="Clusters",
+    )
+    [generated] = PydanticV2Plugin().generate_operations(
+        definitions=[query], schema=app_interface_schema, fragments=[]
+    )
+    module: dict[str, Any] = {}
+    exec(  # ruff: ignore[exec-builtin]
+        compile(generated.content, str(generated.file), "exec", dont_inherit=True),
+        module,
+    )
+
+    data = module["query_json"](
+        lambda *_, **__: b'{"data": {"clusters_v1": [{"name": "a"}]}, "extensions": {}}'
+    )
+    assert [cluster.name for cluster in data.clusters_v1] == ["a"]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        module["query_json"](
+            lambda *_, **__: '{"data": null, "errors": [{"message": "boom"}]}'
+        )
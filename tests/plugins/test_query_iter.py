@@ -0,0 +1,114 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.plugins.msgspec.plugin import MsgspecPlugin
+from qenerate.plugins.pydantic.plugin import (
+    INDENT,
+    PydanticV1Plugin,
+    PydanticV2Plugin,
+)
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+    from qenerate.plugins.pydantic.plugin import PydanticBase
+
+QUERY = """
+query Clusters {
+  clusters_v1 {
+    name
+    auth { service ... on ClusterAuthGithubOrg_v1 { org } }
+  }
+  namespaces_v1 { name }
+  vault_audit_backends: vault_audit_backends_v1 { _path }
+}
+"""
+
+
+@pytest.mark.parametrize(
+    ("plugin", "parse"),
+    [
+        (
+            PydanticV1Plugin(),
+            "yield parse_obj_as(Optional[ClusterV1], item)",
+        ),
+        (
+            PydanticV2Plugin(),
+            "yield _ITER_CLUSTERS_V1_ADAPTER.validate_python(item)",
+        ),
+        (
+            MsgspecPlugin(),
+            "yield _ITER_CLUSTERS_V1_DECODER.decode(raw_item)",
+        ),
+    ],
+)
+def test_query_iter(
+    plugin: PydanticBase,
+    parse: str,
+    app_interface_schema: GraphQLSchema,
+) -> None:
+    query = GQLDefinition(
+        feature_flags=FeatureFlags(
+            plugin="plugin", gql_scalar_mappings={}, query_iter=True
+        ),
+        source_file=Path("defs/clusters.gql"),
+        definition=QUERY,
+        fragment_dependencies=set(),
+        kind=GQLDefinitionType.QUERY,
+        name="Clusters",
+    )
+    [generated] = plugin.generate_operations(
+        definitions=[query], schema=app_interface_schema, fragments=[]
+    )
+
+    assert (
+        "def iter_clusters_v1(query_func: Callable, **kwargs: Any) "
+        "-> Iterator[Optional[ClusterV1]]:"
+    ) in generated.content
+    assert 'for item in raw_data.get("clusters_v1") or []:' in generated.content
+    assert parse in generated.content
+    # Aliased top-level fields are iterated by their alias
+    assert '.get("vault_audit_backends"' in generated.content
+    assert generated.exports["iter_clusters_v1_clusters"] == "iter_clusters_v1"
+    assert generated.exports["iter_namespaces_v1_clusters"] == "iter_namespaces_v1"
+    assert f"{INDENT}Iterator,\n" in generated.content
+    compile(generated.content, str(generated.file), "exec")
+
+
+@pytest.mark.parametrize(
+    ("plugin", "runtime"),
+    [(PydanticV2Plugin(), "pydantic"), (MsgspecPlugin(), "msgspec")],
+)
+def test_query_iter_keeps_queried_data(
+    plugin: PydanticBase, runtime: str, app_interface_schema: GraphQLSchema
+) -> None:
+    pytest.importorskip(runtime)
+    query = GQLDefinition(
+        feature_flags=FeatureFlags(
+            plugin="plugin", gql_scalar_mappings={}, query_iter=True
+        ),
+        source_file=Path("defs/clusters.gql"),
+        definition="query Clusters { clusters_v1 { name } }",
+        fragment_dependencies=set(),
+        kind=GQLDefinitionType.QUERY,
+        name="Clusters",
+    )
+    [generated] = plugin.generate_operations(
+        definitions=[query], schema=app_interface_schema, fragments=[]
+    )
+    module: dict[str, Any] = {}
+    exec(  # ruff: ignore[exec-builtin]
+        compile(generated.content, str(generated.file), "exec", dont_inherit=True),
+        module,
+    )
+    data = {"clusters_v1": [{"name": "a"}, None, {"name": "b"}]}
+
+    items = list(module["iter_clusters_v1"](lambda *_, **__: data))
+
+    assert [item and item.name for item in items] == ["a", None, "b"]
+    assert data == {"clusters_v1": [{"name": "a"}, None, {"name": "b"}]}
+    assert module["query"](lambda *_, **__: data).clusters_v1 == items
@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from graphql import ExecutableDefinitionNode, parse, validate
+
+from qenerate.core.feature_flag_parser import FeatureFlags
+from qenerate.core.preprocessor import GQLDefinition, GQLDefinitionType
+from qenerate.plugins.msgspec.plugin import MsgspecPlugin
+from qenerate.plugins.pydantic.plugin import PydanticV1Plugin, PydanticV2Plugin
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+    from qenerate.plugins.pydantic.plugin import PydanticBase
+
+
+def _definition(content: str, kind: GQLDefinitionType) -> GQLDefinition:
+    node = parse(content).definitions[0]
+    assert isinstance(node, ExecutableDefinitionNode)
+    assert node.name
+    return GQLDefinition(
+        feature_flags=FeatureFlags(
+            plugin="plugin", gql_scalar_mappings={}, query_many=True
+        ),
+        source_file=Path(f"defs/{node.name.value}.gql"),
+        definition=content,
+        fragment_dependencies=set(),
+        kind=kind,
+        name=node.name.value,
+    )
+
+
+@pytest.mark.parametrize(
+    ("plugin", "validation"),
+    [
+        (PydanticV1Plugin(), "ClustersQueryData(**entry_data)"),
+        (PydanticV2Plugin(), "ClustersQueryData.model_validate(entry_data)"),
+        (MsgspecPlugin(), "msgspec.convert(entry_data, type=ClustersQueryData)"),
+    ],
+)
+def test_query_many(
+    plugin: PydanticBase, validation: str, app_interface_schema: GraphQLSchema
+) -> None:
+    query = _definition(
+        "query Clusters($name: String) { clusters_v1(name: $name) { name } }",
+        GQLDefinitionType.QUERY,
+    )
+    [generated] = plugin.generate_operations(
+        definitions=[query], schema=app_interface_schema, fragments=[]
+    )
+
+    assert (
+        "def query_many(query_func: Callable, variables_list: list[dict[str, Any]], "
+        "**kwargs: Any) -> list[ClustersQueryData]:"
+    ) in generated.content
+    assert (
+        "_BATCH_VARIABLES = '$name_QENERATE_BATCH_INDEX: String'" in generated.content
+    )
+    assert 'definition = "query ClustersBatch"' in generated.content
+    assert f"return [{validation} for entry_data in data]" in generated.content
+    assert generated.exports["query_many_Clusters"] == "query_many"
+
+
+@pytest.mark.parametrize(
+    "plugin", [PydanticV1Plugin(), PydanticV2Plugin(), MsgspecPlugin()]
+)
+def test_query_many_ignores_mutations(
+    plugin: PydanticBase, github_schema: GraphQLSchema
+) -> None:
+    mutation = _definition(
+        Path("tests/generator/definitions/github/comment_mutation.gql").read_text(
+            encoding="utf-8"
+        ),
+        GQLDefinitionType.MUTATION,
+    )
+    [generated] = plugin.generate_operations(
+        definitions=[mutation], schema=github_schema, fragments=[]
+    )
+
+    assert "def query_many(" not in generated.content
+    assert "query_many_AddComment" not in generated.exports
+
+
+def test_query_many_batches_and_splits(app_interface_schema: GraphQLSchema) -> None:
+    query = _definition(
+        'query Named($name: String = "foo", $path: String = "a \\"b\\"") {\n'
+        "  clusters_v1(name: $name) { name }\n"
+        "  namespaces: namespaces_v1(path: $path) { name }\n"
+        "}",
+        GQLDefinitionType.QUERY,
+    )
+    [generated] = PydanticV2Plugin().generate_operations(
+        definitions=[query], schema=app_interface_schema, fragments=[]
+    )
+    compile(generated.content, str(generated.file), "exec")
+
+    class NamedQueryData:
+        @staticmethod
+        def model_validate(data: dict[str, Any]) -> dict[str, Any]:
+            return data
+
+    calls: list[tuple[str, dict[str, Any]]] = []
+
+    def query_func(definition: str, variables: dict[str, Any]) -> dict[str, Any]:
+        calls.append((definition, variables))
+        return {
+            "b_0_clusters_v1": [{"name": "a"}],
+            "b_0_namespaces": [],
+            "b_1_clusters_v1": [{"name": "b"}],
+            "b_1_namespaces": None,
+        }
+
+    # Run query_many without pydantic, i.e., without the generated classes
+    namespace: dict[str, Any] = {"Any": Any, "NamedQueryData": NamedQueryData}
+    exec(  # ruff: ignore[exec-builtin]
+        "from collections.abc import Callable\n"
+        + generated.content[generated.content.index("_BATCH_VARIABLES = ") :],
+        namespace,
+    )
+    data = namespace["query_many"](
+        query_func, variables_list=[{"name": "a"}, {"name": "b", "path": "p"}]
+    )
+
+    assert data == [
+        {"clusters_v1": [{"name": "a"}], "namespaces": []},
+        {"clusters_v1": [{"name": "b"}], "namespaces": None},
+    ]
+    [(definition, variables)] = calls
+    assert variables == {"name_0": "a", "name_1": "b", "path_1": "p"}
+    assert not validate(app_interface_schema, parse(definition))
+    assert '$name_1: String = "foo"' in definition
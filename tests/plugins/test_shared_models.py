@@ -0,0 +1,171 @@
+import ast
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from qenerate.core.code_command import CodeCommand
+from qenerate.core.preprocessor import Preprocessor
+from qenerate.plugins.pydantic.plugin import PydanticBase
+
+if TYPE_CHECKING:
+    import pytest
+    from graphql import GraphQLSchema
+
+    from qenerate.core.preprocessor import GQLDefinition
+    from qenerate.plugins.pydantic.typed_ast import ParsedNode
+
+INTROSPECTION = "tests/generator/introspection-app-interface.json"
+
+CLUSTERS = """
+# qenerate: plugin=pydantic_v2
+query {name} {{
+  clusters_v1 {{
+    {field}
+    jumpHost {{ hostname port }}
+    auth {{
+      ... on ClusterAuthGithubOrg_v1 {{ org }}
+      ... on ClusterAuthGithubOrgTeam_v1 {{ org team }}
+    }}
+  }}
+}}
+"""
+
+
+def _generate(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, queries: dict[str, str]
+) -> dict[str, str]:
+    """Generate into tmp_path/defs, so modules have valid import paths."""
+    introspection = Path(INTROSPECTION).absolute()
+    monkeypatch.chdir(tmp_path)
+    directory = Path("defs")
+    directory.mkdir()
+    for name, query in queries.items():
+        (directory / f"{name}.gql").write_text(query, encoding="utf-8")
+    CodeCommand(preprocessor=Preprocessor()).generate_code(
+        introspection_file_path=str(introspection),
+        directory=str(directory),
+        shared_models=str(directory),
+    )
+    return {
+        file.stem: file.read_text(encoding="utf-8")
+        for file in sorted(directory.glob("*.py"))
+    }
+
+
+def _classes(content: str) -> list[str]:
+    return [
+        node.name
+        for node in ast.parse(content).body
+        if isinstance(node, ast.ClassDef)
+        and node.name != "ConfiguredBaseModel"
+        # Private classes of convenience functions, e.g., _JsonResponse
+        and not node.name.startswith("_")
+    ]
+
+
+def _imports(content: str, module: str) -> set[str]:
+    return {
+        alias.name
+        for node in ast.parse(content).body
+        if isinstance(node, ast.ImportFrom) and node.module == module
+        for alias in node.names
+    }
+
+
+def test_shared_models(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    files = _generate(
+        tmp_path,
+        monkeypatch,
+        {
+            "a": CLUSTERS.format(name="A", field="name"),
+            "b": CLUSTERS.format(name="B", field="path"),
+            "c": CLUSTERS.format(name="C", field="name"),
+        },
+    )
+    shared_module = "defs.pydantic_v2_shared"
+
+    assert _classes(files["pydantic_v2_shared"]) == [
+        "ClusterJumpHostV1",
+        "ClusterAuthV1",
+        "ClusterAuthGithubOrgV1",
+        "ClusterAuthGithubOrgTeamV1",
+        "ClusterV1",
+    ]
+    # A and C select the same clusters
+    for name in ("a", "c"):
+        assert _imports(files[name], shared_module) == {"ClusterV1"}
+        assert _classes(files[name]) == [f"{name.upper()}QueryData"]
+    # B shares everything but the cluster itself
+    assert _imports(files["b"], shared_module) == {
+        "ClusterJumpHostV1",
+        "ClusterAuthV1",
+        "ClusterAuthGithubOrgV1",
+        "ClusterAuthGithubOrgTeamV1",
+    }
+    assert _classes(files["b"]) == ["ClusterV1", "BQueryData"]
+
+
+def test_shared_models_keep_fragment_spreads_local(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    query = """
+    # qenerate: plugin=pydantic_v2
+    query {name} {{
+      clusters_v1 {{
+        name
+        automationToken {{ ... VaultSecret }}
+      }}
+    }}
+    """
+    files = _generate(
+        tmp_path,
+        monkeypatch,
+        {
+            "fragment": "# qenerate: plugin=pydantic_v2\n"
+            "fragment VaultSecret on VaultSecret_v1 { path }",
+            "a": query.format(name="A"),
+            "b": query.format(name="B"),
+        },
+    )
+
+    assert "pydantic_v2_shared" not in files
+    for name in ("a", "b"):
+        assert _classes(files[name]) == ["ClusterV1", f"{name.upper()}QueryData"]
+
+
+def test_shared_models_skip_empty_module(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    files = _generate(
+        tmp_path,
+        monkeypatch,
+        {
+            "a": CLUSTERS.format(name="A", field="name"),
+            "roles": "# qenerate: plugin=pydantic_v2\nquery Roles { roles_v1 { name } }",
+        },
+    )
+
+    # Nothing is declared identically by two operations
+    assert sorted(files) == ["a", "roles"]
+
+
+def test_shared_models_parse_operations_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    parsed: list[str] = []
+    parse = PydanticBase._parse  # ruff: ignore[private-member-access]
+
+    def recording_parse(definition: GQLDefinition, schema: GraphQLSchema) -> ParsedNode:
+        parsed.append(definition.name)
+        return parse(definition=definition, schema=schema)
+
+    monkeypatch.setattr(PydanticBase, "_parse", staticmethod(recording_parse))
+    _generate(
+        tmp_path,
+        monkeypatch,
+        {
+            "a": CLUSTERS.format(name="A", field="name"),
+            "b": CLUSTERS.format(name="B", field="path"),
+        },
+    )
+
+    assert sorted(parsed) == ["A", "B"]
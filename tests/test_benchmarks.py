@@ -0,0 +1,47 @@
+from typing import TYPE_CHECKING
+
+from benchmarks.corpus import CorpusGenerator, CorpusSpec
+from benchmarks.harness import check_ratios
+from graphql import parse
+
+from qenerate.core.preprocessor import Preprocessor
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from graphql import GraphQLSchema
+
+
+def test_corpus_is_valid(app_interface_schema: GraphQLSchema, tmp_path: Path) -> None:
+    spec = CorpusSpec(queries=10, depth=2, fanout=2)
+    written = CorpusGenerator(schema=app_interface_schema, spec=spec).write(tmp_path)
+
+    files = sorted(tmp_path.rglob("*.gql"))
+    assert len(files) == written
+    assert len(list((tmp_path / "queries").iterdir())) == spec.queries
+
+    definitions = [d for file in files for d in Preprocessor.process_file(file)]
+    Preprocessor().validate(definitions=definitions, schema=app_interface_schema)
+    assert all(parse(d.definition) for d in definitions)
+
+
+def test_check_ratios() -> None:
+    results = {
+        "scenario": {
+            "timings": {"build_client_schema": 0.5, "validate": 2.0, "write": 0.1},
+            "total": 2.6,
+        },
+        "unchecked": {
+            "timings": {"build_client_schema": 0.5, "validate": 100.0},
+            "total": 100.5,
+        },
+    }
+    limits = {
+        "scenario": {"validate": 2.0, "write": 1.0, "total": 5.0},
+        "missing": {"validate": 1.0},
+    }
+
+    assert check_ratios(results, limits) == [
+        "scenario/validate: 4.0x build_client_schema > 2.0x",
+        "scenario/total: 5.2x build_client_schema > 5.0x",
+    ]